@@ -0,0 +1,73 @@
+"""denormalize reservation schedule
+
+Revision ID: 7f1e2a9c4b10
+Revises: 3c27f74c6566
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f1e2a9c4b10'
+down_revision: Union[str, Sequence[str], None] = '3c27f74c6566'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sin franja no hay horario que copiar. No se borran en silencio: se para la
+    # migración antes de tocar el esquema para que se revisen a mano.
+    orphans = op.get_bind().execute(
+        sa.text(
+            "SELECT COUNT(*) FROM reservas r "
+            "WHERE NOT EXISTS (SELECT 1 FROM franjas_horarias f WHERE f.id = r.franja_id)"
+        )
+    ).scalar_one()
+    if orphans:
+        raise RuntimeError(
+            f"Hay {orphans} reservas cuya franja ya no existe (reservas.franja_id sin franjas_horarias); "
+            "corrígelas o muévelas antes de volver a ejecutar la migración"
+        )
+
+    # Primero se añaden como NULL para poder rellenar las filas existentes
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fecha', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('hora_inicio', sa.Time(), nullable=True))
+        batch_op.add_column(sa.Column('hora_fin', sa.Time(), nullable=True))
+
+    # Backfill desde la franja de cada reserva (subconsultas correlacionadas: vale en SQLite y Postgres)
+    op.execute(
+        """
+        UPDATE reservas SET
+            fecha = (SELECT f.fecha FROM franjas_horarias f WHERE f.id = reservas.franja_id),
+            hora_inicio = (SELECT f.hora_inicio FROM franjas_horarias f WHERE f.id = reservas.franja_id),
+            hora_fin = (SELECT f.hora_fin FROM franjas_horarias f WHERE f.id = reservas.franja_id)
+        """
+    )
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.alter_column('fecha', existing_type=sa.Date(), nullable=False)
+        batch_op.alter_column('hora_inicio', existing_type=sa.Time(), nullable=False)
+        batch_op.alter_column('hora_fin', existing_type=sa.Time(), nullable=False)
+
+    op.create_index(
+        'ix_reservas_usuario_fecha_activa',
+        'reservas',
+        ['usuario_id', 'fecha'],
+        unique=False,
+        sqlite_where=sa.text("estado = 'activa'"),
+        postgresql_where=sa.text("estado = 'activa'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reservas_usuario_fecha_activa', table_name='reservas')
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.drop_column('hora_fin')
+        batch_op.drop_column('hora_inicio')
+        batch_op.drop_column('fecha')
@@ -0,0 +1,48 @@
+"""add refresh tokens
+
+Revision ID: a7b0d5e4f8c9
+Revises: f6a9c4d3e7b8
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b0d5e4f8c9'
+down_revision: Union[str, Sequence[str], None] = 'f6a9c4d3e7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tokens_refresco',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=32), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('expira_en', sa.DateTime(), nullable=False),
+    sa.Column('revocado', sa.Boolean(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tokens_refresco_jti'), 'tokens_refresco', ['jti'], unique=True)
+    op.create_index(op.f('ix_tokens_refresco_usuario_id'), 'tokens_refresco', ['usuario_id'], unique=False)
+    op.create_index(op.f('ix_tokens_refresco_expira_en'), 'tokens_refresco', ['expira_en'], unique=False)
+    # SQLite no soporta ALTER COLUMN: batch_alter_table, como en la columna activo
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tokens_revocados_en', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.drop_column('tokens_revocados_en')
+    op.drop_index(op.f('ix_tokens_refresco_expira_en'), table_name='tokens_refresco')
+    op.drop_index(op.f('ix_tokens_refresco_usuario_id'), table_name='tokens_refresco')
+    op.drop_index(op.f('ix_tokens_refresco_jti'), table_name='tokens_refresco')
+    op.drop_table('tokens_refresco')
@@ -0,0 +1,41 @@
+"""add idempotency keys
+
+Revision ID: b3d5e8f1a2c4
+Revises: 7f1e2a9c4b10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d5e8f1a2c4'
+down_revision: Union[str, Sequence[str], None] = '7f1e2a9c4b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('claves_idempotencia',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('clave', sa.String(length=255), nullable=False),
+    sa.Column('huella', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('cuerpo', sa.Text(), nullable=True),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('usuario_id', 'clave', name='uq_clave_idempotencia')
+    )
+    op.create_index(op.f('ix_claves_idempotencia_creado_en'), 'claves_idempotencia', ['creado_en'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_claves_idempotencia_creado_en'), table_name='claves_idempotencia')
+    op.drop_table('claves_idempotencia')
@@ -0,0 +1,49 @@
+"""autoincrement slot and reservation ids
+
+Revision ID: b8c1e6f5a9d0
+Revises: a7b0d5e4f8c9
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c1e6f5a9d0'
+down_revision: Union[str, Sequence[str], None] = 'a7b0d5e4f8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla viva, tabla de archivo): el archivado borra filas de la viva y sin
+# AUTOINCREMENT SQLite vuelve a dar el id más alto borrado.
+_TABLES = (("franjas_horarias", "franjas_horarias_archivo"), ("reservas", "reservas_archivo"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # En Postgres los ids salen de una secuencia y nunca se reutilizan
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, archive in _TABLES:
+        with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+            pass
+        # La secuencia arranca por encima de cualquier id ya archivado
+        op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :t").bindparams(t=table))
+        op.execute(
+            sa.text(
+                f"INSERT INTO sqlite_sequence (name, seq) SELECT :t, MAX(COALESCE((SELECT MAX(id) FROM {table}), 0), "
+                f"COALESCE((SELECT MAX(id) FROM {archive}), 0))"
+            ).bindparams(t=table)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, _ in reversed(_TABLES):
+        with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": False}):
+            pass
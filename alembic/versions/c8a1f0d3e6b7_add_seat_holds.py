@@ -0,0 +1,44 @@
+"""add seat holds
+
+Revision ID: c8a1f0d3e6b7
+Revises: b3d5e8f1a2c4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8a1f0d3e6b7'
+down_revision: Union[str, Sequence[str], None] = 'b3d5e8f1a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('retenciones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('instalacion_id', sa.Integer(), nullable=False),
+    sa.Column('franja_id', sa.Integer(), nullable=False),
+    sa.Column('expira_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['franja_id'], ['franjas_horarias.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['instalacion_id'], ['instalaciones.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_retenciones_expira_en'), 'retenciones', ['expira_en'], unique=False)
+    op.create_index(op.f('ix_retenciones_franja_id'), 'retenciones', ['franja_id'], unique=False)
+    op.create_index(op.f('ix_retenciones_usuario_id'), 'retenciones', ['usuario_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_retenciones_usuario_id'), table_name='retenciones')
+    op.drop_index(op.f('ix_retenciones_franja_id'), table_name='retenciones')
+    op.drop_index(op.f('ix_retenciones_expira_en'), table_name='retenciones')
+    op.drop_table('retenciones')
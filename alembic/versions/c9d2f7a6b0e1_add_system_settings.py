@@ -0,0 +1,33 @@
+"""add system settings
+
+Revision ID: c9d2f7a6b0e1
+Revises: b8c1e6f5a9d0
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d2f7a6b0e1'
+down_revision: Union[str, Sequence[str], None] = 'b8c1e6f5a9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ajustes',
+    sa.Column('clave', sa.String(length=64), nullable=False),
+    sa.Column('valor', sa.String(length=255), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('clave')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ajustes')
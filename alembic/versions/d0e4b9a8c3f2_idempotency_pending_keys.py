@@ -0,0 +1,32 @@
+"""idempotency pending keys
+
+Revision ID: d0e4b9a8c3f2
+Revises: c9d2f7a6b0e1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0e4b9a8c3f2'
+down_revision: Union[str, Sequence[str], None] = 'c9d2f7a6b0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # status_code NULL = clave reservada por una petición que aún no ha respondido
+    with op.batch_alter_table('claves_idempotencia') as batch_op:
+        batch_op.alter_column('status_code', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM claves_idempotencia WHERE status_code IS NULL")
+    with op.batch_alter_table('claves_idempotencia') as batch_op:
+        batch_op.alter_column('status_code', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,43 @@
+"""add schedule templates
+
+Revision ID: d4e7a2b9c1f5
+Revises: c8a1f0d3e6b7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e7a2b9c1f5'
+down_revision: Union[str, Sequence[str], None] = 'c8a1f0d3e6b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('plantillas_horario',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('instalacion_id', sa.Integer(), nullable=False),
+    sa.Column('dias_semana', sa.String(length=20), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False),
+    sa.Column('hora_fin', sa.Time(), nullable=False),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.Column('fecha_desde', sa.Date(), nullable=True),
+    sa.Column('fecha_hasta', sa.Date(), nullable=True),
+    sa.Column('fechas_excluidas', sa.Text(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['instalacion_id'], ['instalaciones.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_plantillas_horario_instalacion_id'), 'plantillas_horario', ['instalacion_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_plantillas_horario_instalacion_id'), table_name='plantillas_horario')
+    op.drop_table('plantillas_horario')
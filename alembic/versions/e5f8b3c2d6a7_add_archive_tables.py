@@ -0,0 +1,66 @@
+"""add archive tables
+
+Revision ID: e5f8b3c2d6a7
+Revises: d4e7a2b9c1f5
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f8b3c2d6a7'
+down_revision: Union[str, Sequence[str], None] = 'd4e7a2b9c1f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('franjas_horarias_archivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('instalacion_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False),
+    sa.Column('hora_fin', sa.Time(), nullable=False),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.Column('plazas_disponibles', sa.Integer(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_franjas_horarias_archivo_instalacion_id'), 'franjas_horarias_archivo', ['instalacion_id'], unique=False)
+    op.create_index(op.f('ix_franjas_horarias_archivo_fecha'), 'franjas_horarias_archivo', ['fecha'], unique=False)
+    op.create_table('reservas_archivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('instalacion_id', sa.Integer(), nullable=False),
+    sa.Column('franja_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False),
+    sa.Column('hora_fin', sa.Time(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reservas_archivo_usuario_id'), 'reservas_archivo', ['usuario_id'], unique=False)
+    op.create_index(op.f('ix_reservas_archivo_instalacion_id'), 'reservas_archivo', ['instalacion_id'], unique=False)
+    op.create_index(op.f('ix_reservas_archivo_franja_id'), 'reservas_archivo', ['franja_id'], unique=False)
+    op.create_index(op.f('ix_reservas_archivo_fecha'), 'reservas_archivo', ['fecha'], unique=False)
+    # Para encontrar rápido el siguiente lote a archivar
+    op.create_index('ix_franjas_horarias_fecha', 'franjas_horarias', ['fecha'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_franjas_horarias_fecha', table_name='franjas_horarias')
+    op.drop_index(op.f('ix_reservas_archivo_fecha'), table_name='reservas_archivo')
+    op.drop_index(op.f('ix_reservas_archivo_franja_id'), table_name='reservas_archivo')
+    op.drop_index(op.f('ix_reservas_archivo_instalacion_id'), table_name='reservas_archivo')
+    op.drop_index(op.f('ix_reservas_archivo_usuario_id'), table_name='reservas_archivo')
+    op.drop_table('reservas_archivo')
+    op.drop_index(op.f('ix_franjas_horarias_archivo_fecha'), table_name='franjas_horarias_archivo')
+    op.drop_index(op.f('ix_franjas_horarias_archivo_instalacion_id'), table_name='franjas_horarias_archivo')
+    op.drop_table('franjas_horarias_archivo')
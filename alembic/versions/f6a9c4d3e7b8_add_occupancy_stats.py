@@ -0,0 +1,55 @@
+"""add occupancy stats
+
+Revision ID: f6a9c4d3e7b8
+Revises: e5f8b3c2d6a7
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a9c4d3e7b8'
+down_revision: Union[str, Sequence[str], None] = 'e5f8b3c2d6a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    stats = op.create_table('estadisticas_ocupacion',
+    sa.Column('instalacion_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('hora', sa.SmallInteger(), nullable=False),
+    sa.Column('reservadas', sa.Integer(), nullable=False),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('instalacion_id', 'fecha', 'hora')
+    )
+
+    # Rellenar con lo que ya hay (la hora se saca en Python para no depender del dialecto)
+    franjas = sa.table('franjas_horarias', sa.column('instalacion_id', sa.Integer), sa.column('fecha', sa.Date),
+                       sa.column('hora_inicio', sa.Time), sa.column('capacidad', sa.Integer))
+    reservas = sa.table('reservas', sa.column('instalacion_id', sa.Integer), sa.column('fecha', sa.Date),
+                        sa.column('hora_inicio', sa.Time), sa.column('estado', sa.String))
+    bind = op.get_bind()
+    totals = defaultdict(lambda: [0, 0])
+    for inst, fecha, hora_inicio, capacidad in bind.execute(sa.select(franjas.c.instalacion_id, franjas.c.fecha, franjas.c.hora_inicio, franjas.c.capacidad)):
+        totals[(inst, fecha, hora_inicio.hour)][1] += capacidad
+    for inst, fecha, hora_inicio in bind.execute(
+        sa.select(reservas.c.instalacion_id, reservas.c.fecha, reservas.c.hora_inicio).where(reservas.c.estado == 'activa')
+    ):
+        totals[(inst, fecha, hora_inicio.hour)][0] += 1
+    if totals:
+        op.bulk_insert(stats, [
+            {'instalacion_id': inst, 'fecha': fecha, 'hora': hora, 'reservadas': r, 'capacidad': c}
+            for (inst, fecha, hora), (r, c) in totals.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('estadisticas_ocupacion')
@@ -1,9 +1,13 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
+from app.core.config import settings
 from app.core.security import decode_token
 from app.models.user import User, UserRole
+from app.utils.user_cache import CachedUser, user_cache
+from app.utils.auth_tokens import revocation_list
 
 
 security_scheme = HTTPBearer(auto_error=True)
@@ -15,21 +19,63 @@ def get_db():
     finally:
         db.close()
 
+@dataclass(frozen=True)
+class TokenClaims:
+    uid: int
+    email: str
+    rol: UserRole
+
+    # Mismo nombre que en User/CachedUser para poder pasarlo a las utilidades
+    @property
+    def id(self) -> int:
+        return self.uid
+
+def _payload(credentials: HTTPAuthorizationCredentials) -> dict:
+    # `credentials.credentials` ES el token (sin el prefijo "Bearer")
+    payload = decode_token(credentials.credentials)
+    # Un token de refresco no sirve como token de acceso; la revocación se mira en memoria
+    if not payload or not payload.get("uid") or payload.get("typ") == "refresh" or revocation_list.is_revoked(payload):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido o expirado")
+    return payload
+
+def get_token_claims(credentials: HTTPAuthorizationCredentials = Security(security_scheme)) -> TokenClaims:
+    """Identidad y rol tal como vienen en el JWT, sin tocar la BD.
+
+    Para rutas que solo necesitan saber quién llama: un cambio de rol o un
+    usuario desactivado no se notan hasta que caduca el token.
+    """
+    payload = _payload(credentials)
+    try:
+        rol = UserRole(payload.get("rol"))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido o expirado")
+    return TokenClaims(uid=payload["uid"], email=payload.get("sub", ""), rol=rol)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Security(security_scheme),
     db: Session = Depends(get_db),
-) -> User:
-    # `credentials.credentials` ES el token (sin el prefijo "Bearer")
-    token = credentials.credentials
-    payload = decode_token(token)
-    if not payload or not payload.get("uid"):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido o expirado")
-    user = db.get(User, payload["uid"])
+) -> CachedUser:
+    payload = _payload(credentials)
+    uid = payload["uid"]
+    if settings.user_cache_enabled:
+        cached = user_cache.get(uid)
+        if cached is not None:
+            # Sin consulta: la sesión de get_db no llega a pedir conexión
+            if not cached.activo:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario desactivado")
+            return cached
+    token = user_cache.token(uid)
+    user = db.get(User, uid)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no existe")
-    return user
+    current = CachedUser.from_user(user)
+    if settings.user_cache_enabled:
+        user_cache.put(current, token)
+    if not current.activo:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario desactivado")
+    return current
 
-def require_admin(current: User = Depends(get_current_user)) -> User:
+def require_admin(current: CachedUser = Depends(get_current_user)) -> CachedUser:
     """Verifica que el usuario actual sea administrador"""
     if current.rol != UserRole.admin:
         raise HTTPException(
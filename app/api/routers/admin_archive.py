@@ -0,0 +1,23 @@
+# app/api/routers/admin_archive.py
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.deps import require_admin
+from app.utils.archive import archive_before, default_cutoff
+from app.utils.jobs import job_registry
+
+router = APIRouter(prefix="/admin/archive", tags=["admin-archive"], dependencies=[Depends(require_admin)])
+
+
+@router.post("", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+def start_archive(
+    before: Optional[date] = Query(default=None, description="Fecha de corte; por defecto hoy menos archive_after_days"),
+):
+    """Lanza el archivado en segundo plano; el progreso se consulta en /admin/jobs/{id}"""
+    cutoff = before or default_cutoff()
+    if cutoff > date.today():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La fecha de corte no puede ser futura")
+    job = job_registry.submit("archivar", lambda db, job: archive_before(db, cutoff, job=job))
+    return job.as_dict()
@@ -0,0 +1,21 @@
+# app/api/routers/admin_jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.deps import require_admin
+from app.utils.jobs import job_registry
+
+router = APIRouter(prefix="/admin/jobs", tags=["admin-jobs"], dependencies=[Depends(require_admin)])
+
+
+@router.get("", response_model=list[dict])
+def list_jobs():
+    """Trabajos en segundo plano de este proceso, del más reciente al más antiguo"""
+    return [job.as_dict() for job in job_registry.list()]
+
+
+@router.get("/{job_id}", response_model=dict)
+def get_job(job_id: str):
+    job = job_registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.as_dict()
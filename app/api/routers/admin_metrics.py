@@ -0,0 +1,39 @@
+# app/api/routers/admin_metrics.py
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_admin
+from app.core.admission import admission_controller
+from app.core.config import settings
+from app.core.password_pool import password_pool
+from app.core.token_cache import token_cache
+from app.utils.holds import hold_sweeper
+from app.utils.slot_cache import slot_cache
+from app.utils.occupancy_index import occupancy_index
+from app.utils.facility_catalog import facility_catalog
+from app.utils.user_cache import user_cache
+from app.utils.auth_tokens import revocation_list
+
+router = APIRouter(prefix="/admin/metrics", tags=["admin-metrics"], dependencies=[Depends(require_admin)])
+
+
+@router.get("", response_model=dict)
+def admin_metrics():
+    """Contadores en memoria de este proceso para ajustar la configuración"""
+    metrics = {
+        "admission": {"enabled": settings.admission_enabled, **admission_controller.stats()},
+        "holds": {"pending": hold_sweeper.pending(), "released": hold_sweeper.released},
+        "slot_cache": {"enabled": settings.slot_cache_enabled, **slot_cache.stats()},
+        "occupancy_index": occupancy_index.stats(),
+        "facility_catalog": facility_catalog.stats(),
+        "password_pool": password_pool.stats(),
+        "token_revocation": revocation_list.stats(),
+        "token_cache": {"enabled": settings.token_cache_enabled, **token_cache.stats()},
+        "user_cache": {"enabled": settings.user_cache_enabled, **user_cache.stats()},
+    }
+    if settings.booking_queue_enabled:
+        from app.utils.booking_queue import get_booking_dispatcher
+        metrics["booking_queue"] = get_booking_dispatcher().stats()
+    if settings.group_commit_enabled:
+        from app.db.group_commit import get_group_committer
+        metrics["group_commit"] = get_group_committer().stats()
+    return metrics
@@ -0,0 +1,42 @@
+# app/api/routers/admin_password_hash.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import get_db, require_admin
+from app.core.config import settings
+from app.core.security import calibrate_hash_rounds, hash_rounds
+from app.utils.password_hash import apply_hash_rounds, rounds_are_shared, store_hash_rounds
+
+router = APIRouter(prefix="/admin/password-hash", tags=["admin-password-hash"], dependencies=[Depends(require_admin)])
+
+
+@router.get("", response_model=dict)
+def get_password_hash_params():
+    return {"scheme": "pbkdf2_sha256", "rounds": hash_rounds(), "target_ms": settings.password_hash_target_ms}
+
+
+@router.post("/calibrate", response_model=dict)
+async def calibrate_password_hash(
+    target_ms: Optional[float] = Query(default=None, gt=0, le=5000, description="Por defecto password_hash_target_ms"),
+    db: Session = Depends(get_db),
+):
+    """Vuelve a medir este host y guarda las rondas para todos los procesos.
+
+    Los demás workers las adoptan en menos de password_hash_sync_seconds; los
+    hashes fuera de banda se rehacen en el siguiente login. Con las rondas
+    fijadas en la configuración no hay nada que compartir: 409.
+    """
+    if not rounds_are_shared():
+        # Aplicarlas solo en este proceso haría que los workers se rehicieran los hashes unos a otros
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Las rondas vienen de la configuración (password_hash_rounds / password_hash_calibrate); cámbialas ahí",
+        )
+    previous = hash_rounds()
+    rounds = await run_in_threadpool(calibrate_hash_rounds, target_ms)
+    rounds = await run_in_threadpool(store_hash_rounds, db, rounds)
+    apply_hash_rounds(rounds)
+    return {"scheme": "pbkdf2_sha256", "previous_rounds": previous, "rounds": rounds}
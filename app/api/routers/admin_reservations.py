@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, require_admin
-from app.utils.admin_reservations import list_reservations, admin_cancel_reservation
+from app.utils.admin_reservations import list_reservations, list_reservations_with_archive, admin_cancel_reservation
 from app.schemas.reservation import AdminReservationOut
 from app.models.slot import Slot
 
@@ -19,8 +19,21 @@ def admin_list_reservations(
     estado: Optional[str] = Query(default=None, description="activa|cancelada"),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    include_archived: bool = Query(default=False, description="Incluir reservas de franjas archivadas"),
     db: Session = Depends(get_db),
 ):
+    if include_archived:
+        rows, total = list_reservations_with_archive(
+            db,
+            usuario_id=usuario_id,
+            instalacion_id=instalacion_id,
+            fecha=fecha,
+            estado=estado,
+            limit=limit,
+            offset=offset,
+        )
+        return {"total": total, "limit": limit, "offset": offset, "items": rows}
+
     items, total = list_reservations(
         db,
         usuario_id=usuario_id,
@@ -34,7 +47,6 @@ def admin_list_reservations(
     # Serializar con datos completos
     result = []
     for res in items:
-        slot = res.franja
         result.append({
             "id": res.id,
             "usuario_id": res.usuario_id,
@@ -43,10 +55,11 @@ def admin_list_reservations(
             "instalacion_id": res.instalacion_id,
             "instalacion_nombre": res.instalacion.nombre,
             "franja_id": res.franja_id,
-            "fecha": slot.fecha,
-            "hora_inicio": slot.hora_inicio,
-            "hora_fin": slot.hora_fin,
+            "fecha": res.fecha,
+            "hora_inicio": res.hora_inicio,
+            "hora_fin": res.hora_fin,
             "estado": res.estado,
+            "archivada": False,
         })
     
     return {"total": total, "limit": limit, "offset": offset, "items": result}
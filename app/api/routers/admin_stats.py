@@ -0,0 +1,27 @@
+# app/api/routers/admin_stats.py
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, require_admin
+from app.utils.occupancy_stats import GROUPINGS, occupancy_report
+
+router = APIRouter(prefix="/admin/stats", tags=["admin-stats"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/occupancy", response_model=list[dict])
+def occupancy(
+    desde: date = Query(..., alias="from", description="YYYY-MM-DD"),
+    hasta: date = Query(..., alias="to", description="YYYY-MM-DD"),
+    instalacion_id: Optional[int] = Query(default=None),
+    group_by: str = Query(default="fecha", description="fecha|dia_semana|hora"),
+    db: Session = Depends(get_db),
+):
+    """Plazas reservadas, ofertadas y tasa de ocupación desde la tabla de estadísticas"""
+    if group_by not in GROUPINGS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"group_by debe ser uno de: {', '.join(GROUPINGS)}")
+    if hasta < desde:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="'to' no puede ser anterior a 'from'")
+    return occupancy_report(db, desde=desde, hasta=hasta, instalacion_id=instalacion_id, group_by=group_by)
@@ -1,12 +1,18 @@
 # app/api/routers/admin_users.py
 from typing import Optional
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.api.deps import get_db, require_admin
 from app.models.user import User
 from app.utils.admin_users import list_users, set_role, set_active
+from app.utils.auth_tokens import revoke_user_tokens
+from app.utils.jobs import job_registry
+from app.utils.user_import import prepare_import, run_import
 
 router = APIRouter(prefix="/admin/users", tags=["admin-users"], dependencies=[Depends(require_admin)])
 
@@ -32,6 +38,24 @@ def admin_list_users(
     return {"total": total, "limit": limit, "offset": offset, "items": items}
 
 
+@router.post("/import", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def admin_import_users(
+    request: Request,
+    format: Optional[str] = Query(default=None, description="csv|ndjson; por defecto según Content-Type"),
+    db: Session = Depends(get_db),
+):
+    """Alta masiva de socios: el cuerpo es el fichero CSV (nombre,email,password[,rol]) o NDJSON.
+
+    El fichero se valida aquí; el alta sigue en segundo plano y el informe queda
+    en el `resultado` de /admin/jobs/{id}.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    pending, errors, total = await run_in_threadpool(prepare_import, db, await request.body(), fmt)
+    job = job_registry.submit("importar_socios", lambda job_db, job: run_import(job_db, job, pending, errors, total))
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(job.as_dict()))
+
+
 @router.get("/{user_id}")
 def admin_get_user(user_id: int, db: Session = Depends(get_db)):
     user = db.get(User, user_id)
@@ -50,3 +74,10 @@ def admin_update_role(user_id: int, body: RoleUpdate, db: Session = Depends(get_
 def admin_update_status(user_id: int, body: StatusUpdate, db: Session = Depends(get_db)):
     user = set_active(db, user_id, body.activo)
     return user
+
+
+@router.post("/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+def admin_revoke_tokens(user_id: int, db: Session = Depends(get_db)):
+    """Invalida todos los tokens emitidos hasta ahora al usuario"""
+    revoke_user_tokens(db, user_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
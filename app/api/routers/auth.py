@@ -1,28 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.schemas.user import UserRegister, UserOut, Token
-from app.utils.users import get_user_by_email, create_user
-from app.core.security import verify_password, create_access_token
+from starlette.concurrency import run_in_threadpool
+from app.schemas.user import UserRegister, UserOut, Token, RefreshRequest
+from app.db.session import SessionLocal
+from app.utils.users import get_user_by_email, create_user, update_password_hash
+from app.utils.password_hash import sync_hash_rounds
+from app.core.config import settings
+from app.core.password_pool import password_pool
+from app.core.security import password_needs_rehash
+from app.utils.auth_tokens import issue_tokens, refresh_tokens, revoke_refresh_token
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
+from app.utils.user_cache import CachedUser
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# Las rutas son async para esperar al pool de contraseñas sin ocupar un hilo;
+# las consultas van al threadpool y sueltan la conexión antes de calcular el hash.
+
+def _credentials(db: Session, email: str) -> tuple[int, str, str, str] | None:
+    # Rondas guardadas por otro worker (recalibración); lee la BD como mucho una vez por intervalo
+    sync_hash_rounds(db)
+    user: User | None = get_user_by_email(db, email)
+    found = (user.id, user.email, user.rol.value, user.hashed_password) if user else None
+    db.rollback()
+    return found
+
+def _email_taken(db: Session, email: str) -> bool:
+    taken = get_user_by_email(db, email) is not None
+    db.rollback()
+    return taken
+
+def _save_rehash(uid: int, old_hash: str, new_hash: str) -> None:
+    # Sesión propia: la de la petición ya se cerró al responder
+    with SessionLocal() as db:
+        update_password_hash(db, uid, old_hash, new_hash)
+
+async def _rehash(uid: int, password: str, old_hash: str) -> None:
+    """Rehace con las rondas actuales un hash obsoleto, después de responder al login."""
+    try:
+        new_hash = await password_pool.hash(password)
+    except HTTPException:
+        # Pool saturado: se intentará en el próximo login
+        return
+    await run_in_threadpool(_save_rehash, uid, old_hash, new_hash)
+
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register(data: UserRegister, db: Session = Depends(get_db)):
-    if get_user_by_email(db, data.email):
+async def register(data: UserRegister, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_email_taken, db, data.email):
         raise HTTPException(status_code=400, detail="Email ya registrado")
-    return create_user(db, nombre=data.nombre, email=data.email, password=data.password)
+    hashed = await password_pool.hash(data.password)
+    return await run_in_threadpool(create_user, db, nombre=data.nombre, email=data.email, hashed_password=hashed)
 
 @router.post("/login", response_model=Token)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user: User | None = get_user_by_email(db, form.username)
-    if not user or not verify_password(form.password, user.hashed_password):
+async def login(
+    background: BackgroundTasks,
+    form: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
+):
+    creds = await run_in_threadpool(_credentials, db, form.username)
+    if not creds or not await password_pool.verify(form.password, creds[3]):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
-    token = create_access_token(sub=user.email, uid=user.id, rol=user.rol.value)
-    return {"access_token": token, "token_type": "bearer"}
+    uid, email, rol, hashed = creds
+    if settings.password_rehash_enabled and password_needs_rehash(hashed):
+        background.add_task(_rehash, uid, form.password, hashed)
+    return await run_in_threadpool(issue_tokens, db, uid=uid, email=email, rol=rol)
+
+@router.post("/refresh", response_model=Token)
+def refresh(data: RefreshRequest, db: Session = Depends(get_db)):
+    """Nuevo token de acceso (y de refresco) sin volver a verificar la contraseña"""
+    return refresh_tokens(db, data.refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(data: RefreshRequest, db: Session = Depends(get_db)):
+    revoke_refresh_token(db, data.refresh_token)
+    return None
 
 @router.get("/me", response_model=UserOut)
-def me(current: User = Depends(get_current_user)):
+def me(current: CachedUser = Depends(get_current_user)):
     return current
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.api.deps import get_db, require_admin
 from app.schemas.facility import FacilityCreate, FacilityUpdate, FacilityOut
-from app.utils.facilities import create_facility, get_facility, list_facilities, update_facility, delete_facility
-from app.models.user import User
+from app.utils.facilities import (
+    create_facility, get_facility, get_facility_row, list_facilities, update_facility, delete_facility,
+    delete_facility_chunked,
+)
+from app.utils.jobs import job_registry
+from app.utils.user_cache import CachedUser
+from app.utils.listing_versions import listing_versions, etag_matches, make_etag
 
 router = APIRouter(prefix="/facilities", tags=["Facilities"])
 
 @router.get("", response_model=list[FacilityOut])
-def list_all(only_active: bool = Query(True), db: Session = Depends(get_db)):
+def list_all(
+    response: Response,
+    only_active: bool = Query(True),
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    version = listing_versions.facilities_version()
+    matched = etag_matches(if_none_match, version)
+    if matched:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": matched})
+    response.headers["ETag"] = make_etag(version)
     return list_facilities(db, only_active=only_active)
 
 @router.get("/{fac_id}", response_model=FacilityOut)
@@ -19,20 +36,28 @@ def retrieve(fac_id: int, db: Session = Depends(get_db)):
     return fac
 
 @router.post("", response_model=FacilityOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
-def create(data: FacilityCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def create(data: FacilityCreate, db: Session = Depends(get_db), _: CachedUser = Depends(require_admin)):
     return create_facility(db, nombre=data.nombre, tipo=data.tipo, aforo=data.aforo, activo=data.activo)
 
 @router.patch("/{fac_id}", response_model=FacilityOut, dependencies=[Depends(require_admin)])
-def patch(fac_id: int, data: FacilityUpdate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    fac = get_facility(db, fac_id)
+def patch(fac_id: int, data: FacilityUpdate, db: Session = Depends(get_db), _: CachedUser = Depends(require_admin)):
+    fac = get_facility_row(db, fac_id)
     if not fac:
         raise HTTPException(status_code=404, detail="Instalación no encontrada")
     return update_facility(db, fac, **data.model_dump(exclude_unset=True))
 
 @router.delete("/{fac_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
-def remove(fac_id: int, db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    fac = get_facility(db, fac_id)
+def remove(
+    fac_id: int,
+    background: bool = Query(False, description="Borrar por lotes en segundo plano; devuelve 202 con el trabajo"),
+    db: Session = Depends(get_db),
+    _: CachedUser = Depends(require_admin),
+):
+    fac = get_facility_row(db, fac_id)
     if not fac:
         raise HTTPException(status_code=404, detail="Instalación no encontrada")
+    if background:
+        job = job_registry.submit("borrar_instalacion", lambda job_db, job: delete_facility_chunked(job_db, job, fac_id))
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(job.as_dict()))
     delete_facility(db, fac)
     return None
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.api.deps import get_db, get_current_user
+from app.schemas.hold import HoldCreate, HoldOut
+from app.schemas.reservation import ReservationOut
+from app.utils.holds import create_hold, get_hold, confirm_hold, release_hold
+from app.utils.user_cache import CachedUser
+
+router = APIRouter(prefix="/holds", tags=["Holds"])
+
+@router.post("", response_model=HoldOut, status_code=status.HTTP_201_CREATED)
+def hold(data: HoldCreate, db: Session = Depends(get_db), current: CachedUser = Depends(get_current_user)):
+    return create_hold(db, user=current, instalacion_id=data.instalacion_id, franja_id=data.franja_id, minutes=data.minutos)
+
+@router.post("/{hold_id}/confirm", response_model=ReservationOut, status_code=status.HTTP_201_CREATED)
+def confirm(hold_id: int, db: Session = Depends(get_db), current: CachedUser = Depends(get_current_user)):
+    h = get_hold(db, hold_id)
+    if not h:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Retención no encontrada")
+    return confirm_hold(db, hold=h, user=current)
+
+@router.delete("/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+def release(hold_id: int, db: Session = Depends(get_db), current: CachedUser = Depends(get_current_user)):
+    h = get_hold(db, hold_id)
+    if not h:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Retención no encontrada")
+    release_hold(db, hold=h, user=current)
+    return None
@@ -1,45 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app.api.deps import get_db, get_current_user
-from app.schemas.reservation import ReservationCreate, ReservationOut
+from app.api.deps import get_db, get_current_user, get_token_claims, TokenClaims
+from app.schemas.reservation import (
+    ReservationCreate, ReservationOut, ReservationBatchCreate, ReservationBatchOut, ReservationBlockCreate,
+)
 from app.utils.reservations import (
-    create_reservation, list_reservations_for_user, get_reservation, cancel_reservation
+    create_reservation, list_reservations_for_user, get_reservation, cancel_reservation,
+    create_reservation_grouped, cancel_reservation_grouped, create_reservations_batch, create_block_reservation,
+    create_reservation_from_template,
 )
-from app.models.user import User
-from app.models.slot import Slot
-from app.models.facility import Facility
+from app.utils.user_cache import CachedUser
+from app.utils.facilities import get_facility
+from app.core.config import settings
+from app.utils.booking_queue import create_reservation_queued
+from app.utils.idempotency import idempotency_store, request_fingerprint
+from app.utils.schedule_templates import TemplateRef
 
 router = APIRouter(prefix="/reservations", tags=["Reservations"])
 
-@router.post("", response_model=ReservationOut, status_code=status.HTTP_201_CREATED)
-def book(data: ReservationCreate, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    res = create_reservation(db, user=current, instalacion_id=data.instalacion_id, franja_id=data.franja_id)
-    slot = db.get(Slot, res.franja_id)  # completar fecha/hora en respuesta
+def _book_fn():
+    if settings.group_commit_enabled:
+        return create_reservation_grouped
+    if settings.booking_queue_enabled:
+        return create_reservation_queued
+    return create_reservation
+
+def _franja(data: ReservationCreate) -> int | TemplateRef:
+    if data.franja_id is not None:
+        return data.franja_id
+    return TemplateRef(data.plantilla_id, data.fecha)
+
+def _reservation_body(res) -> dict:
     return {
         "id": res.id,
         "usuario_id": res.usuario_id,
         "instalacion_id": res.instalacion_id,
         "franja_id": res.franja_id,
-        "fecha": slot.fecha,
-        "hora_inicio": slot.hora_inicio,
-        "hora_fin": slot.hora_fin,
+        "fecha": res.fecha,
+        "hora_inicio": res.hora_inicio,
+        "hora_fin": res.hora_fin,
     }
 
+@router.post("", response_model=ReservationOut, status_code=status.HTTP_201_CREATED)
+def book(
+    data: ReservationCreate,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+    db: Session = Depends(get_db),
+    current: CachedUser = Depends(get_current_user),
+):
+    claim = None
+    if idempotency_key:
+        huella = request_fingerprint("POST", "/reservations", data.model_dump(exclude_none=True))
+        stored, claim = idempotency_store.begin(db, current.id, idempotency_key, huella)
+        if stored:
+            return JSONResponse(status_code=stored.status_code, content=stored.body)
+
+    def save_response(s: Session, res) -> None:
+        # En la transacción de la reserva: o se confirman las dos o ninguna
+        idempotency_store.complete(s, claim, status.HTTP_201_CREATED, _reservation_body(res))
+
+    try:
+        before_commit = save_response if claim else None
+        if data.franja_id is not None:
+            res = _book_fn()(db, user=current, instalacion_id=data.instalacion_id, franja_id=data.franja_id, before_commit=before_commit)
+        else:
+            # Franja virtual: se crea en la misma transacción que la reserva
+            res = create_reservation_from_template(
+                db, user=current, instalacion_id=data.instalacion_id, plantilla_id=data.plantilla_id, fecha=data.fecha,
+                before_commit=before_commit,
+            )
+    except Exception:
+        if claim:
+            idempotency_store.release(db, claim)
+        raise
+    body = _reservation_body(res)
+    if claim:
+        idempotency_store.remember(claim, status.HTTP_201_CREATED, body)
+    return body
+
+@router.post("/batch", response_model=ReservationBatchOut)
+def book_batch(data: ReservationBatchCreate, db: Session = Depends(get_db), current: CachedUser = Depends(get_current_user)):
+    items = create_reservations_batch(
+        db,
+        user=current,
+        items=[(it.instalacion_id, _franja(it)) for it in data.items],
+        all_or_nothing=data.all_or_nothing,
+    )
+    return {"creadas": sum(1 for it in items if it["reserva"]), "items": items}
+
+@router.post("/block", response_model=list[ReservationOut], status_code=status.HTTP_201_CREATED)
+def book_block(data: ReservationBlockCreate, db: Session = Depends(get_db), current: CachedUser = Depends(get_current_user)):
+    return create_block_reservation(
+        db,
+        user=current,
+        instalacion_id=data.instalacion_id,
+        fecha=data.fecha,
+        n=data.franjas,
+        hora_inicio=data.hora_inicio,
+    )
+
 @router.get("/my")
-def my_reservations(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+def my_reservations(db: Session = Depends(get_db), current: TokenClaims = Depends(get_token_claims)):
     reservas = list_reservations_for_user(db, current.id)
     out = []
     for r in reservas:
-        slot = db.get(Slot, r.franja_id)
-        instalacion = db.get(Facility, r.instalacion_id)
+        instalacion = get_facility(db, r.instalacion_id)
         out.append({
             "id": r.id,
             "usuario_id": r.usuario_id,
             "instalacion_id": r.instalacion_id,
             "franja_id": r.franja_id,
-            "fecha": slot.fecha,
-            "hora_inicio": slot.hora_inicio,
-            "hora_fin": slot.hora_fin,
+            "fecha": r.fecha,
+            "hora_inicio": r.hora_inicio,
+            "hora_fin": r.hora_fin,
             "instalacion": {
                 "id": instalacion.id,
                 "nombre": instalacion.nombre,
@@ -48,9 +122,32 @@ def my_reservations(db: Session = Depends(get_db), current: User = Depends(get_c
     return out
 
 @router.delete("/{res_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel(res_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    res = get_reservation(db, res_id)
-    if not res:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada")
-    cancel_reservation(db, res=res, user=current)
+def cancel(
+    res_id: int,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+    db: Session = Depends(get_db),
+    current: CachedUser = Depends(get_current_user),
+):
+    claim = None
+    if idempotency_key:
+        huella = request_fingerprint("DELETE", f"/reservations/{res_id}")
+        stored, claim = idempotency_store.begin(db, current.id, idempotency_key, huella)
+        if stored:
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    def save_response(s: Session, _res) -> None:
+        idempotency_store.complete(s, claim, status.HTTP_204_NO_CONTENT)
+
+    try:
+        res = get_reservation(db, res_id)
+        if not res:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada")
+        cancel_fn = cancel_reservation_grouped if settings.group_commit_enabled else cancel_reservation
+        cancel_fn(db, res=res, user=current, before_commit=save_response if claim else None)
+    except Exception:
+        if claim:
+            idempotency_store.release(db, claim)
+        raise
+    if claim:
+        idempotency_store.remember(claim, status.HTTP_204_NO_CONTENT)
     return None
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.api.deps import get_db, require_admin
+from app.schemas.schedule_template import ScheduleTemplateCreate, ScheduleTemplateOut
+from app.utils.schedule_templates import create_templates, list_templates, get_template, delete_template
+from app.utils.facilities import get_facility
+
+router = APIRouter(prefix="/schedule-templates", tags=["Schedule templates"])
+
+@router.post("", response_model=list[ScheduleTemplateOut], status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
+def create(data: ScheduleTemplateCreate, db: Session = Depends(get_db)):
+    return create_templates(
+        db,
+        instalacion_id=data.instalacion_id,
+        tramos=[(t.hora_inicio, t.hora_fin) for t in data.tramos],
+        dias_semana=data.dias_semana,
+        capacidad=data.capacidad,
+        fecha_desde=data.fecha_desde,
+        fecha_hasta=data.fecha_hasta,
+        fechas_excluidas=data.fechas_excluidas,
+    )
+
+@router.get("/by-facility/{fac_id}", response_model=list[ScheduleTemplateOut])
+def list_for_facility(fac_id: int, db: Session = Depends(get_db)):
+    if not get_facility(db, fac_id):
+        raise HTTPException(status_code=404, detail="Instalación no encontrada")
+    return list_templates(db, fac_id)
+
+@router.delete("/{plantilla_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
+def remove(plantilla_id: int, db: Session = Depends(get_db)):
+    t = get_template(db, plantilla_id)
+    if not t:
+        raise HTTPException(status_code=404, detail="Plantilla no encontrada")
+    delete_template(db, t)
+    return None
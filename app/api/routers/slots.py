@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime
 from app.api.deps import get_db, require_admin
-from app.schemas.slot import SlotCreate, SlotOut
-from app.utils.slots import create_slot, list_slots_for_facility_date, get_slot, delete_slot
+from app.schemas.slot import SlotCreate, SlotOut, SlotBulkCreate, SlotBulkOut, SlotListOut
+from app.utils.slots import create_slot, create_slots_bulk, list_slots_for_facility_date, get_slot, delete_slot
 from app.utils.facilities import get_facility
-from app.models.user import User
+from app.utils.schedule_templates import list_slots_with_templates
+from app.utils.availability import availability_grid
+from app.utils.listing_versions import listing_versions, etag_matches, make_etag
+from app.utils.occupancy_index import occupancy_index
+from app.utils.user_cache import CachedUser
 
 router = APIRouter(prefix="/slots", tags=["Slots"])
 
+def _parse_ids(raw: str) -> list[int]:
+    try:
+        return [int(x) for x in raw.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="facility_ids debe ser una lista de enteros separados por comas")
+
 @router.post("", response_model=SlotOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
-def create(data: SlotCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def create(data: SlotCreate, db: Session = Depends(get_db), _: CachedUser = Depends(require_admin)):
     fac = get_facility(db, data.instalacion_id)
     if not fac:
         raise HTTPException(status_code=404, detail="Instalación no encontrada")
@@ -27,20 +37,55 @@ def create(data: SlotCreate, db: Session = Depends(get_db), _: User = Depends(re
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
-@router.get("/by-facility/{fac_id}", response_model=list[SlotOut])
+@router.post("/bulk", response_model=SlotBulkOut, dependencies=[Depends(require_admin)])
+def create_bulk(data: SlotBulkCreate, db: Session = Depends(get_db)):
+    creadas, omitidas = create_slots_bulk(db, [it.model_dump() for it in data.items])
+    return SlotBulkOut(creadas=creadas, omitidas=omitidas)
+
+@router.get("/availability", response_model=dict)
+def availability(
+    desde: date = Query(..., alias="from", description="YYYY-MM-DD"),
+    hasta: date = Query(..., alias="to", description="YYYY-MM-DD"),
+    facility_ids: str | None = Query(None, description="IDs separados por comas; por defecto, todas las activas"),
+    db: Session = Depends(get_db),
+):
+    ids = _parse_ids(facility_ids) if facility_ids else None
+    return availability_grid(db, desde=desde, hasta=hasta, facility_ids=ids)
+
+@router.get("/next-available", response_model=list[SlotListOut])
+def next_available(
+    facility_ids: str = Query(..., description="IDs separados por comas"),
+    after: datetime | None = Query(None, description="YYYY-MM-DDTHH:MM; por defecto, ahora"),
+    min_seats: int = Query(1, ge=1),
+    db: Session = Depends(get_db),
+):
+    return occupancy_index.next_available(
+        db, facility_ids=_parse_ids(facility_ids), after=after or datetime.now(), min_seats=min_seats
+    )
+
+@router.get("/by-facility/{fac_id}", response_model=list[SlotListOut])
 def list_for_facility(
     fac_id: int,
+    response: Response,
     fecha: date = Query(..., description="YYYY-MM-DD"),
     available_only: bool = Query(False),
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
 ):
+    # El 404 va antes que el 304: If-None-Match: * no debe ocultar una instalación inexistente
     fac = get_facility(db, fac_id)
     if not fac:
         raise HTTPException(status_code=404, detail="Instalación no encontrada")
-    return list_slots_for_facility_date(db, instalacion_id=fac_id, fecha=fecha, only_available=available_only)
+    # La versión se toma antes de leer: si cambia entre medias, el siguiente GET ya trae otra
+    version = listing_versions.slots_version(fac_id, fecha)
+    matched = etag_matches(if_none_match, version)
+    if matched:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": matched})
+    response.headers["ETag"] = make_etag(version)
+    return list_slots_with_templates(db, instalacion_id=fac_id, fecha=fecha, only_available=available_only)
 
 @router.delete("/{slot_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
-def remove(slot_id: int, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def remove(slot_id: int, db: Session = Depends(get_db), _: CachedUser = Depends(require_admin)):
     slot = get_slot(db, slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="Franja no encontrada")
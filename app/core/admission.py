@@ -0,0 +1,135 @@
+"""
+Control de admisión para las rutas de escritura.
+
+Limita cuántas peticiones de escritura (reservas, retenciones...) se atienden a
+la vez y cuántas pueden esperar turno. Lo que no cabe en la cola, o espera más
+de la cuenta, recibe enseguida un 503 con Retry-After en lugar de ocupar un
+hilo del threadpool y una conexión a la BD; así /health y las lecturas siguen
+respondiendo durante los picos de apertura de inscripciones.
+"""
+import asyncio
+import json
+from collections import deque
+
+from app.core.config import settings
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        max_concurrency: int | None = None,
+        max_queue: int | None = None,
+        queue_timeout: float | None = None,
+        retry_after: int | None = None,
+    ):
+        self.max_concurrency = max_concurrency if max_concurrency is not None else settings.admission_max_concurrency
+        self.max_queue = max_queue if max_queue is not None else settings.admission_max_queue
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.admission_queue_timeout_seconds
+        self.retry_after = retry_after if retry_after is not None else settings.admission_retry_after_seconds
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    async def acquire(self) -> bool:
+        """Espera turno. Devuelve False si la petición debe rechazarse."""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            done, _ = await asyncio.wait({fut}, timeout=self.queue_timeout)
+        except BaseException:
+            # Cliente desconectado mientras esperaba: si ya se le había cedido el hueco, se devuelve
+            if fut.done() and not fut.cancelled():
+                self.release()
+            else:
+                self._discard(fut)
+            raise
+        if not done:
+            self._discard(fut)
+            self.rejected_timeout += 1
+            return False
+        # release() nos ha cedido su hueco: in_flight ya lo cuenta
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+    def _discard(self, fut: asyncio.Future) -> None:
+        fut.cancel()
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+
+admission_controller = AdmissionController()
+
+
+class AdmissionControlMiddleware:
+    """Middleware ASGI que aplica `admission_controller` a las escrituras de las rutas configuradas."""
+
+    def __init__(self, app, controller: AdmissionController | None = None, paths: list[str] | None = None):
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths if paths is not None else settings.admission_paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller or admission_controller
+        if not await controller.acquire():
+            await self._reject(send, controller.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+    @staticmethod
+    async def _reject(send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Servicio saturado, inténtalo de nuevo en unos segundos"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
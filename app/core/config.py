@@ -9,7 +9,11 @@ class Settings(BaseSettings):
     
     # Seguridad JWT
     jwt_secret: str = "CAMBIA_ESTE_SECRETO_EN_PRODUCCION"
+    # El frontend incluido no renueva con el token de refresco (un 401 lleva al login):
+    # no bajar de aquí mientras no lo haga
     access_token_expire_minutes: int = 60
+    # Tokens de refresco: renuevan el de acceso sin volver a verificar la contraseña
+    refresh_token_expire_days: int = 14
     
     # CORS - se parsea desde string separado por comas
     cors_origins_str: str = "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000"
@@ -20,12 +24,100 @@ class Settings(BaseSettings):
     
     # Logging
     log_level: str = "INFO"
+
+    # Cola de reservas por franja (un único escritor por franja_id)
+    booking_queue_enabled: bool = False
+    booking_queue_max_batch: int = 64
+    booking_queue_idle_seconds: float = 30.0
+    booking_queue_timeout_seconds: float = 10.0
+
+    # Group commit de reservas/cancelaciones (ventana en milisegundos)
+    group_commit_enabled: bool = False
+    group_commit_window_ms: float = 5.0
+    group_commit_max_batch: int = 32
+
+    # Idempotency-Key en reservas (respuestas guardadas en memoria y en BD)
+    idempotency_ttl_seconds: int = 86400
+    idempotency_cache_size: int = 10000
+    # Un reintento espera como mucho esto a que termine la petición en curso con su clave;
+    # una clave en curso más antigua que pending_seconds se da por abandonada
+    idempotency_wait_seconds: float = 10.0
+    idempotency_pending_seconds: int = 60
+
+    # Retenciones temporales de plaza
+    hold_default_minutes: int = 10
+    hold_max_minutes: int = 30
+    hold_sweeper_enabled: bool = True
+
+    # Control de admisión en rutas de escritura (503 + Retry-After al saturarse)
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 16
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 2.0
+    admission_retry_after_seconds: int = 1
+    admission_paths_str: str = "/reservations,/holds"
+
+    # Caché LRU de franjas por (instalación, fecha, solo disponibles)
+    slot_cache_enabled: bool = True
+    slot_cache_size: int = 2048
+    slot_cache_ttl_seconds: float = 30.0
+    # Validez de los ETag de listados (acota los 304 tras escrituras de otros procesos)
+    listing_etag_ttl_seconds: float = 30.0
+
+    # Índice en memoria de plazas libres (próxima franja disponible)
+    occupancy_index_ttl_seconds: float = 300.0
+
+    # Catálogo de instalaciones en memoria (se recarga al escribir o al caducar)
+    facility_catalog_preload: bool = True
+    facility_catalog_ttl_seconds: float = 300.0
+
+    # Caché de usuarios autenticados (get_current_user)
+    user_cache_enabled: bool = True
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 30.0
+
+    # Pool de procesos para hash/verificación de contraseñas (0 = uno por núcleo)
+    password_pool_enabled: bool = True
+    password_pool_workers: int = 0
+    password_pool_max_queue: int = 64
+
+    # Coste del hash de contraseñas (pbkdf2_sha256). Con rounds=0 se usan las rondas
+    # guardadas en la BD o, si no hay, se calibra al arrancar para que una
+    # verificación cueste ~target_ms en un núcleo y se guardan para todos los workers
+    password_hash_rounds: int = 0
+    password_hash_calibrate: bool = True
+    password_hash_target_ms: float = 250.0
+    password_hash_min_rounds: int = 29000
+    # Cada cuánto se releen de la BD las rondas calibradas por otro proceso
+    password_hash_sync_seconds: float = 60.0
+    # Rehacer en segundo plano, tras el login, los hashes con parámetros obsoletos
+    password_rehash_enabled: bool = True
+
+    # Caché de JWT ya verificados (hasta su exp)
+    token_cache_enabled: bool = True
+    token_cache_size: int = 10000
+
+    # Lista de revocación en memoria; se recarga de la BD cada tantos segundos
+    token_revocation_sync_enabled: bool = True
+    token_revocation_reload_seconds: float = 60.0
+
+    # Importación masiva de socios (POST /admin/users/import)
+    user_import_max_rows: int = 20000
+
+    # Archivado de franjas pasadas (y sus reservas) a tablas frías
+    archive_after_days: int = 365
+    archive_chunk_size: int = 1000
     
     @property
     def cors_origins(self) -> List[str]:
         """Parse CORS origins from comma-separated string"""
         origins_str = os.getenv("CORS_ORIGINS", self.cors_origins_str)
         return [origin.strip() for origin in origins_str.split(",")]
+
+    @property
+    def admission_paths(self) -> List[str]:
+        """Prefijos de ruta sujetos al control de admisión"""
+        return [p.strip() for p in self.admission_paths_str.split(",") if p.strip()]
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,153 @@
+"""
+Hash y verificación de contraseñas en un pool de procesos.
+
+pbkdf2_sha256 es CPU pura y retiene el GIL: hecho en el threadpool, un pico de
+logins deja sin hilos al resto de rutas. Aquí se manda a un
+ProcessPoolExecutor de `password_pool_workers` procesos (0 = uno por núcleo) y
+las rutas lo esperan con await. Si ya hay `password_pool_max_queue` peticiones
+esperando además de las que se están calculando, se responde 503 con
+Retry-After en lugar de encolar sin límite, igual que el control de admisión.
+
+Con `password_pool_enabled` a False se calcula en el threadpool (tests,
+entornos de un solo núcleo).
+
+`hash_many` (importaciones masivas) trocea en lotes de HASH_BATCH_SIZE y deja
+como mucho `workers - 1` en vuelo, para que siempre quede un proceso libre y
+los logins no esperen detrás de la importación.
+
+Los procesos hijos arrancan con las rondas de pbkdf2 vigentes en el padre
+(security.set_hash_rounds); si cambian, `reconfigure` crea un pool nuevo y deja
+que el anterior termine lo que ya tenía encolado.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import hash_password, hash_rounds, set_hash_rounds, verify_password
+
+
+# Contraseñas por llamada al pool en hash_many: un login espera como mucho un lote
+HASH_BATCH_SIZE = 16
+
+
+def _hash_batch(passwords: list[str]) -> list[str]:
+    return [hash_password(p) for p in passwords]
+
+
+class PasswordPool:
+    def __init__(self, *, workers: int | None = None, max_queue: int | None = None, retry_after: int | None = None):
+        self.workers = workers or settings.password_pool_workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else settings.password_pool_max_queue
+        self.retry_after = retry_after if retry_after is not None else settings.admission_retry_after_seconds
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(verify_password, plain, hashed)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hashes de muchas contraseñas, en el mismo orden.
+
+        No pasa por el límite de cola (su concurrencia ya está acotada) y nunca
+        ocupa todos los procesos.
+        """
+        slots = asyncio.Semaphore(max(1, self.workers - 1))
+
+        async def run_batch(batch: list[str]) -> list[str]:
+            async with slots:
+                return await self._run(_hash_batch, batch, bounded=False)
+
+        batches = [passwords[i:i + HASH_BATCH_SIZE] for i in range(0, len(passwords), HASH_BATCH_SIZE)]
+        results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [h for batch in results for h in batch]
+
+    def start(self) -> None:
+        """Arranca los procesos ya, para que el primer login no pague el arranque."""
+        if settings.password_pool_enabled:
+            self._get_executor()
+
+    def reconfigure(self) -> None:
+        """Tras cambiar las rondas: las peticiones nuevas van a procesos que ya arrancan con ellas.
+
+        El pool anterior no cancela nada: los logins e importaciones que ya
+        esperaban en él terminan (con las rondas anteriores) y sus procesos salen.
+        """
+        new = self._new_executor() if settings.password_pool_enabled else None
+        with self._lock:
+            old, self._executor = self._executor, new
+        if old is not None:
+            old.shutdown(wait=False, cancel_futures=False)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.password_pool_enabled,
+                "hash_rounds": hash_rounds(),
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    async def _run(self, fn, *args, bounded: bool = True):
+        with self._lock:
+            if bounded and self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servidor saturado, inténtalo de nuevo en unos segundos",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self.pending += 1
+        try:
+            if not settings.password_pool_enabled:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            except BrokenProcessPool:
+                # Un proceso del pool ha muerto: se recrea y se reintenta una vez
+                self.shutdown()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: los hijos no heredan hilos ni conexiones abiertas del proceso de la API
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=set_hash_rounds,
+            initargs=(hash_rounds(),),
+        )
+
+
+password_pool = PasswordPool()
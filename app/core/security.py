@@ -1,11 +1,26 @@
+import logging
+import time as _time
+import uuid
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
+from passlib.hash import pbkdf2_sha256
 from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.token_cache import token_cache
+
+logger = logging.getLogger(__name__)
 
 # Configuración de hash de contraseñas
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+# Un hash cuyas rondas se alejan más de esto de las actuales se rehace en el siguiente login
+REHASH_TOLERANCE = 0.2
+# Rondas de la medición; el resultado se redondea a múltiplos de ROUNDS_STEP
+_SAMPLE_ROUNDS = 10000
+ROUNDS_STEP = 1000
+
+_hash_rounds: int = pbkdf2_sha256.default_rounds
+
 # Algoritmo JWT
 ALGORITHM = "HS256"
 
@@ -15,14 +30,70 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+def password_needs_rehash(hashed: str) -> bool:
+    """True si el hash es de otro esquema o sus rondas quedan fuera de la banda actual."""
+    return pwd_context.needs_update(hashed)
+
+def hash_rounds() -> int:
+    return _hash_rounds
+
+def set_hash_rounds(rounds: int) -> None:
+    """Rondas para los hashes nuevos; los que se desvíen más de REHASH_TOLERANCE quedan obsoletos."""
+    global _hash_rounds
+    _hash_rounds = rounds
+    pwd_context.update(
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=int(rounds * (1 - REHASH_TOLERANCE)),
+        pbkdf2_sha256__max_rounds=int(rounds * (1 + REHASH_TOLERANCE)),
+    )
+
+def calibrate_hash_rounds(target_ms: float | None = None, min_rounds: int | None = None) -> int:
+    """Mide este host y devuelve las rondas con las que verificar cuesta ~target_ms en un núcleo.
+
+    Se toma la mejor de tres mediciones (las otras suelen llevar ruido de otros
+    procesos) y nunca se baja de `min_rounds`.
+    """
+    target_ms = target_ms or settings.password_hash_target_ms
+    min_rounds = min_rounds if min_rounds is not None else settings.password_hash_min_rounds
+    sample = pbkdf2_sha256.using(rounds=_SAMPLE_ROUNDS)
+    elapsed = float("inf")
+    for _ in range(3):
+        start = _time.perf_counter()
+        sample.hash("calibracion")
+        elapsed = min(elapsed, _time.perf_counter() - start)
+    rounds = int(_SAMPLE_ROUNDS * target_ms / 1000 / elapsed) // ROUNDS_STEP * ROUNDS_STEP
+    rounds = max(rounds, min_rounds)
+    logger.info("pbkdf2_sha256: %d rondas para ~%.0f ms por verificación", rounds, target_ms)
+    return rounds
+
+def _iat(now: datetime) -> float:
+    # Con microsegundos: un token emitido en el mismo segundo que una revocación
+    # (p.ej. el login justo después) debe quedar fuera de ella
+    return round(now.timestamp(), 6)
+
 def create_access_token(*, sub: str, uid: int, rol: str, minutes: int | None = None) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=minutes or settings.access_token_expire_minutes)
-    payload = {"sub": sub, "uid": uid, "rol": rol, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
+    payload = {"sub": sub, "uid": uid, "rol": rol, "iat": _iat(now), "exp": int(exp.timestamp())}
     return jwt.encode(payload, settings.jwt_secret, algorithm=ALGORITHM)
 
+def create_refresh_token(*, uid: int, days: int | None = None) -> tuple[str, str, datetime]:
+    """Devuelve (token, jti, expira_en en UTC sin zona)."""
+    now = datetime.now(timezone.utc)
+    exp = now + timedelta(days=days or settings.refresh_token_expire_days)
+    jti = uuid.uuid4().hex
+    payload = {"uid": uid, "typ": "refresh", "jti": jti, "iat": _iat(now), "exp": int(exp.timestamp())}
+    return jwt.encode(payload, settings.jwt_secret, algorithm=ALGORITHM), jti, exp.replace(tzinfo=None)
+
 def decode_token(token: str) -> dict | None:
+    if settings.token_cache_enabled:
+        claims = token_cache.get(token)
+        if claims is not None:
+            return claims
     try:
-        return jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
+        claims = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
     except JWTError:
         return None
+    if settings.token_cache_enabled:
+        token_cache.put(token, claims)
+    return claims
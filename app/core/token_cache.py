@@ -0,0 +1,97 @@
+"""
+Caché de JWT ya verificados.
+
+El mismo token se presenta cientos de veces durante su vida; decode_token lo
+verifica (HMAC + JSON) la primera vez y guarda los claims, indexados por el
+sha256 del token, hasta su `exp`. Los aciertos se saltan la verificación de la
+firma pero no la caducidad. LRU acotada por `token_cache_size`.
+
+`purge_user` borra los tokens de un usuario (set_active al desactivarlo); el
+siguiente uso vuelve a verificarse y get_current_user rechaza al usuario
+inactivo.
+"""
+import hashlib
+import threading
+import time as _time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    def __init__(self, *, max_entries: int | None = None):
+        self.max_entries = max_entries or settings.token_cache_size
+        self._entries: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self._by_uid: dict[int, set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.purged = 0
+
+    def get(self, token: str) -> dict | None:
+        key = _digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _time.time() < entry[0]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if exp is None:
+            return
+        key = _digest(token)
+        with self._lock:
+            self._entries[key] = (float(exp), dict(claims))
+            self._entries.move_to_end(key)
+            uid = claims.get("uid")
+            if uid is not None:
+                self._by_uid.setdefault(uid, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def purge_user(self, uid: int) -> None:
+        with self._lock:
+            for key in self._by_uid.pop(uid, ()):
+                if self._entries.pop(key, None) is not None:
+                    self.purged += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_uid.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "purged": self.purged,
+            }
+
+    def _drop(self, key: bytes) -> None:
+        _, claims = self._entries.pop(key)
+        keys = self._by_uid.get(claims.get("uid"))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_uid[claims.get("uid")]
+
+
+token_cache = TokenCache()
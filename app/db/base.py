@@ -3,4 +3,11 @@ from app.models.user import User
 from app.models.facility import Facility 
 from app.models.slot import Slot         
 from app.models.reservation import Reservation
+from app.models.idempotency_key import IdempotencyKey
+from app.models.seat_hold import SeatHold
+from app.models.schedule_template import ScheduleTemplate
+from app.models.archive import ArchivedSlot, ArchivedReservation
+from app.models.occupancy_stat import OccupancyStat
+from app.models.refresh_token import RefreshToken
+from app.models.system_setting import SystemSetting
 #from app.models.booking import Booking   
@@ -0,0 +1,139 @@
+"""
+Group commit para escrituras de reservas.
+
+Las operaciones que llegan dentro de una ventana de unos milisegundos se
+ejecutan en la misma transacción, cada una dentro de su SAVEPOINT, y se
+confirman con un único commit (un solo fsync en SQLite). Si una operación
+falla solo se deshace su SAVEPOINT; el resto del lote sigue adelante y cada
+llamante recibe su propio resultado o excepción.
+
+En SQLite necesita el BEGIN explícito de app.db.session
+(use_explicit_sqlite_transactions): sin él el primer SAVEPOINT es la
+transacción exterior y cada operación se confirma por separado.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Operation = Callable[[Session], Any]
+
+
+class GroupCommitter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        window_ms: float | None = None,
+        max_batch: int | None = None,
+    ):
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.window = (window_ms if window_ms is not None else settings.group_commit_window_ms) / 1000
+        self.max_batch = max_batch or settings.group_commit_max_batch
+        self._queue: "queue.Queue[tuple[Operation, Future]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.operations = 0
+
+    def submit(self, fn: Operation, timeout: float | None = None) -> Any:
+        """Ejecuta `fn(session)` en el siguiente lote y devuelve su resultado tras el commit.
+
+        `fn` no debe hacer commit ni devolver objetos ORM ligados a la sesión del lote.
+        """
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((fn, future))
+        return future.result(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "commits": self.commits,
+            "operations": self.operations,
+            "avg_batch": round(self.operations / self.commits, 2) if self.commits else 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> list[tuple[Operation, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._commit_batch(batch)
+            except Exception as exc:  # noqa: BLE001 - se propaga a cada llamante
+                logger.exception("Error en group commit")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _commit_batch(self, batch: list[tuple[Operation, Future]]) -> None:
+        db = self.session_factory()
+        outcomes: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            # Transacción exterior abierta antes del primer SAVEPOINT
+            db.begin()
+            for fn, future in batch:
+                # Las operaciones anteriores del lote pueden haber cambiado filas con
+                # UPDATEs directos; se fuerza a releer en lugar de usar el identity map.
+                db.expire_all()
+                savepoint = db.begin_nested()
+                try:
+                    result = fn(db)
+                    db.flush()
+                    savepoint.commit()
+                    outcomes.append((future, result, None))
+                except Exception as exc:  # noqa: BLE001
+                    savepoint.rollback()
+                    outcomes.append((future, None, exc))
+            db.commit()
+            with self._lock:
+                self.commits += 1
+                self.operations += len(batch)
+        finally:
+            db.close()
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_committer: GroupCommitter | None = None
+_committer_lock = threading.Lock()
+
+
+def get_group_committer() -> GroupCommitter:
+    global _committer
+    with _committer_lock:
+        if _committer is None:
+            _committer = GroupCommitter()
+        return _committer
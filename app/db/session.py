@@ -1,7 +1,28 @@
-﻿from sqlalchemy import create_engine
+﻿from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+
+def use_explicit_sqlite_transactions(engine: Engine) -> None:
+    """BEGIN explícito en SQLite (receta de la documentación de SQLAlchemy para pysqlite).
+
+    pysqlite no abre la transacción hasta el primer INSERT/UPDATE; un SAVEPOINT
+    emitido antes pasa a ser la transacción exterior y su RELEASE confirma en el
+    acto. Con esto cada transacción de la sesión empieza con BEGIN y los
+    SAVEPOINT (begin_nested) quedan de verdad anidados.
+    """
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
 connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
 engine = create_engine(settings.database_url, future=True, echo=False, connect_args=connect_args)
+if engine.dialect.name == "sqlite":
+    use_explicit_sqlite_transactions(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
@@ -5,12 +5,27 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.admission import AdmissionControlMiddleware
 from app.api.routers.auth import router as auth_router
 from app.api.routers.facilities import router as facilities_router
 from app.api.routers.slots import router as slots_router
+from app.api.routers.schedule_templates import router as schedule_templates_router
 from app.api.routers.admin_users import router as admin_users_router
 from app.api.routers.admin_reservations import router as admin_reservations_router
+from app.api.routers.admin_metrics import router as admin_metrics_router
+from app.api.routers.admin_jobs import router as admin_jobs_router
+from app.api.routers.admin_archive import router as admin_archive_router
+from app.api.routers.admin_stats import router as admin_stats_router
+from app.api.routers.admin_password_hash import router as admin_password_hash_router
 from app.api.routers.reservations import router as reservations_router
+from app.api.routers.holds import router as holds_router
+from sqlalchemy.exc import SQLAlchemyError
+from app.db.session import SessionLocal
+from app.utils.holds import hold_sweeper
+from app.utils.facility_catalog import facility_catalog
+from app.core.password_pool import password_pool
+from app.utils.password_hash import configure_hash_rounds
+from app.utils.auth_tokens import revocation_list
 
 # Configurar logging
 logging.basicConfig(
@@ -27,9 +42,28 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up Reserva Sport API...")
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Database: {settings.database_url}")
+    if settings.hold_sweeper_enabled:
+        hold_sweeper.start()
+    # Antes de arrancar el pool: los procesos hijos heredan las rondas
+    configure_hash_rounds()
+    password_pool.start()
+    if settings.token_revocation_sync_enabled:
+        revocation_list.start()
+    if settings.facility_catalog_preload:
+        try:
+            with SessionLocal() as db:
+                facility_catalog.refresh(db)
+        except SQLAlchemyError:
+            # Sin tablas todavía (BD recién creada): se cargará en la primera lectura
+            logger.warning("No se pudo precargar el catálogo de instalaciones", exc_info=True)
     yield
     # Shutdown
     logger.info("Shutting down...")
+    if settings.hold_sweeper_enabled:
+        hold_sweeper.stop()
+    password_pool.shutdown()
+    if settings.token_revocation_sync_enabled:
+        revocation_list.stop()
 
 
 app = FastAPI(
@@ -41,6 +75,12 @@ app = FastAPI(
     redoc_url="/redoc" if settings.environment != "production" else None,
 )
 
+# Control de admisión: limita las escrituras concurrentes antes de que agoten el threadpool.
+# Se registra antes que CORS para quedar por dentro: sus 503 también llevan las
+# cabeceras CORS y el frontend puede leer Retry-After.
+if settings.admission_enabled:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # Configurar CORS de forma segura
 app.add_middleware(
     CORSMiddleware,
@@ -55,9 +95,16 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(facilities_router)
 app.include_router(slots_router)
+app.include_router(schedule_templates_router)
 app.include_router(reservations_router)
+app.include_router(holds_router)
 app.include_router(admin_users_router)
 app.include_router(admin_reservations_router)
+app.include_router(admin_metrics_router)
+app.include_router(admin_jobs_router)
+app.include_router(admin_archive_router)
+app.include_router(admin_stats_router)
+app.include_router(admin_password_hash_router)
 
 
 @app.get("/health")
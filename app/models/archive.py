@@ -0,0 +1,35 @@
+from datetime import date, datetime, time
+from sqlalchemy import Date, DateTime, Integer, String, Time
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class ArchivedSlot(Base):
+    """Franja pasada movida fuera de franjas_horarias por el archivado.
+
+    Conserva el id original y no tiene claves foráneas: la instalación puede
+    haberse borrado después.
+    """
+    __tablename__ = "franjas_horarias_archivo"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    instalacion_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    hora_inicio: Mapped[time] = mapped_column(Time, nullable=False)
+    hora_fin: Mapped[time] = mapped_column(Time, nullable=False)
+    capacidad: Mapped[int] = mapped_column(Integer, nullable=False)
+    plazas_disponibles: Mapped[int] = mapped_column(Integer, nullable=False)
+    archivado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ArchivedReservation(Base):
+    """Reserva de una franja archivada, con el mismo id que tenía en reservas."""
+    __tablename__ = "reservas_archivo"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    usuario_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    instalacion_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    franja_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    hora_inicio: Mapped[time] = mapped_column(Time, nullable=False)
+    hora_fin: Mapped[time] = mapped_column(Time, nullable=False)
+    estado: Mapped[str] = mapped_column(String(20), nullable=False)
+    archivado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
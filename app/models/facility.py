@@ -11,5 +11,6 @@ class Facility(Base):
     tipo: Mapped[str | None] = mapped_column(String(80))
     aforo: Mapped[int | None] = mapped_column(Integer)
     activo: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
-    franjas = relationship("Slot", back_populates="instalacion", cascade="all, delete-orphan")
-    reservas = relationship("Reservation", back_populates="instalacion", cascade="all, delete-orphan")
+    # passive_deletes: los hijos se borran con DELETE por conjuntos (ver utils.facilities), sin cargarlos
+    franjas = relationship("Slot", back_populates="instalacion", cascade="all, delete-orphan", passive_deletes=True)
+    reservas = relationship("Reservation", back_populates="instalacion", cascade="all, delete-orphan", passive_deletes=True)
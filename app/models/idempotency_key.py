@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "claves_idempotencia"
+    __table_args__ = (UniqueConstraint("usuario_id", "clave", name="uq_clave_idempotencia"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
+    clave: Mapped[str] = mapped_column(String(255), nullable=False)
+    huella: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 de método + ruta + cuerpo
+    status_code: Mapped[int | None] = mapped_column(Integer)  # NULL mientras la petición está en curso
+    cuerpo: Mapped[str | None] = mapped_column(Text)  # respuesta serializada en JSON
+    creado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
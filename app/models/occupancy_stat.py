@@ -0,0 +1,18 @@
+from datetime import date
+from sqlalchemy import Date, Integer, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class OccupancyStat(Base):
+    """Plazas reservadas y ofertadas por instalación, día y hora de inicio.
+
+    Se mantiene al reservar y cancelar (ver utils/occupancy_stats), así que las
+    estadísticas se leen sin recorrer reservas.
+    """
+    __tablename__ = "estadisticas_ocupacion"
+    instalacion_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    hora: Mapped[int] = mapped_column(SmallInteger, primary_key=True)  # 0-23
+    reservadas: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    capacidad: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Boolean, DateTime, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class RefreshToken(Base):
+    """Token de refresco emitido; se identifica por el `jti` de su JWT."""
+    __tablename__ = "tokens_refresco"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    jti: Mapped[str] = mapped_column(String(32), unique=True, nullable=False, index=True)
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False, index=True)
+    expira_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    revocado: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    creado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,18 +1,47 @@
-from sqlalchemy import Column, Integer, ForeignKey, String  # <-- añade String
+from sqlalchemy import Column, Integer, ForeignKey, String, Date, Time, Index, event, select, text  # <-- añade String
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.models.slot import Slot
 
 class Reservation(Base):
     __tablename__ = "reservas"
+    # Índice parcial para la comprobación de solapes: solo cubre reservas activas
+    __table_args__ = (
+        Index(
+            "ix_reservas_usuario_fecha_activa",
+            "usuario_id",
+            "fecha",
+            sqlite_where=text("estado = 'activa'"),
+            postgresql_where=text("estado = 'activa'"),
+        ),
+        # AUTOINCREMENT en SQLite: los ids archivados no deben reutilizarse
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False, index=True)
     instalacion_id = Column(Integer, ForeignKey("instalaciones.id", ondelete="CASCADE"), nullable=False, index=True)
     franja_id = Column(Integer, ForeignKey("franjas_horarias.id", ondelete="CASCADE"), nullable=False, index=True)
 
+    # Copia del horario de la franja, para no tener que hacer JOIN al buscar solapes
+    fecha = Column(Date, nullable=False)
+    hora_inicio = Column(Time, nullable=False)
+    hora_fin = Column(Time, nullable=False)
+
     # NUEVO: alineado con tu BD
     #estado = Column(String(20), nullable=False, server_default="activa")
     estado = Column(String(20), nullable=False, default="activa")
     usuario = relationship("User", back_populates="reservas")
     instalacion = relationship("Facility", back_populates="reservas")
     franja = relationship("Slot", back_populates="reservas")
+
+
+@event.listens_for(Reservation, "before_insert")
+def _copiar_horario_franja(mapper, connection, target):
+    # Si quien crea la reserva no ha copiado el horario, se toma de la franja
+    if target.fecha is None or target.hora_inicio is None or target.hora_fin is None:
+        row = connection.execute(
+            select(Slot.fecha, Slot.hora_inicio, Slot.hora_fin).where(Slot.id == target.franja_id)
+        ).first()
+        if row:
+            target.fecha, target.hora_inicio, target.hora_fin = row
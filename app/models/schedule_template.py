@@ -0,0 +1,25 @@
+from datetime import date, time
+from sqlalchemy import Boolean, Date, ForeignKey, Integer, String, Text, Time
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class ScheduleTemplate(Base):
+    """Tramo horario recurrente de una instalación.
+
+    Sus franjas son virtuales: la fila en franjas_horarias solo se crea cuando
+    alguien reserva esa fecha por primera vez.
+    """
+    __tablename__ = "plantillas_horario"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    instalacion_id: Mapped[int] = mapped_column(ForeignKey("instalaciones.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Días de la semana separados por comas (0=lunes ... 6=domingo)
+    dias_semana: Mapped[str] = mapped_column(String(20), nullable=False, default="0,1,2,3,4,5,6")
+    hora_inicio: Mapped[time] = mapped_column(Time, nullable=False)
+    hora_fin: Mapped[time] = mapped_column(Time, nullable=False)
+    capacidad: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    fecha_desde: Mapped[date | None] = mapped_column(Date)
+    fecha_hasta: Mapped[date | None] = mapped_column(Date)
+    # Fechas ISO separadas por comas en las que el tramo no se ofrece
+    fechas_excluidas: Mapped[str | None] = mapped_column(Text)
+    activo: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
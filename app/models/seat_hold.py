@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class SeatHold(Base):
+    """Plaza retenida temporalmente en una franja, pendiente de confirmar como reserva."""
+    __tablename__ = "retenciones"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False, index=True)
+    instalacion_id: Mapped[int] = mapped_column(ForeignKey("instalaciones.id", ondelete="CASCADE"), nullable=False)
+    franja_id: Mapped[int] = mapped_column(ForeignKey("franjas_horarias.id", ondelete="CASCADE"), nullable=False, index=True)
+    expira_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
@@ -6,13 +6,17 @@ from sqlalchemy.orm import relationship
 
 class Slot(Base):
     __tablename__ = "franjas_horarias"
-    __table_args__ = (UniqueConstraint("instalacion_id","fecha","hora_inicio","hora_fin", name="uq_slot"),)
+    # AUTOINCREMENT en SQLite: el archivado borra franjas y sus ids no deben reutilizarse
+    __table_args__ = (
+        UniqueConstraint("instalacion_id","fecha","hora_inicio","hora_fin", name="uq_slot"),
+        {"sqlite_autoincrement": True},
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     instalacion_id: Mapped[int] = mapped_column(ForeignKey("instalaciones.id"), nullable=False, index=True)
-    fecha: Mapped[object] = mapped_column(Date, nullable=False)
+    fecha: Mapped[object] = mapped_column(Date, nullable=False, index=True)
     hora_inicio: Mapped[object] = mapped_column(Time, nullable=False)
     hora_fin: Mapped[object] = mapped_column(Time, nullable=False)
     capacidad: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     plazas_disponibles: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
-    reservas = relationship("Reservation", back_populates="franja", cascade="all, delete-orphan")
+    reservas = relationship("Reservation", back_populates="franja", cascade="all, delete-orphan", passive_deletes=True)
     instalacion = relationship("Facility", back_populates="franjas")
\ No newline at end of file
@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class SystemSetting(Base):
+    """Ajuste compartido por todos los procesos de la API (p. ej. las rondas de pbkdf2 calibradas)."""
+    __tablename__ = "ajustes"
+    clave: Mapped[str] = mapped_column(String(64), primary_key=True)
+    valor: Mapped[str] = mapped_column(String(255), nullable=False)
+    actualizado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,5 +1,6 @@
 ﻿import enum
-from sqlalchemy import String, Enum, Integer, Boolean
+from datetime import datetime
+from sqlalchemy import String, Enum, Integer, Boolean, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base_class import Base
 from sqlalchemy.orm import relationship
@@ -17,4 +18,6 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     rol: Mapped[UserRole] = mapped_column(Enum(UserRole), default=UserRole.cliente, nullable=False)
     activo: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Los tokens emitidos hasta este instante (iat <= valor) quedan revocados
+    tokens_revocados_en: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     reservas = relationship("Reservation", back_populates="usuario", cascade="all, delete-orphan")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class HoldCreate(BaseModel):
+    instalacion_id: int
+    franja_id: int
+    minutos: int | None = Field(default=None, ge=1)  # si None → hold_default_minutes
+
+class HoldOut(BaseModel):
+    id: int
+    usuario_id: int
+    instalacion_id: int
+    franja_id: int
+    expira_en: datetime
+
+    class Config:
+        from_attributes = True
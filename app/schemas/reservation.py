@@ -1,9 +1,28 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import date, time
 
 class ReservationCreate(BaseModel):
     instalacion_id: int
-    franja_id: int
+    franja_id: int | None = None
+    # Franja virtual de una plantilla: se crea al reservarla
+    plantilla_id: int | None = None
+    fecha: date | None = None
+
+    @model_validator(mode="after")
+    def _franja_o_plantilla(self):
+        if self.franja_id is None and (self.plantilla_id is None or self.fecha is None):
+            raise ValueError("Indica franja_id, o plantilla_id y fecha")
+        return self
+
+class ReservationBlockCreate(BaseModel):
+    instalacion_id: int
+    fecha: date
+    franjas: int = Field(ge=2, le=8)
+    hora_inicio: time | None = None  # si None → primer bloque libre del día
+
+class ReservationBatchCreate(BaseModel):
+    items: list[ReservationCreate] = Field(min_length=1, max_length=50)
+    all_or_nothing: bool = False
 
 class ReservationOut(BaseModel):
     id: int
@@ -17,6 +36,19 @@ class ReservationOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ReservationBatchItemOut(BaseModel):
+    instalacion_id: int
+    # Sin franja_id si era una franja virtual que no se llegó a reservar
+    franja_id: int | None = None
+    plantilla_id: int | None = None
+    status_code: int
+    detail: str | None = None
+    reserva: ReservationOut | None = None
+
+class ReservationBatchOut(BaseModel):
+    creadas: int
+    items: list[ReservationBatchItemOut]
+
 class AdminReservationOut(BaseModel):
     id: int
     usuario_id: int
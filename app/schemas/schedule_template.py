@@ -0,0 +1,69 @@
+from pydantic import BaseModel, Field, field_validator
+from datetime import date, time
+
+class TimeRange(BaseModel):
+    hora_inicio: time
+    hora_fin: time
+
+    @field_validator("hora_fin")
+    @classmethod
+    def _fin_posterior(cls, v, info):
+        ini = info.data.get("hora_inicio")
+        if ini and v <= ini:
+            raise ValueError("hora_fin debe ser posterior a hora_inicio")
+        return v
+
+class ScheduleTemplateCreate(BaseModel):
+    instalacion_id: int
+    tramos: list[TimeRange] = Field(min_length=1, max_length=48)
+    dias_semana: list[int] = Field(default_factory=lambda: list(range(7)), min_length=1)  # 0=lunes ... 6=domingo
+    capacidad: int = Field(ge=1)
+    fecha_desde: date | None = None
+    fecha_hasta: date | None = None
+    fechas_excluidas: list[date] = Field(default_factory=list)
+
+    @field_validator("dias_semana")
+    @classmethod
+    def _dias_validos(cls, v):
+        if any(d < 0 or d > 6 for d in v):
+            raise ValueError("dias_semana solo admite valores de 0 (lunes) a 6 (domingo)")
+        return sorted(set(v))
+
+    @field_validator("fecha_hasta")
+    @classmethod
+    def _hasta_posterior(cls, v, info):
+        desde = info.data.get("fecha_desde")
+        if v and desde and v < desde:
+            raise ValueError("fecha_hasta no puede ser anterior a fecha_desde")
+        return v
+
+class ScheduleTemplateOut(BaseModel):
+    id: int
+    instalacion_id: int
+    dias_semana: list[int]
+    hora_inicio: time
+    hora_fin: time
+    capacidad: int
+    fecha_desde: date | None
+    fecha_hasta: date | None
+    fechas_excluidas: list[date]
+    activo: bool
+
+    @field_validator("dias_semana", mode="before")
+    @classmethod
+    def _parse_dias(cls, v):
+        if isinstance(v, str):
+            return [int(d) for d in v.split(",") if d]
+        return v
+
+    @field_validator("fechas_excluidas", mode="before")
+    @classmethod
+    def _parse_fechas(cls, v):
+        if v is None:
+            return []
+        if isinstance(v, str):
+            return [d for d in v.split(",") if d]
+        return v
+
+    class Config:
+        from_attributes = True
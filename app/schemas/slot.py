@@ -30,6 +30,13 @@ class SlotBase(BaseModel):
 class SlotCreate(SlotBase):
     pass
 
+class SlotBulkCreate(BaseModel):
+    items: list[SlotCreate] = Field(min_length=1, max_length=5000)
+
+class SlotBulkOut(BaseModel):
+    creadas: int
+    omitidas: int
+
 class SlotOut(BaseModel):
     id: int
     instalacion_id: int
@@ -40,3 +47,8 @@ class SlotOut(BaseModel):
     plazas_disponibles: int
     class Config:
         from_attributes = True
+
+class SlotListOut(SlotOut):
+    """Franja real o virtual (generada por una plantilla, todavía sin fila: id es None)"""
+    id: int | None
+    plantilla_id: int | None = None
@@ -21,4 +21,18 @@ class UserOut(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: str | None = None
     token_type: str = "bearer"
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class UserImportError(BaseModel):
+    fila: int
+    email: str | None = None
+    error: str
+
+class UserImportOut(BaseModel):
+    total: int
+    creados: int
+    errores: list[UserImportError]
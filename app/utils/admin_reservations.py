@@ -1,13 +1,15 @@
 # app/utils/admin_reservations.py
 from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, func, literal, select, union_all
 from fastapi import HTTPException, status
 
 from app.models.reservation import Reservation
 from app.models.slot import Slot
 from app.models.user import User
 from app.models.facility import Facility
+from app.models.archive import ArchivedReservation
+from app.utils.reservations import _release_seat
 
 def list_reservations(
     db: Session,
@@ -22,7 +24,6 @@ def list_reservations(
     offset = max(0, offset)
 
     q = db.query(Reservation).options(
-        joinedload(Reservation.franja),
         joinedload(Reservation.usuario),
         joinedload(Reservation.instalacion)
     )
@@ -37,14 +38,67 @@ def list_reservations(
         q = q.filter(Reservation.estado == estado)
 
     if fecha:
-        # Join por Slot.fecha
-        q = q.join(Slot, Reservation.franja_id == Slot.id).filter(Slot.fecha == fecha)
+        q = q.filter(Reservation.fecha == fecha)
 
     total = q.count()
     items = q.order_by(Reservation.id.desc()).limit(limit).offset(offset).all()
     return items, total
 
 
+def _listing_select(model, archivada: bool, *, usuario_id, instalacion_id, fecha, estado):
+    q = (
+        select(
+            model.id,
+            model.usuario_id,
+            User.nombre.label("usuario_nombre"),
+            User.email.label("usuario_email"),
+            model.instalacion_id,
+            Facility.nombre.label("instalacion_nombre"),
+            model.franja_id,
+            model.fecha,
+            model.hora_inicio,
+            model.hora_fin,
+            model.estado,
+            literal(archivada).label("archivada"),
+        )
+        # outer join: un archivo puede sobrevivir a su usuario o a su instalación
+        .outerjoin(User, User.id == model.usuario_id)
+        .outerjoin(Facility, Facility.id == model.instalacion_id)
+    )
+    if usuario_id:
+        q = q.where(model.usuario_id == usuario_id)
+    if instalacion_id:
+        q = q.where(model.instalacion_id == instalacion_id)
+    if estado:
+        q = q.where(model.estado == estado)
+    if fecha:
+        q = q.where(model.fecha == fecha)
+    return q
+
+
+def list_reservations_with_archive(
+    db: Session,
+    usuario_id: Optional[int] = None,
+    instalacion_id: Optional[int] = None,
+    fecha: Optional[str] = None,
+    estado: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> Tuple[List[dict], int]:
+    """Como list_reservations, sumando las reservas archivadas; devuelve filas planas."""
+    limit = max(1, min(100, limit))
+    offset = max(0, offset)
+    filters = dict(usuario_id=usuario_id, instalacion_id=instalacion_id, fecha=fecha, estado=estado)
+    both = union_all(
+        _listing_select(Reservation, False, **filters),
+        _listing_select(ArchivedReservation, True, **filters),
+    ).subquery()
+
+    total = db.scalar(select(func.count()).select_from(both))
+    rows = db.execute(select(both).order_by(both.c.id.desc()).limit(limit).offset(offset)).mappings()
+    return [{**row, "archivada": bool(row["archivada"])} for row in rows], total
+
+
 def admin_cancel_reservation(db: Session, reserva_id: int) -> None:
     res = db.get(Reservation, reserva_id)
     if not res:
@@ -55,10 +109,7 @@ def admin_cancel_reservation(db: Session, reserva_id: int) -> None:
         return
 
     # Recuperar plaza en la franja
-    slot = db.get(Slot, res.franja_id)
-    if slot:
-        slot.plazas_disponibles = max(0, slot.plazas_disponibles + 1)
-        db.add(slot)
+    _release_seat(db, res.franja_id)
 
     res.estado = "cancelada"
     db.add(res)
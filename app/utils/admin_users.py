@@ -5,6 +5,8 @@ from sqlalchemy import or_
 from fastapi import HTTPException, status
 
 from app.models.user import User
+from app.core.token_cache import token_cache
+from app.utils.user_cache import mark_user_dirty
 
 def list_users(
     db: Session,
@@ -57,6 +59,7 @@ def set_role(db: Session, user_id: int, new_role: str) -> User:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No puedes dejar el sistema sin administradores")
 
     user.rol = new_role
+    mark_user_dirty(db, user.id)
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -74,7 +77,10 @@ def set_active(db: Session, user_id: int, active: bool) -> User:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No puedes desactivar al único admin")
 
     user.activo = bool(active)
+    mark_user_dirty(db, user.id)
     db.add(user)
     db.commit()
+    if not user.activo:
+        token_cache.purge_user(user.id)
     db.refresh(user)
     return user
@@ -0,0 +1,67 @@
+# app/utils/archive.py
+"""
+Archivado de franjas pasadas y sus reservas.
+
+Mueve las franjas anteriores a una fecha de corte (y sus reservas) a
+franjas_horarias_archivo y reservas_archivo, en lotes de `chunk_size` franjas:
+cada lote es un INSERT ... SELECT por tabla más los DELETE correspondientes, en
+una sola transacción. Si el proceso se corta a medias, lo ya archivado queda
+archivado y el siguiente lote sigue donde se quedó.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import DateTime, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import ArchivedReservation, ArchivedSlot
+from app.models.reservation import Reservation
+from app.models.seat_hold import SeatHold
+from app.models.slot import Slot
+from app.utils.jobs import Job
+from app.utils.slot_cache import mark_slots_dirty
+
+_SLOT_COLS = ("id", "instalacion_id", "fecha", "hora_inicio", "hora_fin", "capacidad", "plazas_disponibles")
+_RES_COLS = ("id", "usuario_id", "instalacion_id", "franja_id", "fecha", "hora_inicio", "hora_fin", "estado")
+
+
+def default_cutoff() -> date:
+    return date.today() - timedelta(days=settings.archive_after_days)
+
+
+def archive_before(db: Session, cutoff: date, *, chunk_size: int | None = None, job: Job | None = None) -> dict:
+    """Archiva las franjas con fecha anterior a `cutoff`; devuelve cuántas filas se movieron."""
+    if cutoff > date.today():
+        raise ValueError("La fecha de corte no puede ser futura")
+    chunk_size = chunk_size or settings.archive_chunk_size
+    old = Slot.fecha < cutoff
+    if job is not None:
+        job.total = db.scalar(select(func.count()).select_from(Slot).where(old))
+
+    moved = {"franjas": 0, "reservas": 0}
+    while True:
+        ids = list(db.scalars(select(Slot.id).where(old).order_by(Slot.id).limit(chunk_size)))
+        if not ids:
+            break
+        now = literal(datetime.utcnow(), DateTime)
+        moved["reservas"] += db.execute(
+            insert(ArchivedReservation).from_select(
+                [*_RES_COLS, "archivado_en"],
+                select(*(getattr(Reservation, c) for c in _RES_COLS), now).where(Reservation.franja_id.in_(ids)),
+            )
+        ).rowcount
+        db.execute(
+            insert(ArchivedSlot).from_select(
+                [*_SLOT_COLS, "archivado_en"],
+                select(*(getattr(Slot, c) for c in _SLOT_COLS), now).where(Slot.id.in_(ids)),
+            )
+        )
+        for model in (Reservation, SeatHold):
+            db.execute(delete(model).where(model.franja_id.in_(ids)).execution_options(synchronize_session=False))
+        db.execute(delete(Slot).where(Slot.id.in_(ids)).execution_options(synchronize_session=False))
+        mark_slots_dirty(db, ids)
+        db.commit()
+        moved["franjas"] += len(ids)
+        if job is not None:
+            job.advance(len(ids))
+    return moved
@@ -0,0 +1,223 @@
+# app/utils/auth_tokens.py
+"""
+Tokens de refresco y revocación.
+
+Los tokens de acceso duran poco (`access_token_expire_minutes`); para renovarlos
+se usa un token de refresco de larga duración, registrado en tokens_refresco por
+su jti. Cada uso lo rota: el viejo queda revocado y se emite otro. Si llega uno
+ya revocado se da por robado y se revocan todos los del usuario.
+
+Qué está revocado se comprueba en memoria, sin ir a la BD (RevocationList):
+
+- jti de tokens de refresco revocados que aún no han caducado;
+- por usuario, el instante de la última revocación total: cualquier token
+  (de acceso o de refresco) con iat anterior o igual queda invalidado.
+
+La lista se construye desde la BD al arrancar y se recarga cada
+`token_revocation_reload_seconds` para ver lo que revocan otros workers; lo
+revocado en este proceso se aplica al momento. En cada recarga se borran
+además de tokens_refresco las filas ya caducadas (cada login añade una).
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token, decode_token
+from app.core.token_cache import token_cache
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def _ts(dt: datetime) -> float:
+    # Fechas guardadas en UTC sin zona; con microsegundos, como el iat de los tokens
+    return round((dt - datetime(1970, 1, 1)).total_seconds(), 6)
+
+
+class RevocationList:
+    def __init__(self, session_factory: Callable[[], Session] | None = None):
+        self.session_factory = session_factory
+        self._jtis: dict[str, float] = {}  # jti -> exp
+        self._users: dict[int, float] = {}  # uid -> revocado hasta (iat <=)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.loads = 0
+
+    def is_revoked(self, claims: dict) -> bool:
+        return self.jti_revoked(claims.get("jti")) or self.user_revoked(claims)
+
+    def jti_revoked(self, jti: str | None) -> bool:
+        with self._lock:
+            return jti is not None and jti in self._jtis
+
+    def user_revoked(self, claims: dict) -> bool:
+        with self._lock:
+            until = self._users.get(claims.get("uid"))
+            return until is not None and claims.get("iat", 0) <= until
+
+    def revoke_jti(self, jti: str, exp: float) -> None:
+        with self._lock:
+            self._jtis[jti] = exp
+
+    def revoke_user(self, uid: int, until: float) -> None:
+        with self._lock:
+            self._users[uid] = max(until, self._users.get(uid, until))
+
+    def load(self, db: Session) -> None:
+        """Reconstruye la lista desde la BD; las entradas caducadas se descartan."""
+        now = datetime.utcnow()
+        jtis = {
+            jti: _ts(exp)
+            for jti, exp in db.execute(
+                select(RefreshToken.jti, RefreshToken.expira_en).where(
+                    RefreshToken.revocado.is_(True), RefreshToken.expira_en > now
+                )
+            )
+        }
+        users = {
+            uid: _ts(when)
+            for uid, when in db.execute(select(User.id, User.tokens_revocados_en).where(User.tokens_revocados_en.is_not(None)))
+        }
+        with self._lock:
+            self._jtis, self._users = jtis, users
+            self.loads += 1
+
+    def start(self) -> None:
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        try:
+            self._reload()
+        except SQLAlchemyError:
+            # Sin tablas todavía (BD recién creada): el hilo lo reintenta en cada vuelta
+            logger.warning("No se pudo cargar la lista de revocación", exc_info=True)
+        self._stop.clear()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="token-revocation", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jtis.clear()
+            self._users.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"revoked_tokens": len(self._jtis), "revoked_users": len(self._users), "loads": self.loads}
+
+    def _reload(self, prune: bool = False) -> None:
+        db = self.session_factory()
+        try:
+            if prune:
+                prune_refresh_tokens(db)
+            self.load(db)
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.token_revocation_reload_seconds):
+            try:
+                self._reload(prune=True)
+            except Exception:  # noqa: BLE001 - se reintenta en la siguiente vuelta
+                logger.exception("Error recargando la lista de revocación")
+
+
+revocation_list = RevocationList()
+
+
+def prune_refresh_tokens(db: Session, now: datetime | None = None) -> int:
+    """Borra los tokens de refresco caducados; ya no pasan decode_token. Devuelve cuántos."""
+    deleted = db.execute(
+        delete(RefreshToken).where(RefreshToken.expira_en <= (now or datetime.utcnow()))
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def _unauthorized(detail: str = "Token de refresco inválido o revocado") -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+def issue_tokens(db: Session, *, uid: int, email: str, rol: str) -> dict:
+    """Par token de acceso + token de refresco; registra el de refresco."""
+    refresh, jti, expira_en = create_refresh_token(uid=uid)
+    db.add(RefreshToken(jti=jti, usuario_id=uid, expira_en=expira_en))
+    db.commit()
+    return {
+        "access_token": create_access_token(sub=email, uid=uid, rol=rol),
+        "refresh_token": refresh,
+        "token_type": "bearer",
+    }
+
+
+def _refresh_claims(token: str) -> dict:
+    claims = decode_token(token)
+    if not claims or claims.get("typ") != "refresh" or not claims.get("jti"):
+        raise _unauthorized()
+    return claims
+
+
+def refresh_tokens(db: Session, refresh_token: str) -> dict:
+    """Rota el token de refresco y emite un token de acceso nuevo."""
+    claims = _refresh_claims(refresh_token)
+    if revocation_list.user_revoked(claims):
+        raise _unauthorized()
+    if revocation_list.jti_revoked(claims["jti"]):
+        # Reutilización de un token ya rotado o cerrado: se invalida todo lo del usuario
+        revoke_user_tokens(db, claims["uid"])
+        raise _unauthorized()
+
+    # UPDATE condicional: solo una petición puede consumir cada token
+    used = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == claims["jti"], RefreshToken.revocado.is_(False))
+        .values(revocado=True)
+    ).rowcount
+    if used != 1:
+        db.rollback()
+        if db.scalar(select(RefreshToken.id).where(RefreshToken.jti == claims["jti"])) is not None:
+            # Reutilización de un token ya rotado: se invalida todo lo del usuario
+            revoke_user_tokens(db, claims["uid"])
+        raise _unauthorized()
+    revocation_list.revoke_jti(claims["jti"], claims["exp"])
+
+    user = db.get(User, claims["uid"])
+    if not user or not user.activo:
+        db.commit()
+        raise _unauthorized("Usuario no existe o está desactivado")
+    return issue_tokens(db, uid=user.id, email=user.email, rol=user.rol.value)
+
+
+def revoke_refresh_token(db: Session, refresh_token: str) -> None:
+    """Cierra la sesión de ese token de refresco (idempotente)."""
+    claims = _refresh_claims(refresh_token)
+    db.execute(update(RefreshToken).where(RefreshToken.jti == claims["jti"]).values(revocado=True))
+    db.commit()
+    revocation_list.revoke_jti(claims["jti"], claims["exp"])
+
+
+def revoke_user_tokens(db: Session, uid: int) -> None:
+    """Revoca todos los tokens (de acceso y de refresco) emitidos hasta ahora al usuario."""
+    now = datetime.utcnow()
+    updated = db.execute(update(User).where(User.id == uid).values(tokens_revocados_en=now)).rowcount
+    if not updated:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
+    db.execute(update(RefreshToken).where(RefreshToken.usuario_id == uid).values(revocado=True))
+    db.commit()
+    revocation_list.revoke_user(uid, _ts(now))
+    token_cache.purge_user(uid)
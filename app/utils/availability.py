@@ -0,0 +1,80 @@
+# app/utils/availability.py
+"""
+Rejilla de disponibilidad de varias instalaciones y días en una sola consulta.
+
+Formato compacto: por instalación, las horas van una sola vez en `horas` y cada
+día lleva arrays alineados con ellas (`libres` e `ids`; null si ese día no hay
+franja a esa hora). Las franjas virtuales de plantillas aparecen con id null y
+su plantilla en `plantillas`.
+"""
+from datetime import date, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.utils.facility_catalog import facility_catalog
+from app.models.schedule_template import ScheduleTemplate
+from app.models.slot import Slot
+from app.utils.schedule_templates import template_applies
+
+MAX_DAYS = 31
+
+
+def availability_grid(db: Session, *, desde: date, hasta: date, facility_ids: list[int] | None = None) -> dict:
+    if hasta < desde:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="'to' no puede ser anterior a 'from'")
+    n_days = (hasta - desde).days + 1
+    if n_days > MAX_DAYS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"El rango no puede superar {MAX_DAYS} días")
+
+    if facility_ids is None:
+        fac_ids = [f.id for f in facility_catalog.list(db, only_active=True)]
+    else:
+        fac_ids = list(dict.fromkeys(facility_ids))
+        missing = facility_catalog.missing(db, fac_ids)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Instalaciones no encontradas: {', '.join(map(str, missing))}",
+            )
+
+    # (hora_inicio, hora_fin) -> fecha -> (libres, id) por instalación
+    cells: dict[int, dict[tuple, dict[date, tuple[int, int | None]]]] = {f: {} for f in fac_ids}
+    rows = db.execute(
+        select(Slot.id, Slot.instalacion_id, Slot.fecha, Slot.hora_inicio, Slot.hora_fin, Slot.plazas_disponibles)
+        .where(Slot.instalacion_id.in_(fac_ids), Slot.fecha >= desde, Slot.fecha <= hasta)
+    ).all()
+    for slot_id, fac_id, fecha, hi, hf, libres in rows:
+        cells[fac_id].setdefault((hi, hf), {})[fecha] = (libres, slot_id)
+
+    plantillas: dict[int, dict[tuple, int]] = {f: {} for f in fac_ids}
+    days = [desde + timedelta(days=i) for i in range(n_days)]
+    templates = db.scalars(
+        select(ScheduleTemplate).where(ScheduleTemplate.instalacion_id.in_(fac_ids), ScheduleTemplate.activo.is_(True))
+    ).all()
+    for t in templates:
+        key = (t.hora_inicio, t.hora_fin)
+        for d in days:
+            if template_applies(t, d) and d not in cells[t.instalacion_id].get(key, {}):
+                cells[t.instalacion_id].setdefault(key, {})[d] = (t.capacidad, None)
+                plantillas[t.instalacion_id].setdefault(key, t.id)
+
+    out = []
+    for fac_id in fac_ids:
+        horas = sorted(cells[fac_id])
+        dias = {}
+        for d in days:
+            column = [cells[fac_id][h].get(d) for h in horas]
+            if any(c is not None for c in column):
+                dias[d.isoformat()] = {
+                    "libres": [c[0] if c else None for c in column],
+                    "ids": [c[1] if c else None for c in column],
+                }
+        out.append({
+            "instalacion_id": fac_id,
+            "horas": [[hi.isoformat(), hf.isoformat()] for hi, hf in horas],
+            "plantillas": [plantillas[fac_id].get(h) for h in horas],
+            "dias": dias,
+        })
+    return {"desde": desde, "hasta": hasta, "instalaciones": out}
@@ -0,0 +1,253 @@
+# app/utils/booking_queue.py
+"""
+Cola de reservas con un único escritor por franja.
+
+Todas las reservas de una misma franja_id se envían al mismo worker, que
+vacía su cola por lotes: lee la franja una vez, decide todas las peticiones
+del lote contra esa lectura y confirma con un único commit. Así las franjas
+muy demandadas no se pelean por el lock de escritura de SQLite.
+
+Si el llamante se cansa de esperar (`booking_queue_timeout_seconds`) se cancela
+la petición: el worker la descarta si aún no la había cogido y se responde 503.
+Si ya estaba en un lote, se espera a su resultado en lugar de abandonarla, para
+no dar por fallida una reserva que sí se confirma.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, and_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.reservation import Reservation
+from app.models.slot import Slot
+from app.models.user import User
+from app.utils.reservations import _ACTIVA, BeforeCommit
+from app.utils.slot_cache import mark_slots_dirty
+from app.utils.occupancy_index import record_seat_deltas
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _BookingRequest:
+    usuario_id: int
+    instalacion_id: int
+    franja_id: int
+    before_commit: BeforeCommit | None = None
+    future: Future = field(default_factory=Future)
+
+
+class _SlotWorker(threading.Thread):
+    def __init__(self, dispatcher: "BookingDispatcher", franja_id: int):
+        super().__init__(name=f"booking-slot-{franja_id}", daemon=True)
+        self.dispatcher = dispatcher
+        self.franja_id = franja_id
+        self.queue: "queue.Queue[_BookingRequest]" = queue.Queue()
+
+    def run(self) -> None:
+        while True:
+            try:
+                first = self.queue.get(timeout=self.dispatcher.idle_seconds)
+            except queue.Empty:
+                if self.dispatcher._retire(self):
+                    return
+                continue
+
+            # set_running_or_notify_cancel: descarta las que el llamante ya canceló
+            batch = [first] if first.future.set_running_or_notify_cancel() else []
+            while len(batch) < self.dispatcher.max_batch:
+                try:
+                    req = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if req.future.set_running_or_notify_cancel():
+                    batch.append(req)
+            if not batch:
+                continue
+
+            try:
+                self.dispatcher._process_batch(self.franja_id, batch)
+            except Exception as exc:  # noqa: BLE001 - se propaga a cada llamante
+                logger.exception("Error procesando lote de reservas para franja %s", self.franja_id)
+                for req in batch:
+                    if not req.future.done():
+                        req.future.set_exception(exc)
+
+
+class BookingDispatcher:
+    """Reparte las reservas por franja_id, un worker (y una cola) por franja."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        max_batch: int | None = None,
+        idle_seconds: float | None = None,
+        timeout_seconds: float | None = None,
+    ):
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.max_batch = max_batch or settings.booking_queue_max_batch
+        self.idle_seconds = idle_seconds or settings.booking_queue_idle_seconds
+        self.timeout_seconds = timeout_seconds or settings.booking_queue_timeout_seconds
+        self._workers: dict[int, _SlotWorker] = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.processed = 0
+        self.cancelled = 0
+
+    def submit(self, *, usuario_id: int, instalacion_id: int, franja_id: int, before_commit: BeforeCommit | None = None) -> int:
+        """Encola una reserva y espera su resultado. Devuelve el id de la reserva creada."""
+        req = _BookingRequest(usuario_id=usuario_id, instalacion_id=instalacion_id, franja_id=franja_id, before_commit=before_commit)
+        with self._lock:
+            worker = self._workers.get(franja_id)
+            if worker is None:
+                worker = _SlotWorker(self, franja_id)
+                self._workers[franja_id] = worker
+                worker.start()
+            # Se encola con el lock tomado para que el worker no se retire entre medias
+            worker.queue.put(req)
+        try:
+            return req.future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            if not req.future.cancel():
+                # Ya está en un lote: su resultado es definitivo, se espera
+                return req.future.result()
+            with self._lock:
+                self.cancelled += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="La reserva no se ha procesado a tiempo; no se ha realizado, inténtalo de nuevo",
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "batches": self.batches,
+                "processed": self.processed,
+                "cancelled": self.cancelled,
+            }
+
+    def _retire(self, worker: _SlotWorker) -> bool:
+        with self._lock:
+            if not worker.queue.empty():
+                return False
+            if self._workers.get(worker.franja_id) is worker:
+                del self._workers[worker.franja_id]
+            return True
+
+    def _process_batch(self, franja_id: int, batch: list[_BookingRequest]) -> None:
+        db = self.session_factory()
+        try:
+            for _ in range(3):
+                slot, decisions = self._decide(db, franja_id, batch)
+                accepted = [req for req, error in decisions if error is None]
+                if accepted:
+                    mark_slots_dirty(db, [franja_id])
+                    # Un solo UPDATE condicional por lote; si alguien fuera de la cola ha
+                    # tocado la franja entre medias, se vuelve a decidir con datos frescos.
+                    claimed = db.execute(
+                        update(Slot)
+                        .where(Slot.id == franja_id, Slot.plazas_disponibles >= len(accepted))
+                        .values(plazas_disponibles=Slot.plazas_disponibles - len(accepted))
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+                    if claimed != 1:
+                        db.rollback()
+                        continue
+                    record_seat_deltas(db, {franja_id: -len(accepted)})
+                created = [
+                    Reservation(
+                        usuario_id=req.usuario_id,
+                        instalacion_id=req.instalacion_id,
+                        franja_id=franja_id,
+                        fecha=slot.fecha,
+                        hora_inicio=slot.hora_inicio,
+                        hora_fin=slot.hora_fin,
+                    )
+                    for req in accepted
+                ]
+                db.add_all(created)
+                db.flush()
+                for req, res in zip(accepted, created):
+                    if req.before_commit:
+                        req.before_commit(db, res)
+                db.commit()
+                break
+            else:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No quedan plazas en esta franja")
+
+            with self._lock:
+                self.batches += 1
+                self.processed += len(batch)
+
+            results = iter(created)
+            for req, error in decisions:
+                if error is None:
+                    req.future.set_result(next(results).id)
+                else:
+                    req.future.set_exception(error)
+        finally:
+            db.close()
+
+    def _decide(self, db: Session, franja_id: int, batch: list[_BookingRequest]) -> tuple[Slot | None, list[tuple[_BookingRequest, HTTPException | None]]]:
+        slot = db.get(Slot, franja_id)
+        if not slot:
+            not_found = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación")
+            return None, [(req, not_found) for req in batch]
+
+        user_ids = {req.usuario_id for req in batch}
+        overlap_stmt = (
+            select(Reservation.usuario_id)
+            .where(Reservation.usuario_id.in_(user_ids), Reservation.fecha == slot.fecha, _ACTIVA)
+            .where(and_(Reservation.hora_inicio < slot.hora_fin, slot.hora_inicio < Reservation.hora_fin))
+        )
+        busy = set(db.scalars(overlap_stmt).all())
+
+        free = slot.plazas_disponibles
+        decisions = []
+        for req in batch:
+            if req.instalacion_id != slot.instalacion_id:
+                error = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación")
+            elif req.usuario_id in busy:
+                error = HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tienes una reserva solapada en ese horario")
+            elif free <= 0:
+                error = HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No quedan plazas en esta franja")
+            else:
+                error = None
+                free -= 1
+                busy.add(req.usuario_id)
+            decisions.append((req, error))
+        return slot, decisions
+
+
+_dispatcher: BookingDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_booking_dispatcher() -> BookingDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = BookingDispatcher()
+        return _dispatcher
+
+
+def create_reservation_queued(
+    db: Session, *, user: User, instalacion_id: int, franja_id: int, before_commit: BeforeCommit | None = None
+) -> Reservation:
+    """Igual que create_reservation, pero pasando por el worker de la franja."""
+    res_id = get_booking_dispatcher().submit(
+        usuario_id=user.id, instalacion_id=instalacion_id, franja_id=franja_id, before_commit=before_commit
+    )
+    return db.get(Reservation, res_id)
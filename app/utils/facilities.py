@@ -1,32 +1,102 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, delete, func
 from app.models.facility import Facility
+from app.models.reservation import Reservation
+from app.models.schedule_template import ScheduleTemplate
+from app.models.seat_hold import SeatHold
+from app.models.slot import Slot
+from app.utils.jobs import Job
+from app.utils.occupancy_stats import drop_facility as drop_occupancy_stats
+from app.utils.facility_catalog import FacilitySnapshot, facility_catalog, mark_catalog_dirty
+from app.utils.slot_cache import mark_facility_dirty
 
 def create_facility(db: Session, *, nombre: str, tipo: str | None, aforo: int | None, activo: bool = True) -> Facility:
     fac = Facility(nombre=nombre, tipo=tipo, aforo=aforo, activo=activo)
     db.add(fac)
+    db.flush()
+    mark_facility_dirty(db, fac.id)
+    mark_catalog_dirty(db)
     db.commit()
     db.refresh(fac)
     return fac
 
-def get_facility(db: Session, fac_id: int) -> Facility | None:
+def get_facility(db: Session, fac_id: int) -> FacilitySnapshot | None:
+    # Lecturas desde el catálogo en memoria (ver facility_catalog)
+    return facility_catalog.get(db, fac_id)
+
+def get_facility_row(db: Session, fac_id: int) -> Facility | None:
+    """La fila ORM, para las rutas que van a modificarla."""
     return db.get(Facility, fac_id)
 
-def list_facilities(db: Session, only_active: bool = True) -> list[Facility]:
-    stmt = select(Facility)
-    if only_active:
-        stmt = stmt.where(Facility.activo.is_(True))
-    return list(db.scalars(stmt).all())
+def list_facilities(db: Session, only_active: bool = True) -> list[FacilitySnapshot]:
+    return facility_catalog.list(db, only_active=only_active)
 
 def update_facility(db: Session, fac: Facility, **changes) -> Facility:
     for k, v in changes.items():
         if v is not None:
             setattr(fac, k, v)
+    mark_facility_dirty(db, fac.id)
+    mark_catalog_dirty(db)
     db.add(fac)
     db.commit()
     db.refresh(fac)
     return fac
 
+# Filas por DELETE en el borrado por lotes en segundo plano
+DELETE_CHUNK_SIZE = 1000
+
+def _dependents(fac_id: int) -> list[tuple[type, object]]:
+    # En orden: primero lo que apunta a las franjas, al final las franjas
+    return [
+        (Reservation, Reservation.instalacion_id == fac_id),
+        (SeatHold, SeatHold.instalacion_id == fac_id),
+        (ScheduleTemplate, ScheduleTemplate.instalacion_id == fac_id),
+        (Slot, Slot.instalacion_id == fac_id),
+    ]
+
 def delete_facility(db: Session, fac: Facility) -> None:
-    db.delete(fac)
+    """Borra la instalación y todo lo que cuelga de ella con un DELETE por tabla,
+    sin cargar franjas ni reservas en memoria."""
+    fac_id = fac.id
+    mark_facility_dirty(db, fac_id)
+    mark_catalog_dirty(db)
+    for model, cond in _dependents(fac_id):
+        db.execute(delete(model).where(cond).execution_options(synchronize_session=False))
+    drop_occupancy_stats(db, fac_id)
+    db.execute(delete(Facility).where(Facility.id == fac_id).execution_options(synchronize_session=False))
+    db.expunge(fac)
+    db.commit()
+
+def delete_facility_chunked(db: Session, job: Job, fac_id: int, chunk_size: int = DELETE_CHUNK_SIZE) -> None:
+    """Como delete_facility, pero en lotes de `chunk_size` filas con un commit por lote.
+
+    La instalación se desactiva al empezar para que deje de listarse mientras se borra.
+    """
+    fac = db.get(Facility, fac_id)
+    if not fac:
+        raise LookupError("Instalación no encontrada")
+    fac.activo = False
+    mark_facility_dirty(db, fac_id)
+    mark_catalog_dirty(db)
+    db.commit()
+
+    deps = _dependents(fac_id)
+    job.total = sum(db.scalar(select(func.count()).select_from(model).where(cond)) for model, cond in deps) + 1
+    for model, cond in deps:
+        while True:
+            chunk = select(model.id).where(cond).limit(chunk_size).scalar_subquery()
+            deleted = db.execute(
+                delete(model).where(model.id.in_(chunk)).execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            job.advance(deleted)
+            if deleted < chunk_size:
+                break
+
+    mark_facility_dirty(db, fac_id)
+    mark_catalog_dirty(db)
+    drop_occupancy_stats(db, fac_id)
+    db.execute(delete(Facility).where(Facility.id == fac_id).execution_options(synchronize_session=False))
+    db.expunge(fac)
     db.commit()
+    job.advance(1)
@@ -0,0 +1,151 @@
+# app/utils/facility_catalog.py
+"""
+Catálogo en memoria de instalaciones.
+
+Las instalaciones cambian pocas veces al mes y casi todas las rutas las leen,
+aunque sea solo para comprobar que existen. El catálogo es una instantánea
+inmutable (dict por id + tupla ordenada) que se carga al arrancar y se
+sustituye entera de una vez: los lectores nunca ven una carga a medias.
+
+create/update/delete_facility lo invalidan en el momento y otra vez al hacer
+commit; la siguiente lectura lo recarga con una sola consulta. Una carga que
+empezó antes de la invalidación no se publica (mismo esquema de generaciones
+que slot_cache). Como otros procesos también escriben, el catálogo caduca a los
+`facility_catalog_ttl_seconds` y un id que no aparece se comprueba en la BD
+antes de darlo por inexistente.
+"""
+import threading
+import time as _time
+from dataclasses import dataclass
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.facility import Facility
+
+
+@dataclass(frozen=True)
+class FacilitySnapshot:
+    id: int
+    nombre: str
+    tipo: str | None
+    aforo: int | None
+    activo: bool
+
+
+class _Snapshot:
+    __slots__ = ("by_id", "ordered", "loaded_at")
+
+    def __init__(self, facilities: list[FacilitySnapshot], loaded_at: float):
+        self.by_id = {f.id: f for f in facilities}
+        self.ordered = tuple(facilities)
+        self.loaded_at = loaded_at
+
+
+class FacilityCatalog:
+    def __init__(self, *, ttl_seconds: float | None = None):
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.facility_catalog_ttl_seconds
+        self._snapshot: _Snapshot | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.loads = 0
+        self.fallbacks = 0
+
+    def get(self, db: Session, fac_id: int) -> FacilitySnapshot | None:
+        fac = self._current(db).by_id.get(fac_id)
+        with self._lock:
+            self.lookups += 1
+        if fac is None:
+            fac = self._fallback(db, fac_id)
+        return fac
+
+    def exists(self, db: Session, fac_id: int) -> bool:
+        return self.get(db, fac_id) is not None
+
+    def missing(self, db: Session, fac_ids) -> list[int]:
+        """Ids (sin repetir, en orden) que no corresponden a ninguna instalación."""
+        return [f for f in dict.fromkeys(fac_ids) if not self.exists(db, f)]
+
+    def list(self, db: Session, only_active: bool = True) -> list[FacilitySnapshot]:
+        facilities = self._current(db).ordered
+        with self._lock:
+            self.lookups += 1
+        if only_active:
+            return [f for f in facilities if f.activo]
+        return list(facilities)
+
+    def refresh(self, db: Session) -> None:
+        self.invalidate()
+        self._current(db)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            snap = self._snapshot
+            return {
+                "facilities": len(snap.ordered) if snap else 0,
+                "loaded": snap is not None,
+                "lookups": self.lookups,
+                "loads": self.loads,
+                "fallbacks": self.fallbacks,
+            }
+
+    def _current(self, db: Session) -> _Snapshot:
+        now = _time.monotonic()
+        with self._lock:
+            snap, generation = self._snapshot, self._generation
+        if snap is not None and now - snap.loaded_at < self.ttl:
+            return snap
+
+        rows = db.execute(
+            select(Facility.id, Facility.nombre, Facility.tipo, Facility.aforo, Facility.activo).order_by(Facility.id)
+        ).all()
+        snap = _Snapshot([FacilitySnapshot(*row) for row in rows], now)
+        with self._lock:
+            self.loads += 1
+            if generation == self._generation:
+                self._snapshot = snap
+        return snap
+
+    def _fallback(self, db: Session, fac_id: int) -> FacilitySnapshot | None:
+        # Puede haberla creado otro proceso después de la última carga
+        row = db.execute(
+            select(Facility.id, Facility.nombre, Facility.tipo, Facility.aforo, Facility.activo).where(Facility.id == fac_id)
+        ).first()
+        with self._lock:
+            self.fallbacks += 1
+        if row is None:
+            return None
+        self.invalidate()
+        return FacilitySnapshot(*row)
+
+
+facility_catalog = FacilityCatalog()
+
+_DIRTY = "facility_catalog_dirty"
+
+
+def mark_catalog_dirty(db: Session) -> None:
+    """Invalida el catálogo ya y de nuevo cuando la sesión haga commit."""
+    facility_catalog.invalidate()
+    db.info[_DIRTY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY, False):
+        facility_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY, None)
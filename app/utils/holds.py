@@ -0,0 +1,273 @@
+# app/utils/holds.py
+"""
+Retenciones temporales de plaza.
+
+Una retención descuenta la plaza de la franja durante N minutos. Si no se
+confirma a tiempo, el HoldSweeper la libera: mantiene un heap ordenado por
+caducidad y solo se despierta cuando vence la siguiente, sin recorrer la
+tabla periódicamente. Las plazas se devuelven agrupadas por franja en un
+único UPDATE.
+"""
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.reservation import Reservation
+from app.models.seat_hold import SeatHold
+from app.models.slot import Slot
+from app.models.user import User
+from app.utils.reservations import _claim_seat, _user_has_overlap
+from app.utils.slot_cache import mark_slots_dirty
+from app.utils.occupancy_index import record_seat_deltas
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def create_hold(db: Session, *, user: User, instalacion_id: int, franja_id: int, minutes: int | None = None) -> SeatHold:
+    minutes = minutes or settings.hold_default_minutes
+    if not 1 <= minutes <= settings.hold_max_minutes:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"La retención debe durar entre 1 y {settings.hold_max_minutes} minutos",
+        )
+
+    slot = db.get(Slot, franja_id)
+    if not slot or slot.instalacion_id != instalacion_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación")
+
+    if _user_has_overlap(db, user.id, slot.fecha, slot.hora_inicio, slot.hora_fin):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tienes una reserva solapada en ese horario")
+
+    already = db.scalars(
+        select(SeatHold.id).where(SeatHold.usuario_id == user.id, SeatHold.franja_id == franja_id, SeatHold.expira_en > _now())
+    ).first()
+    if already:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tienes una retención en esta franja")
+
+    if not _claim_seat(db, franja_id):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No quedan plazas en esta franja")
+
+    hold = SeatHold(
+        usuario_id=user.id,
+        instalacion_id=instalacion_id,
+        franja_id=franja_id,
+        expira_en=_now() + timedelta(minutes=minutes),
+    )
+    db.add(hold)
+    db.commit()
+    db.refresh(hold)
+    hold_sweeper.schedule(hold.id, hold.expira_en)
+    return hold
+
+
+def get_hold(db: Session, hold_id: int) -> SeatHold | None:
+    return db.get(SeatHold, hold_id)
+
+
+def _check_owner(hold: SeatHold, user: User) -> None:
+    if hold.usuario_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No puedes gestionar retenciones de otros usuarios")
+
+
+def _take_hold(db: Session, hold_id: int, *, only_active: bool) -> bool:
+    # Quien consiga borrar la fila (confirmación, liberación o barrido) es el único
+    # que puede decidir qué pasa con la plaza.
+    stmt = delete(SeatHold).where(SeatHold.id == hold_id)
+    if only_active:
+        stmt = stmt.where(SeatHold.expira_en > _now())
+    return db.execute(stmt.execution_options(synchronize_session=False)).rowcount == 1
+
+
+def confirm_hold(db: Session, *, hold: SeatHold, user: User) -> Reservation:
+    """Convierte la retención en reserva; la plaza ya estaba descontada."""
+    _check_owner(hold, user)
+    slot = db.get(Slot, hold.franja_id)
+    if not slot:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación")
+
+    if _user_has_overlap(db, user.id, slot.fecha, slot.hora_inicio, slot.hora_fin):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tienes una reserva solapada en ese horario")
+
+    if not _take_hold(db, hold.id, only_active=True):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="La retención ha caducado")
+    db.expunge(hold)
+
+    res = Reservation(
+        usuario_id=hold.usuario_id,
+        instalacion_id=hold.instalacion_id,
+        franja_id=hold.franja_id,
+        fecha=slot.fecha,
+        hora_inicio=slot.hora_inicio,
+        hora_fin=slot.hora_fin,
+    )
+    db.add(res)
+    db.commit()
+    db.refresh(res)
+    return res
+
+
+def release_hold(db: Session, *, hold: SeatHold, user: User) -> None:
+    _check_owner(hold, user)
+    hold_id, franja_id = hold.id, hold.franja_id
+    if _take_hold(db, hold_id, only_active=False):
+        _return_seats(db, {franja_id: 1})
+    db.expunge(hold)
+    db.commit()
+
+
+def _return_seats(db: Session, counts: dict[int, int]) -> None:
+    """Devuelve plazas sin pasar de la capacidad (como _release_seat), en un único UPDATE."""
+    if not counts:
+        return
+    mark_slots_dirty(db, counts)
+    room = dict(db.execute(select(Slot.id, Slot.capacidad - Slot.plazas_disponibles).where(Slot.id.in_(counts))).all())
+    returned = Slot.plazas_disponibles + case(counts, value=Slot.id, else_=0)
+    db.execute(
+        update(Slot)
+        .where(Slot.id.in_(counts))
+        .values(plazas_disponibles=case((returned > Slot.capacidad, Slot.capacidad), else_=returned))
+        .execution_options(synchronize_session=False)
+    )
+    deltas = {franja_id: min(n, room.get(franja_id, 0)) for franja_id, n in counts.items()}
+    record_seat_deltas(db, {franja_id: d for franja_id, d in deltas.items() if d > 0})
+
+
+def release_expired(db: Session, hold_ids: list[int] | None = None, now: datetime | None = None) -> int:
+    """Borra las retenciones caducadas (todas, o solo las indicadas) y devuelve sus plazas.
+
+    Devuelve cuántas retenciones se han liberado.
+    """
+    now = now or _now()
+    cond = [SeatHold.expira_en <= now]
+    if hold_ids is not None:
+        if not hold_ids:
+            return 0
+        cond.append(SeatHold.id.in_(hold_ids))
+    stmt = delete(SeatHold).where(*cond).execution_options(synchronize_session=False)
+
+    if db.get_bind().dialect.delete_returning:
+        franjas = list(db.scalars(stmt.returning(SeatHold.franja_id)).all())
+    else:
+        candidates = db.execute(select(SeatHold.id, SeatHold.franja_id).where(*cond)).all()
+        franjas = [
+            franja_id for hold_id, franja_id in candidates
+            if db.execute(stmt.where(SeatHold.id == hold_id)).rowcount == 1
+        ]
+
+    counts: dict[int, int] = {}
+    for franja_id in franjas:
+        counts[franja_id] = counts.get(franja_id, 0) + 1
+    _return_seats(db, counts)
+    db.commit()
+    return len(franjas)
+
+
+class HoldSweeper:
+    """Libera retenciones caducadas usando un heap de (expira_en, hold_id)."""
+
+    def __init__(self, session_factory: Callable[[], Session] | None = None):
+        self.session_factory = session_factory
+        self._heap: list[tuple[datetime, int]] = []
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self.released = 0
+
+    def schedule(self, hold_id: int, expira_en: datetime) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (expira_en, hold_id))
+            # Solo hace falta despertar al hilo si esta es ahora la primera en caducar
+            if self._heap[0][1] == hold_id:
+                self._cond.notify()
+
+    def pop_due(self, now: datetime | None = None) -> list[int]:
+        now = now or _now()
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def start(self) -> None:
+        """Carga las retenciones pendientes (también las ya caducadas) y arranca el hilo.
+
+        Si no se pueden leer (BD sin migrar todavía) se arranca igualmente: las
+        retenciones que se creen a partir de ahora se programan al crearse.
+        """
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        db = self.session_factory()
+        try:
+            for hold_id, expira_en in db.execute(select(SeatHold.id, SeatHold.expira_en)).all():
+                self.schedule(hold_id, expira_en)
+        except SQLAlchemyError:
+            logger.warning("No se pudieron cargar las retenciones pendientes", exc_info=True)
+        finally:
+            db.close()
+        with self._cond:
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="hold-sweeper", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def clear(self) -> None:
+        with self._cond:
+            self._heap.clear()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._heap:
+                        wait = (self._heap[0][0] - _now()).total_seconds()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+            due = self.pop_due()
+            if not due:
+                continue
+            db = self.session_factory()
+            try:
+                self.released += release_expired(db, due)
+            except Exception:  # noqa: BLE001 - el barrido no debe tumbar el hilo
+                logger.exception("Error liberando retenciones caducadas")
+                db.rollback()
+                # Se reprograman para reintentar más adelante
+                retry_at = _now() + timedelta(seconds=5)
+                for hold_id in due:
+                    self.schedule(hold_id, retry_at)
+            finally:
+                db.close()
+
+
+hold_sweeper = HoldSweeper()
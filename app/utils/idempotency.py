@@ -0,0 +1,215 @@
+# app/utils/idempotency.py
+"""
+Respuestas guardadas por Idempotency-Key.
+
+Antes de reservar, la petición se queda con la clave insertando una fila en
+curso (status_code NULL) en claves_idempotencia; la restricción única impide
+que un reintento concurrente haga lo mismo. La respuesta se escribe en esa
+fila dentro de la misma transacción que la reserva (complete), así que o se
+confirman las dos o ninguna. Si la reserva falla, la fila se borra (release).
+
+Un reintento que encuentra la clave en curso espera a la respuesta
+(`idempotency_wait_seconds`) en lugar de volver a reservar; si no llega, 409.
+Una clave en curso más antigua que `idempotency_pending_seconds` se da por
+abandonada (el proceso murió antes de confirmar) y se puede volver a tomar.
+
+Las respuestas ya confirmadas se guardan además en un LRU en memoria con TTL.
+"""
+import hashlib
+import json
+import threading
+import time as _time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    huella: str
+    status_code: int | None  # None: la petición original sigue en curso
+    body: object
+    creado_en: datetime
+
+
+@dataclass(frozen=True)
+class Claim:
+    """Clave tomada por la petición en curso."""
+    usuario_id: int
+    clave: str
+    huella: str
+
+
+def request_fingerprint(method: str, path: str, body: object = None) -> str:
+    raw = json.dumps([method.upper(), path, jsonable_encoder(body)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    # Cada cuántas claves tomadas se purgan de la BD las caducadas
+    PURGE_EVERY = 500
+
+    def __init__(self, *, ttl_seconds: int | None = None, max_entries: int | None = None):
+        self.ttl = timedelta(seconds=ttl_seconds or settings.idempotency_ttl_seconds)
+        self.max_entries = max_entries or settings.idempotency_cache_size
+        self.pending = timedelta(seconds=settings.idempotency_pending_seconds)
+        self._entries: "OrderedDict[tuple[int, str], StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def get(self, db: Session, usuario_id: int, clave: str) -> StoredResponse | None:
+        now = datetime.utcnow()
+        key = (usuario_id, clave)
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is not None:
+                if now - stored.creado_en < self.ttl:
+                    self._entries.move_to_end(key)
+                    return stored
+                del self._entries[key]
+
+        row = db.scalars(
+            select(IdempotencyKey).where(IdempotencyKey.usuario_id == usuario_id, IdempotencyKey.clave == clave)
+        ).first()
+        if row is None:
+            return None
+        if row.status_code is None:
+            if now - row.creado_en >= self.pending:
+                return None
+            return StoredResponse(huella=row.huella, status_code=None, body=None, creado_en=row.creado_en)
+        if now - row.creado_en >= self.ttl:
+            return None
+        stored = StoredResponse(
+            huella=row.huella,
+            status_code=row.status_code,
+            body=json.loads(row.cuerpo) if row.cuerpo is not None else None,
+            creado_en=row.creado_en,
+        )
+        self._remember(key, stored)
+        return stored
+
+    def begin(self, db: Session, usuario_id: int, clave: str, huella: str) -> tuple[StoredResponse | None, Claim | None]:
+        """Respuesta guardada para la clave o, si no la hay, la clave tomada para esta petición.
+
+        Si otra petición con la misma clave está en curso se espera a su respuesta;
+        pasado `idempotency_wait_seconds` sin respuesta se responde 409.
+        """
+        deadline = _time.monotonic() + settings.idempotency_wait_seconds
+        delay = 0.01
+        while True:
+            stored = self.lookup(db, usuario_id, clave, huella)
+            if stored is not None and stored.status_code is not None:
+                return stored, None
+            if stored is None:
+                claim = self._claim(db, usuario_id, clave, huella)
+                if claim is not None:
+                    return None, claim
+            # En curso (o nos la acaban de quitar): se suelta la conexión mientras se espera
+            db.rollback()
+            if _time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Hay una petición en curso con esta Idempotency-Key; reinténtalo más tarde",
+                    headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+                )
+            _time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    def complete(self, db: Session, claim: Claim, status_code: int, body: object = None) -> None:
+        """Escribe la respuesta en la transacción de `db`, sin commit: se confirma con la reserva."""
+        body = jsonable_encoder(body)
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.usuario_id == claim.usuario_id, IdempotencyKey.clave == claim.clave)
+            .values(status_code=status_code, cuerpo=json.dumps(body) if body is not None else None, creado_en=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    def remember(self, claim: Claim, status_code: int, body: object = None) -> None:
+        """Deja en memoria la respuesta ya confirmada con complete."""
+        stored = StoredResponse(huella=claim.huella, status_code=status_code, body=jsonable_encoder(body), creado_en=datetime.utcnow())
+        self._remember((claim.usuario_id, claim.clave), stored)
+
+    def release(self, db: Session, claim: Claim) -> None:
+        """Suelta la clave de una petición que ha fallado, para que un reintento pueda repetirla."""
+        db.rollback()
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.usuario_id == claim.usuario_id,
+            IdempotencyKey.clave == claim.clave,
+            IdempotencyKey.status_code.is_(None),
+        ))
+        db.commit()
+
+    def save(self, db: Session, usuario_id: int, clave: str, huella: str, status_code: int, body: object = None) -> None:
+        """Guarda directamente una respuesta ya calculada (begin + complete en un paso)."""
+        claim = self._claim(db, usuario_id, clave, huella)
+        if claim is None:
+            # Otro reintento concurrente guardó antes la misma clave; vale su respuesta,
+            # que get deja en memoria en lugar de la nuestra
+            db.rollback()
+            self.get(db, usuario_id, clave)
+            return
+        self.complete(db, claim, status_code, body)
+        db.commit()
+        # Solo tras el commit: la memoria nunca guarda una respuesta que la BD no tiene
+        self.remember(claim, status_code, body)
+
+    def _claim(self, db: Session, usuario_id: int, clave: str, huella: str) -> Claim | None:
+        """Inserta la fila en curso; None si otra petición tiene ya la clave."""
+        now = datetime.utcnow()
+        # Si la clave caducada o abandonada sigue en la tabla se reemplaza
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.usuario_id == usuario_id,
+            IdempotencyKey.clave == clave,
+            or_(
+                and_(IdempotencyKey.status_code.is_not(None), IdempotencyKey.creado_en < now - self.ttl),
+                and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.creado_en < now - self.pending),
+            ),
+        ))
+        db.add(IdempotencyKey(usuario_id=usuario_id, clave=clave, huella=huella, status_code=None, creado_en=now))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
+
+        with self._lock:
+            self._saves += 1
+            purge = self._saves % self.PURGE_EVERY == 0
+        if purge:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.creado_en < now - self.ttl))
+            db.commit()
+        return Claim(usuario_id=usuario_id, clave=clave, huella=huella)
+
+    def lookup(self, db: Session, usuario_id: int, clave: str, huella: str) -> StoredResponse | None:
+        """Respuesta guardada para la clave, validando que el reintento es la misma petición."""
+        stored = self.get(db, usuario_id, clave)
+        if stored is not None and stored.huella != huella:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key ya usada con una petición distinta",
+            )
+        return stored
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: tuple[int, str], stored: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+idempotency_store = IdempotencyStore()
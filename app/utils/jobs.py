@@ -0,0 +1,94 @@
+# app/utils/jobs.py
+"""
+Trabajos en segundo plano con progreso consultable.
+
+Registro en memoria (por proceso) de trabajos largos de administración, como
+borrar una instalación con todo su histórico. Cada trabajo corre en su propio
+hilo con su propia sesión y va actualizando `procesados` sobre `total`.
+"""
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    id: str
+    tipo: str
+    estado: str = "pendiente"  # pendiente | en_curso | completado | error
+    total: int = 0
+    procesados: int = 0
+    detalle: str | None = None
+    resultado: dict | None = None
+    creado_en: datetime = field(default_factory=datetime.utcnow)
+    terminado_en: datetime | None = None
+
+    def advance(self, n: int) -> None:
+        self.procesados += n
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class JobRegistry:
+    # Trabajos terminados que se conservan para consultar su resultado
+    MAX_JOBS = 100
+
+    def __init__(self, session_factory: Callable[[], Session] | None = None):
+        self.session_factory = session_factory
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, tipo: str, fn: Callable[[Session, Job], None]) -> Job:
+        """Lanza `fn(db, job)` en un hilo y devuelve el trabajo recién creado."""
+        job = Job(id=uuid.uuid4().hex, tipo=tipo)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.MAX_JOBS:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.estado in ("pendiente", "en_curso"):
+                    break
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job, fn), name=f"job-{tipo}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jobs.clear()
+
+    def _run(self, job: Job, fn: Callable[[Session, Job], None]) -> None:
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        db = self.session_factory()
+        job.estado = "en_curso"
+        try:
+            fn(db, job)
+            job.estado = "completado"
+        except Exception as e:  # noqa: BLE001 - el error queda en el propio trabajo
+            logger.exception("Error en el trabajo %s (%s)", job.id, job.tipo)
+            db.rollback()
+            job.estado = "error"
+            job.detalle = str(e)
+        finally:
+            job.terminado_en = datetime.utcnow()
+            db.close()
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,112 @@
+# app/utils/listing_versions.py
+"""
+Versiones de los listados de franjas e instalaciones, para ETag / 304.
+
+Cada (instalación, día) tiene un contador que suben las mismas marcas de
+escritura que invalidan la caché de franjas (ver slot_cache). El ETag combina
+el id de arranque del proceso, una generación global (para escrituras sobre
+franjas que nunca se han listado) y los contadores de la instalación y del
+día, así que un GET condicional se responde sin tocar la BD.
+
+Los contadores solo ven las escrituras de este proceso (no las de otros
+workers ni las de scripts contra la BD), así que el ETag lleva además el
+instante en que se emitió y deja de valer a los `listing_etag_ttl_seconds`:
+como mucho se sirve un 304 obsoleto durante ese tiempo, igual que la caché de
+franjas con su TTL.
+"""
+import threading
+import time as _time
+import uuid
+from datetime import date
+
+from app.core.config import settings
+
+BOOT_ID = uuid.uuid4().hex[:12]
+
+# Tope de franjas con día conocido; al superarlo se olvidan todas y se sube la generación
+MAX_TRACKED_SLOTS = 100_000
+
+Day = tuple[int, date]
+
+
+class ListingVersions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._facilities = 0
+        self._by_facility: dict[int, int] = {}
+        self._by_day: dict[Day, int] = {}
+        self._slot_day: dict[int, Day] = {}
+
+    def remember_slots(self, instalacion_id: int, fecha: date, franja_ids) -> None:
+        """Registra a qué día pertenece cada franja listada."""
+        day = (instalacion_id, fecha)
+        with self._lock:
+            if len(self._slot_day) > MAX_TRACKED_SLOTS:
+                self._slot_day.clear()
+                self._generation += 1
+            for franja_id in franja_ids:
+                self._slot_day[franja_id] = day
+
+    def bump_slots(self, franja_ids) -> None:
+        with self._lock:
+            for franja_id in franja_ids:
+                day = self._slot_day.get(franja_id)
+                if day is not None:
+                    self._by_day[day] = self._by_day.get(day, 0) + 1
+                else:
+                    self._generation += 1
+
+    def bump_day(self, instalacion_id: int, fecha: date) -> None:
+        day = (instalacion_id, fecha)
+        with self._lock:
+            self._by_day[day] = self._by_day.get(day, 0) + 1
+
+    def bump_facility(self, instalacion_id: int) -> None:
+        with self._lock:
+            self._by_facility[instalacion_id] = self._by_facility.get(instalacion_id, 0) + 1
+            self._facilities += 1
+
+    def slots_version(self, instalacion_id: int, fecha: date) -> str:
+        with self._lock:
+            fac = self._by_facility.get(instalacion_id, 0)
+            day = self._by_day.get((instalacion_id, fecha), 0)
+            return f"{BOOT_ID}-{self._generation}-{fac}-{day}"
+
+    def facilities_version(self) -> str:
+        with self._lock:
+            return f"{BOOT_ID}-{self._facilities}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slot_day.clear()
+            self._by_day.clear()
+            self._by_facility.clear()
+            self._generation += 1
+            self._facilities += 1
+
+
+listing_versions = ListingVersions()
+
+
+def make_etag(version: str) -> str:
+    """ETag de una versión, sellado con el instante de emisión."""
+    return f'"{version}-{int(_time.time())}"'
+
+
+def etag_matches(if_none_match: str | None, version: str) -> str | None:
+    """El ETag de If-None-Match que sigue valiendo para `version`, o None.
+
+    Vale si es de esa misma versión y se emitió hace menos de `listing_etag_ttl_seconds`.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return make_etag(version)
+    now = _time.time()
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        tag_version, _, issued = tag.strip('"').rpartition("-")
+        if tag_version == version and issued.isdigit() and 0 <= now - int(issued) < settings.listing_etag_ttl_seconds:
+            return tag
+    return None
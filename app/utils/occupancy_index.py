@@ -0,0 +1,288 @@
+# app/utils/occupancy_index.py
+"""
+Índice en memoria de plazas libres para buscar "la próxima franja libre".
+
+Por instalación se guardan arrays paralelos ordenados por (fecha, hora_inicio):
+inicio, fin, id, plazas libres y capacidad, más un snapshot de sus plantillas.
+Se carga perezosamente con una consulta por instalación (solo franjas desde
+hoy) y se recarga pasado `occupancy_index_ttl_seconds`.
+
+Las rutas de reserva y cancelación registran en la sesión cuánto han cambiado
+las plazas de cada franja (solo si el UPDATE afectó a la fila); los cambios se
+aplican al índice al hacer commit y se descartan si hay rollback. Se anotan por
+transacción: los de un SAVEPOINT pasan a la transacción que lo contiene al
+liberarlo y se descartan si se deshace (p.ej. un miembro fallido del group
+commit), así que solo llegan al índice con el commit exterior. Crear, borrar
+o materializar franjas, o tocar plantillas, descarta el índice de la
+instalación. Como otros procesos también escriben, el candidato encontrado se
+comprueba por clave primaria antes de devolverlo.
+"""
+import bisect
+import threading
+import time as _time
+from array import array
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.schedule_template import ScheduleTemplate
+from app.models.slot import Slot
+
+# Días hacia delante en los que se buscan franjas virtuales de plantillas
+TEMPLATE_HORIZON_DAYS = 90
+
+_DELTAS = "occupancy_deltas"
+
+
+def _key(fecha: date, hora: time) -> int:
+    return fecha.toordinal() * 86400 + hora.hour * 3600 + hora.minute * 60 + hora.second
+
+
+def _from_key(key: int) -> tuple[date, time]:
+    day, secs = divmod(key, 86400)
+    return date.fromordinal(day), time(secs // 3600, secs // 60 % 60, secs % 60)
+
+
+class _FacilityIndex:
+    __slots__ = ("starts", "ends", "ids", "free", "capacity", "pos", "templates", "loaded_at")
+
+    def __init__(self, rows, templates, loaded_at: float):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.ids = array("q")
+        self.free = array("l")
+        self.capacity = array("l")
+        for slot_id, fecha, hi, hf, cap, libres in rows:
+            self.starts.append(_key(fecha, hi))
+            self.ends.append(_key(fecha, hf))
+            self.ids.append(slot_id)
+            self.free.append(libres)
+            self.capacity.append(cap)
+        self.pos = {slot_id: i for i, slot_id in enumerate(self.ids)}
+        self.templates = templates
+        self.loaded_at = loaded_at
+
+    def first_real(self, after: int, min_seats: int, start: int | None = None) -> int | None:
+        i = bisect.bisect_left(self.starts, after) if start is None else start
+        free = self.free
+        for j in range(i, len(free)):
+            if free[j] >= min_seats:
+                return j
+        return None
+
+    def first_virtual(self, after: int, min_seats: int, before: int | None) -> tuple | None:
+        """Primera franja virtual de plantilla, sin fila real a esa hora, anterior a `before`."""
+        start_day = date.fromordinal(after // 86400)
+        best = None
+        for t in self.templates:
+            t_id, dias, hi, hf, cap, desde, hasta, excluidas = t
+            if cap < min_seats:
+                continue
+            for offset in range(TEMPLATE_HORIZON_DAYS):
+                d = start_day + timedelta(days=offset)
+                k = _key(d, hi)
+                if (before is not None and k >= before) or (best is not None and k >= best[0]) or (hasta and d > hasta):
+                    break
+                if (
+                    k < after
+                    or d.weekday() not in dias
+                    or (desde and d < desde)
+                    or d in excluidas
+                    or self._has_real(k, _key(d, hf))
+                ):
+                    continue
+                best = (k, _key(d, hf), t_id, cap)
+                break
+        return best
+
+    def _has_real(self, start: int, end: int) -> bool:
+        i = bisect.bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ends[i] == end:
+                return True
+            i += 1
+        return False
+
+
+class OccupancyIndex:
+    def __init__(self, *, ttl_seconds: float | None = None):
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.occupancy_index_ttl_seconds
+        self._facilities: dict[int, _FacilityIndex] = {}
+        self._slot_facility: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.loads = 0
+        self.corrections = 0
+
+    def next_available(self, db: Session, *, facility_ids: list[int], after: datetime, min_seats: int = 1) -> list[dict]:
+        """Próxima franja con al menos `min_seats` plazas en cada instalación, ordenadas por hora."""
+        after_key = _key(after.date(), after.time())
+        out = []
+        for fac_id in dict.fromkeys(facility_ids):
+            idx = self._get(db, fac_id)
+            found = self._next_for(db, fac_id, idx, after_key, min_seats)
+            if found:
+                out.append(found)
+        with self._lock:
+            self.lookups += 1
+        out.sort(key=lambda s: (s["fecha"], s["hora_inicio"]))
+        return out
+
+    def apply_deltas(self, deltas: dict[int, int]) -> None:
+        with self._lock:
+            for franja_id, delta in deltas.items():
+                fac_id = self._slot_facility.get(franja_id)
+                idx = self._facilities.get(fac_id) if fac_id is not None else None
+                if idx is None:
+                    continue
+                i = idx.pos.get(franja_id)
+                if i is not None:
+                    idx.free[i] = max(0, min(idx.capacity[i], idx.free[i] + delta))
+
+    def drop(self, instalacion_id: int) -> None:
+        with self._lock:
+            self._drop(instalacion_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._facilities.clear()
+            self._slot_facility.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "facilities": len(self._facilities),
+                "slots": sum(len(idx.ids) for idx in self._facilities.values()),
+                "lookups": self.lookups,
+                "loads": self.loads,
+                "corrections": self.corrections,
+            }
+
+    def _drop(self, instalacion_id: int) -> None:
+        idx = self._facilities.pop(instalacion_id, None)
+        if idx is not None:
+            for slot_id in idx.ids:
+                self._slot_facility.pop(slot_id, None)
+
+    def _get(self, db: Session, fac_id: int) -> _FacilityIndex:
+        now = _time.monotonic()
+        with self._lock:
+            idx = self._facilities.get(fac_id)
+            if idx is not None and now - idx.loaded_at < self.ttl:
+                return idx
+
+        rows = db.execute(
+            select(Slot.id, Slot.fecha, Slot.hora_inicio, Slot.hora_fin, Slot.capacidad, Slot.plazas_disponibles)
+            .where(Slot.instalacion_id == fac_id, Slot.fecha >= date.today())
+            .order_by(Slot.fecha, Slot.hora_inicio, Slot.hora_fin)
+        ).all()
+        templates = [
+            (
+                t.id,
+                {int(d) for d in t.dias_semana.split(",") if d},
+                t.hora_inicio,
+                t.hora_fin,
+                t.capacidad,
+                t.fecha_desde,
+                t.fecha_hasta,
+                {date.fromisoformat(d) for d in (t.fechas_excluidas or "").split(",") if d},
+            )
+            for t in db.scalars(
+                select(ScheduleTemplate).where(ScheduleTemplate.instalacion_id == fac_id, ScheduleTemplate.activo.is_(True))
+            )
+        ]
+        idx = _FacilityIndex(rows, templates, now)
+        with self._lock:
+            self._drop(fac_id)
+            self._facilities[fac_id] = idx
+            for slot_id in idx.ids:
+                self._slot_facility[slot_id] = fac_id
+            self.loads += 1
+        return idx
+
+    def _next_for(self, db: Session, fac_id: int, idx: _FacilityIndex, after: int, min_seats: int) -> dict | None:
+        i = idx.first_real(after, min_seats)
+        while i is not None:
+            # Comprobación por clave primaria: otro proceso puede haber reservado
+            libres = db.scalar(select(Slot.plazas_disponibles).where(Slot.id == idx.ids[i]))
+            if libres is not None and libres >= min_seats:
+                break
+            with self._lock:
+                idx.free[i] = libres or 0
+                self.corrections += 1
+            i = idx.first_real(after, min_seats, start=i + 1)
+
+        virtual = idx.first_virtual(after, min_seats, idx.starts[i] if i is not None else None)
+        if virtual is not None:
+            start, end, plantilla_id, cap = virtual
+            fecha, hora_inicio = _from_key(start)
+            return {
+                "id": None,
+                "plantilla_id": plantilla_id,
+                "instalacion_id": fac_id,
+                "fecha": fecha,
+                "hora_inicio": hora_inicio,
+                "hora_fin": _from_key(end)[1],
+                "capacidad": cap,
+                "plazas_disponibles": cap,
+            }
+        if i is None:
+            return None
+        fecha, hora_inicio = _from_key(idx.starts[i])
+        return {
+            "id": idx.ids[i],
+            "plantilla_id": None,
+            "instalacion_id": fac_id,
+            "fecha": fecha,
+            "hora_inicio": hora_inicio,
+            "hora_fin": _from_key(idx.ends[i])[1],
+            "capacidad": idx.capacity[i],
+            "plazas_disponibles": libres,
+        }
+
+
+occupancy_index = OccupancyIndex()
+
+
+def _merge(into: dict[int, int], deltas: dict[int, int]) -> None:
+    for franja_id, delta in deltas.items():
+        into[franja_id] = into.get(franja_id, 0) + delta
+
+
+def record_seat_deltas(db: Session, deltas: dict[int, int]) -> None:
+    """Anota cambios de plazas ya aplicados en la BD; llegan al índice con el commit."""
+    tx = db.get_nested_transaction() or db.get_transaction()
+    _merge(db.info.setdefault(_DELTAS, {}).setdefault(tx, {}), deltas)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    # También salta al liberar un SAVEPOINT, con él aún como transacción actual
+    pending = session.info.get(_DELTAS)
+    if not pending:
+        return
+    tx = session.get_nested_transaction() or session.get_transaction()
+    if tx is not None and tx.nested:
+        deltas = pending.pop(tx, None)
+        if deltas:
+            _merge(pending.setdefault(tx.parent, {}), deltas)
+        return
+    session.info.pop(_DELTAS, None)
+    applied: dict[int, int] = {}
+    for deltas in pending.values():
+        _merge(applied, deltas)
+    if applied:
+        occupancy_index.apply_deltas(applied)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    pending = session.info.get(_DELTAS)
+    if not pending:
+        return
+    if previous_transaction.nested:
+        pending.pop(previous_transaction, None)
+    elif previous_transaction.parent is None:
+        session.info.pop(_DELTAS, None)
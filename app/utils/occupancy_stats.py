@@ -0,0 +1,150 @@
+# app/utils/occupancy_stats.py
+"""
+Estadísticas de ocupación por instalación, día y hora.
+
+La tabla estadisticas_ocupacion guarda, por (instalación, fecha, hora de
+inicio), cuántas plazas se ofertan y cuántas hay reservadas. Se mantiene en la
+misma transacción que la escritura que la cambia:
+
+- reservas: eventos ORM de Reservation (alta, cambio de estado y borrado)
+  suman o restan una plaza con un UPSERT;
+- franjas creadas con el ORM: evento after_insert de Slot;
+- franjas insertadas o borradas con SQL directo (alta masiva, materializar
+  plantillas, borrar franja): `refresh_days` recalcula esos días;
+- borrar una instalación borra sus filas. El archivado no las toca: las
+  estadísticas de lo archivado se conservan.
+"""
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, attributes
+
+from app.models.occupancy_stat import OccupancyStat
+from app.models.reservation import Reservation
+from app.models.slot import Slot
+
+_T = OccupancyStat.__table__
+_ACTIVA = "activa"
+
+
+def _bump(connection: Connection, instalacion_id: int, fecha: date, hora: int, *, reservadas: int = 0, capacidad: int = 0) -> None:
+    key = {"instalacion_id": instalacion_id, "fecha": fecha, "hora": hora}
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(_T).values(**key, reservadas=max(reservadas, 0), capacidad=max(capacidad, 0))
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[_T.c.instalacion_id, _T.c.fecha, _T.c.hora],
+            set_={"reservadas": _T.c.reservadas + reservadas, "capacidad": _T.c.capacidad + capacidad},
+        ))
+        return
+    # Sin ON CONFLICT: UPDATE y, si no había fila, INSERT
+    updated = connection.execute(
+        update(_T)
+        .where(_T.c.instalacion_id == instalacion_id, _T.c.fecha == fecha, _T.c.hora == hora)
+        .values(reservadas=_T.c.reservadas + reservadas, capacidad=_T.c.capacidad + capacidad)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(_T).values(**key, reservadas=max(reservadas, 0), capacidad=max(capacidad, 0)))
+
+
+@event.listens_for(Reservation, "after_insert")
+def _reservation_inserted(mapper, connection, target) -> None:
+    if target.estado in (None, _ACTIVA):
+        _bump(connection, target.instalacion_id, target.fecha, target.hora_inicio.hour, reservadas=1)
+
+
+@event.listens_for(Reservation, "after_update")
+def _reservation_updated(mapper, connection, target) -> None:
+    hist = attributes.get_history(target, "estado")
+    if not hist.has_changes():
+        return
+    was_active = _ACTIVA in (hist.deleted or ())
+    is_active = target.estado == _ACTIVA
+    if was_active != is_active:
+        _bump(connection, target.instalacion_id, target.fecha, target.hora_inicio.hour, reservadas=1 if is_active else -1)
+
+
+@event.listens_for(Reservation, "after_delete")
+def _reservation_deleted(mapper, connection, target) -> None:
+    if target.estado == _ACTIVA:
+        _bump(connection, target.instalacion_id, target.fecha, target.hora_inicio.hour, reservadas=-1)
+
+
+@event.listens_for(Slot, "after_insert")
+def _slot_inserted(mapper, connection, target) -> None:
+    _bump(connection, target.instalacion_id, target.fecha, target.hora_inicio.hour, capacidad=target.capacidad)
+
+
+def refresh_days(db: Session, days) -> None:
+    """Recalcula desde franjas y reservas los días (instalacion_id, fecha) indicados."""
+    by_facility: dict[int, set[date]] = defaultdict(set)
+    for instalacion_id, fecha in days:
+        by_facility[instalacion_id].add(fecha)
+
+    for instalacion_id, fechas in by_facility.items():
+        totals: dict[tuple[date, int], list[int]] = defaultdict(lambda: [0, 0])
+        for fecha, hora_inicio, capacidad in db.execute(
+            select(Slot.fecha, Slot.hora_inicio, Slot.capacidad)
+            .where(Slot.instalacion_id == instalacion_id, Slot.fecha.in_(fechas))
+        ):
+            totals[(fecha, hora_inicio.hour)][1] += capacidad
+        for fecha, hora_inicio in db.execute(
+            select(Reservation.fecha, Reservation.hora_inicio)
+            .where(Reservation.instalacion_id == instalacion_id, Reservation.fecha.in_(fechas), Reservation.estado == _ACTIVA)
+        ):
+            totals[(fecha, hora_inicio.hour)][0] += 1
+
+        db.execute(delete(_T).where(_T.c.instalacion_id == instalacion_id, _T.c.fecha.in_(fechas)))
+        if totals:
+            db.execute(insert(_T), [
+                {"instalacion_id": instalacion_id, "fecha": fecha, "hora": hora, "reservadas": r, "capacidad": c}
+                for (fecha, hora), (r, c) in totals.items()
+            ])
+
+
+def drop_facility(db: Session, instalacion_id: int) -> None:
+    db.execute(delete(_T).where(_T.c.instalacion_id == instalacion_id))
+
+
+GROUPINGS = ("fecha", "dia_semana", "hora")
+
+
+def occupancy_report(
+    db: Session,
+    *,
+    desde: date,
+    hasta: date,
+    instalacion_id: int | None = None,
+    group_by: str = "fecha",
+) -> list[dict]:
+    """Ocupación agregada por instalación y `group_by` (fecha, día de la semana u hora)."""
+    stmt = select(_T).where(_T.c.fecha >= desde, _T.c.fecha <= hasta)
+    if instalacion_id is not None:
+        stmt = stmt.where(_T.c.instalacion_id == instalacion_id)
+
+    totals: dict[tuple[int, object], list[int]] = defaultdict(lambda: [0, 0])
+    for row in db.execute(stmt):
+        if group_by == "dia_semana":
+            bucket = row.fecha.weekday()
+        elif group_by == "hora":
+            bucket = row.hora
+        else:
+            bucket = row.fecha
+        t = totals[(row.instalacion_id, bucket)]
+        t[0] += row.reservadas
+        t[1] += row.capacidad
+
+    return [
+        {
+            "instalacion_id": fac_id,
+            group_by: bucket,
+            "reservadas": r,
+            "capacidad": c,
+            "ocupacion": round(r / c, 4) if c else None,
+        }
+        for (fac_id, bucket), (r, c) in sorted(totals.items(), key=lambda kv: (kv[0][0], kv[0][1]))
+    ]
@@ -0,0 +1,111 @@
+# app/utils/password_hash.py
+"""
+Rondas de pbkdf2 compartidas por todos los procesos.
+
+La calibración (al arrancar o con /admin/password-hash/calibrate) mide un solo
+host, pero las rondas elegidas se guardan en la tabla ajustes y todos los
+workers las leen de ahí: si cada proceso usara su propia medición, dos que
+difieran más de REHASH_TOLERANCE se pasarían el login rehaciendo los hashes del
+otro. El primer proceso que arranca sin valor guardado calibra y lo guarda; el
+resto lo adopta. Los cambios posteriores se ven, como mucho, a los
+`password_hash_sync_seconds` (sync_hash_rounds, en el camino del login).
+
+Con `password_hash_rounds` fijado, o `password_hash_calibrate` a False, no se
+lee ni se escribe nada: las rondas salen de la configuración, igual en todos
+los procesos, y no se pueden recalibrar en caliente.
+"""
+import logging
+import threading
+import time as _time
+from typing import Callable
+
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.password_pool import password_pool
+from app.core.security import calibrate_hash_rounds, hash_rounds, set_hash_rounds
+from app.models.system_setting import SystemSetting
+
+logger = logging.getLogger(__name__)
+
+ROUNDS_KEY = "pbkdf2_sha256_rounds"
+
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+
+
+def rounds_are_shared() -> bool:
+    """Si las rondas salen de la tabla ajustes (y no de la configuración de cada proceso)."""
+    return not settings.password_hash_rounds and settings.password_hash_calibrate
+
+
+def load_hash_rounds(db: Session) -> int | None:
+    row = db.get(SystemSetting, ROUNDS_KEY)
+    return int(row.valor) if row else None
+
+
+def store_hash_rounds(db: Session, rounds: int, *, overwrite: bool = True) -> int:
+    """Guarda las rondas y devuelve las que quedan vigentes.
+
+    Con overwrite=False solo se guarda si no había valor; si otro proceso lo
+    guardó antes, se devuelve el suyo.
+    """
+    row = db.get(SystemSetting, ROUNDS_KEY)
+    if row is not None:
+        if not overwrite:
+            return int(row.valor)
+        row.valor = str(rounds)
+    else:
+        db.add(SystemSetting(clave=ROUNDS_KEY, valor=str(rounds)))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return load_hash_rounds(db) or rounds
+    return rounds
+
+
+def apply_hash_rounds(rounds: int) -> None:
+    """Aplica las rondas en este proceso y en sus procesos de hash."""
+    if rounds != hash_rounds():
+        set_hash_rounds(rounds)
+        password_pool.reconfigure()
+
+
+def configure_hash_rounds(session_factory: Callable[[], Session] | None = None) -> int:
+    """Al arrancar: rondas fijas, las guardadas, o calibra y guarda si aún no hay."""
+    global _last_sync
+    if settings.password_hash_rounds:
+        rounds = settings.password_hash_rounds
+    elif not settings.password_hash_calibrate:
+        rounds = max(pbkdf2_sha256.default_rounds, settings.password_hash_min_rounds)
+    else:
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        try:
+            with session_factory() as db:
+                rounds = load_hash_rounds(db) or store_hash_rounds(db, calibrate_hash_rounds(), overwrite=False)
+        except SQLAlchemyError:
+            # Sin tabla todavía (BD recién creada): medición local, sin compartir
+            logger.warning("No se pudieron leer las rondas guardadas; se calibra solo este proceso", exc_info=True)
+            rounds = calibrate_hash_rounds()
+    set_hash_rounds(rounds)
+    _last_sync = _time.monotonic()
+    return rounds
+
+
+def sync_hash_rounds(db: Session) -> None:
+    """Adopta las rondas guardadas por otro proceso; lee la BD como mucho cada password_hash_sync_seconds."""
+    global _last_sync
+    if not rounds_are_shared():
+        return
+    with _sync_lock:
+        if _time.monotonic() - _last_sync < settings.password_hash_sync_seconds:
+            return
+        _last_sync = _time.monotonic()
+    rounds = load_hash_rounds(db)
+    if rounds:
+        apply_hash_rounds(rounds)
@@ -1,44 +1,341 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, delete, and_, literal_column
 from fastapi import HTTPException, status
 from app.models.reservation import Reservation
 from app.models.slot import Slot
 from app.models.user import User
-from datetime import date
+from app.db.group_commit import get_group_committer
+from app.utils.slot_cache import mark_slots_dirty
+from app.utils.occupancy_index import record_seat_deltas
+from app.utils.occupancy_stats import refresh_days
+from app.utils.schedule_templates import TemplateRef, _materialize, list_slots_with_templates, materialize_slot
+from app.utils.facility_catalog import facility_catalog
+from datetime import date, time
+from typing import Callable
 
-def _get_slot_for_update(db: Session, franja_id: int) -> Slot | None:
-    # En SQLite no hay FOR UPDATE; en Postgres podríamos bloquear fila.
+# Se ejecuta en la misma transacción que la reserva, justo antes del commit
+# (p.ej. guardar la respuesta de la Idempotency-Key)
+BeforeCommit = Callable[[Session, Reservation | None], None]
+
+def _get_slot(db: Session, franja_id: int) -> Slot | None:
     return db.get(Slot, franja_id)
 
+def _claim_seat(db: Session, franja_id: int) -> bool:
+    # UPDATE condicional: la comprobación y el descuento van en la misma sentencia,
+    # así dos peticiones concurrentes no pueden quedarse con la última plaza
+    # (vale igual para SQLite que para Postgres, sin FOR UPDATE).
+    stmt = (
+        update(Slot)
+        .where(Slot.id == franja_id, Slot.plazas_disponibles > 0)
+        .values(plazas_disponibles=Slot.plazas_disponibles - 1)
+        .execution_options(synchronize_session=False)
+    )
+    mark_slots_dirty(db, [franja_id])
+    if db.execute(stmt).rowcount != 1:
+        return False
+    record_seat_deltas(db, {franja_id: -1})
+    return True
+
+def _claim_seats(db: Session, franja_ids: list[int]) -> set[int]:
+    # Versión por conjuntos de _claim_seat: una plaza de cada franja en una sola sentencia.
+    if not franja_ids:
+        return set()
+    stmt = (
+        update(Slot)
+        .where(Slot.id.in_(franja_ids), Slot.plazas_disponibles > 0)
+        .values(plazas_disponibles=Slot.plazas_disponibles - 1)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        mark_slots_dirty(db, franja_ids)
+        claimed = set(db.scalars(stmt.returning(Slot.id)).all())
+        record_seat_deltas(db, {fid: -1 for fid in claimed})
+        return claimed
+    return {fid for fid in franja_ids if _claim_seat(db, fid)}
+
+def _release_seat(db: Session, franja_id: int) -> None:
+    stmt = (
+        update(Slot)
+        .where(Slot.id == franja_id, Slot.plazas_disponibles < Slot.capacidad)
+        .values(plazas_disponibles=Slot.plazas_disponibles + 1)
+        .execution_options(synchronize_session=False)
+    )
+    mark_slots_dirty(db, [franja_id])
+    if db.execute(stmt).rowcount == 1:
+        record_seat_deltas(db, {franja_id: 1})
+
+# Literal (no parámetro) para que el planificador pueda usar el índice parcial
+# ix_reservas_usuario_fecha_activa, cuyo predicado es estado = 'activa'.
+_ACTIVA = Reservation.estado == literal_column("'activa'")
+
 def _user_has_overlap(db: Session, user_id: int, fecha: date, hora_inicio, hora_fin) -> bool:
     stmt = (
-        select(Reservation)
-        .where(Reservation.usuario_id == user_id)
-        .join(Slot, Slot.id == Reservation.franja_id)
-        .where(Slot.fecha == fecha)
-        .where(and_(Slot.hora_inicio < hora_fin, hora_inicio < Slot.hora_fin))
+        select(Reservation.id)
+        .where(Reservation.usuario_id == user_id, Reservation.fecha == fecha, _ACTIVA)
+        .where(and_(Reservation.hora_inicio < hora_fin, hora_inicio < Reservation.hora_fin))
+        .limit(1)
     )
     return db.scalars(stmt).first() is not None
 
-def create_reservation(db: Session, *, user: User, instalacion_id: int, franja_id: int) -> Reservation:
-    slot = _get_slot_for_update(db, franja_id)
+def _user_intervals(db: Session, user_id: int, fechas: set[date]) -> list[tuple[date, object, object]]:
+    stmt = (
+        select(Reservation.fecha, Reservation.hora_inicio, Reservation.hora_fin)
+        .where(Reservation.usuario_id == user_id, Reservation.fecha.in_(fechas), _ACTIVA)
+    )
+    return [tuple(row) for row in db.execute(stmt).all()]
+
+def _overlaps(intervals, fecha: date, hora_inicio, hora_fin) -> bool:
+    return any(f == fecha and hi < hora_fin and hora_inicio < hf for f, hi, hf in intervals)
+
+def _book(db: Session, *, user_id: int, instalacion_id: int, franja_id: int) -> Reservation:
+    # Valida y reserva sin confirmar; el llamante decide cuándo hacer commit.
+    slot = _get_slot(db, franja_id)
     if not slot or slot.instalacion_id != instalacion_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación")
 
     if slot.plazas_disponibles <= 0:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No quedan plazas en esta franja")
 
-    if _user_has_overlap(db, user.id, slot.fecha, slot.hora_inicio, slot.hora_fin):
+    if _user_has_overlap(db, user_id, slot.fecha, slot.hora_inicio, slot.hora_fin):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tienes una reserva solapada en ese horario")
 
-    res = Reservation(usuario_id=user.id, instalacion_id=instalacion_id, franja_id=franja_id)
+    if not _claim_seat(db, franja_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No quedan plazas en esta franja")
+
+    res = Reservation(
+        usuario_id=user_id,
+        instalacion_id=instalacion_id,
+        franja_id=franja_id,
+        fecha=slot.fecha,
+        hora_inicio=slot.hora_inicio,
+        hora_fin=slot.hora_fin,
+    )
     db.add(res)
-    slot.plazas_disponibles -= 1
-    db.add(slot)
+    db.flush()
+    return res
+
+def create_reservation(
+    db: Session, *, user: User, instalacion_id: int, franja_id: int, before_commit: BeforeCommit | None = None
+) -> Reservation:
+    try:
+        res = _book(db, user_id=user.id, instalacion_id=instalacion_id, franja_id=franja_id)
+    except HTTPException:
+        db.rollback()
+        raise
+    if before_commit:
+        before_commit(db, res)
+    db.commit()
+    db.refresh(res)
+    return res
+
+def create_reservation_from_template(
+    db: Session, *, user: User, instalacion_id: int, plantilla_id: int, fecha: date, before_commit: BeforeCommit | None = None
+) -> Reservation:
+    """Como create_reservation para una franja virtual: la fila se crea en la misma
+    transacción que la reserva, así que si la reserva falla no queda nada.
+
+    No pasa por la cola ni por el group commit, que trabajan sobre franjas ya existentes.
+    """
+    try:
+        slot = materialize_slot(db, plantilla_id=plantilla_id, instalacion_id=instalacion_id, fecha=fecha)
+        res = _book(db, user_id=user.id, instalacion_id=instalacion_id, franja_id=slot.id)
+    except HTTPException:
+        db.rollback()
+        raise
+    if before_commit:
+        before_commit(db, res)
     db.commit()
     db.refresh(res)
     return res
 
+def create_reservation_grouped(
+    db: Session, *, user: User, instalacion_id: int, franja_id: int, before_commit: BeforeCommit | None = None
+) -> Reservation:
+    """Como create_reservation, pero confirmando en el siguiente lote del group commit."""
+    user_id = user.id
+
+    def book(s: Session) -> int:
+        res = _book(s, user_id=user_id, instalacion_id=instalacion_id, franja_id=franja_id)
+        if before_commit:
+            before_commit(s, res)
+        return res.id
+
+    res_id = get_group_committer().submit(book)
+    return db.get(Reservation, res_id)
+
+def create_reservations_batch(
+    db: Session, *, user: User, items: list[tuple[int, int | TemplateRef]], all_or_nothing: bool = False
+) -> list[dict]:
+    """Reserva varias franjas (instalacion_id, franja_id) con una lectura, una consulta de
+    solapes, un UPDATE por conjuntos y un único commit.
+
+    En lugar de franja_id un elemento puede llevar una franja virtual (TemplateRef):
+    su fila se crea dentro del lote y se borra antes del commit si al final no se
+    reserva. Devuelve un resultado por elemento, en el mismo orden: `status_code` y
+    `detail`, y la reserva creada en `reserva` cuando sale bien. Con `all_or_nothing`
+    basta con que falle un elemento para no reservar ninguno.
+    """
+    # Franjas virtuales primero; una plantilla inexistente es un error de su elemento
+    resolved: list[tuple[int, int | None, HTTPException | None]] = []
+    materialized: dict[int, tuple[int, date]] = {}
+    for instalacion_id, franja in items:
+        if not isinstance(franja, TemplateRef):
+            resolved.append((instalacion_id, franja, None))
+            continue
+        try:
+            slot, created = _materialize(db, plantilla_id=franja.plantilla_id, instalacion_id=instalacion_id, fecha=franja.fecha)
+        except HTTPException as e:
+            resolved.append((instalacion_id, None, e))
+            continue
+        if created:
+            materialized[slot.id] = (instalacion_id, slot.fecha)
+        resolved.append((instalacion_id, slot.id, None))
+
+    franja_ids = {franja_id for _, franja_id, _ in resolved if franja_id is not None}
+    slots = {s.id: s for s in db.scalars(select(Slot).where(Slot.id.in_(franja_ids)))}
+    taken = _user_intervals(db, user.id, {s.fecha for s in slots.values()})
+
+    errors: list[HTTPException | None] = []
+    accepted: list[int] = []
+    for instalacion_id, franja_id, error in resolved:
+        slot = slots.get(franja_id)
+        if error is not None:
+            errors.append(error)
+        elif not slot or slot.instalacion_id != instalacion_id:
+            errors.append(HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación"))
+        elif slot.plazas_disponibles <= 0:
+            errors.append(HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No quedan plazas en esta franja"))
+        elif _overlaps(taken, slot.fecha, slot.hora_inicio, slot.hora_fin):
+            errors.append(HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tienes una reserva solapada en ese horario"))
+        else:
+            errors.append(None)
+            accepted.append(franja_id)
+            # Los elementos aceptados también cuentan para los solapes del resto del lote
+            taken.append((slot.fecha, slot.hora_inicio, slot.hora_fin))
+
+    if all_or_nothing and len(accepted) != len(items):
+        accepted = []
+    claimed = _claim_seats(db, accepted)
+    virtual = set(materialized)
+    if all_or_nothing and len(claimed) != len(accepted):
+        # También deshace las franjas virtuales creadas en el lote
+        db.rollback()
+        claimed = set()
+        materialized = {}
+
+    created: dict[int, Reservation] = {}
+    for instalacion_id, franja_id, _ in resolved:
+        if franja_id in claimed and franja_id not in created:
+            slot = slots[franja_id]
+            created[franja_id] = Reservation(
+                usuario_id=user.id,
+                instalacion_id=instalacion_id,
+                franja_id=franja_id,
+                fecha=slot.fecha,
+                hora_inicio=slot.hora_inicio,
+                hora_fin=slot.hora_fin,
+            )
+    db.add_all(created.values())
+    db.flush()
+
+    # Franjas virtuales que el lote creó y al final no se reservan
+    unused = [franja_id for franja_id in materialized if franja_id not in claimed]
+    if unused:
+        db.execute(delete(Slot).where(Slot.id.in_(unused)).execution_options(synchronize_session=False))
+        refresh_days(db, {materialized[franja_id] for franja_id in unused})
+
+    # Se construye la respuesta antes del commit para no recargar cada fila expirada
+    results = []
+    for (instalacion_id, franja), (_, franja_id, _), error in zip(items, resolved, errors):
+        res = created.get(franja_id) if error is None else None
+        if res is None and error is None:
+            detail = "Lote cancelado: otro elemento no se pudo reservar" if all_or_nothing else "No quedan plazas en esta franja"
+            error = HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+        slot = slots.get(franja_id) if res else None
+        results.append({
+            "instalacion_id": instalacion_id,
+            "franja_id": None if franja_id in virtual and franja_id not in claimed else franja_id,
+            "plantilla_id": franja.plantilla_id if isinstance(franja, TemplateRef) else None,
+            "status_code": error.status_code if error else status.HTTP_201_CREATED,
+            "detail": error.detail if error else None,
+            "reserva": {
+                "id": res.id,
+                "usuario_id": res.usuario_id,
+                "instalacion_id": res.instalacion_id,
+                "franja_id": res.franja_id,
+                "fecha": slot.fecha,
+                "hora_inicio": slot.hora_inicio,
+                "hora_fin": slot.hora_fin,
+            } if res else None,
+        })
+    db.commit()
+    return results
+
+def _contiguous_runs(slots: list[dict], n: int, hora_inicio: time | None = None):
+    # Recorre las franjas del día (ordenadas por hora) y va devolviendo ventanas de
+    # n franjas seguidas (cada una empieza cuando acaba la anterior) con plazas libres.
+    run: list[dict] = []
+    for s in slots:
+        if s["plazas_disponibles"] <= 0:
+            run = []
+            continue
+        if run and run[-1]["hora_fin"] != s["hora_inicio"]:
+            run = []
+        if not run and hora_inicio is not None and s["hora_inicio"] != hora_inicio:
+            continue
+        run.append(s)
+        if len(run) == n:
+            yield list(run)
+            if hora_inicio is not None:
+                return
+            run.pop(0)
+
+def create_block_reservation(
+    db: Session, *, user: User, instalacion_id: int, fecha: date, n: int, hora_inicio: time | None = None
+) -> list[Reservation]:
+    """Reserva n franjas consecutivas de una instalación en una sola transacción.
+
+    Con `hora_inicio` el bloque debe empezar a esa hora; si no, se toma el primero
+    libre del día. Se lee el día una vez, se consultan los solapes del usuario una
+    vez y las plazas se descuentan con un único UPDATE; si otra petición se lleva
+    alguna entre medias, se deshace y se prueba el siguiente bloque.
+    """
+    if not facility_catalog.exists(db, instalacion_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Instalación no encontrada")
+
+    day = list_slots_with_templates(db, instalacion_id=instalacion_id, fecha=fecha, only_available=True)
+    taken = _user_intervals(db, user.id, {fecha})
+
+    for run in _contiguous_runs(day, n, hora_inicio):
+        if _overlaps(taken, fecha, run[0]["hora_inicio"], run[-1]["hora_fin"]):
+            continue
+        franja_ids = [
+            s["id"] if s["id"] is not None
+            else materialize_slot(db, plantilla_id=s["plantilla_id"], instalacion_id=instalacion_id, fecha=fecha).id
+            for s in run
+        ]
+        if len(_claim_seats(db, franja_ids)) != n:
+            db.rollback()
+            continue
+        created = [
+            Reservation(
+                usuario_id=user.id,
+                instalacion_id=instalacion_id,
+                franja_id=franja_id,
+                fecha=fecha,
+                hora_inicio=s["hora_inicio"],
+                hora_fin=s["hora_fin"],
+            )
+            for franja_id, s in zip(franja_ids, run)
+        ]
+        db.add_all(created)
+        db.commit()
+        for res in created:
+            db.refresh(res)
+        return created
+
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"No hay {n} franjas consecutivas libres")
+
 def list_reservations_for_user(db: Session, user_id: int) -> list[Reservation]:
     stmt = select(Reservation).where(Reservation.usuario_id == user_id).order_by(Reservation.id.desc())
     return list(db.scalars(stmt).all())
@@ -46,13 +343,34 @@ def list_reservations_for_user(db: Session, user_id: int) -> list[Reservation]:
 def get_reservation(db: Session, res_id: int) -> Reservation | None:
     return db.get(Reservation, res_id)
 
-def cancel_reservation(db: Session, *, res: Reservation, user: User) -> None:
+def _check_owner(res: Reservation, user: User) -> None:
     if res.usuario_id != user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No puedes cancelar reservas de otros usuarios")
 
-    slot = db.get(Slot, res.franja_id)
-    if slot:
-        slot.plazas_disponibles += 1
-        db.add(slot)
+def _cancel(db: Session, *, res_id: int) -> None:
+    res = db.get(Reservation, res_id)
+    if not res:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada")
+    _release_seat(db, res.franja_id)
     db.delete(res)
+    db.flush()
+
+def cancel_reservation(db: Session, *, res: Reservation, user: User, before_commit: BeforeCommit | None = None) -> None:
+    _check_owner(res, user)
+    _cancel(db, res_id=res.id)
+    if before_commit:
+        before_commit(db, None)
     db.commit()
+
+def cancel_reservation_grouped(db: Session, *, res: Reservation, user: User, before_commit: BeforeCommit | None = None) -> None:
+    """Como cancel_reservation, pero confirmando en el siguiente lote del group commit."""
+    _check_owner(res, user)
+    res_id = res.id
+
+    def cancel(s: Session) -> None:
+        _cancel(s, res_id=res_id)
+        if before_commit:
+            before_commit(s, None)
+
+    get_group_committer().submit(cancel)
+    db.expunge(res)
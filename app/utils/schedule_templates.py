@@ -0,0 +1,208 @@
+# app/utils/schedule_templates.py
+"""
+Plantillas de horario y franjas virtuales.
+
+En lugar de pregenerar semanas de franjas, cada instalación puede tener tramos
+recurrentes (días de la semana, rango de fechas, exclusiones y capacidad). Los
+listados combinan las franjas reales con las virtuales que salen de las
+plantillas, y la fila en franjas_horarias solo se crea al reservar.
+"""
+from dataclasses import dataclass
+from datetime import date, time
+from typing import NamedTuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.facility_catalog import facility_catalog
+from app.models.schedule_template import ScheduleTemplate
+from app.models.slot import Slot
+from app.utils.slot_cache import mark_day_dirty, mark_facility_dirty, slot_cache
+from app.utils.slots import _insert_ignoring_conflicts, list_slots_for_facility_date
+
+
+@dataclass(frozen=True)
+class TemplateSnapshot:
+    """Copia inmutable de una plantilla, para la caché de listados."""
+    id: int
+    instalacion_id: int
+    dias_semana: str
+    hora_inicio: time
+    hora_fin: time
+    capacidad: int
+    fecha_desde: date | None
+    fecha_hasta: date | None
+    fechas_excluidas: str | None
+    activo: bool
+
+
+class TemplateRef(NamedTuple):
+    """Franja virtual de una reserva: plantilla y fecha, aún sin fila propia."""
+    plantilla_id: int
+    fecha: date
+
+
+def _dias(t: ScheduleTemplate | TemplateSnapshot) -> set[int]:
+    return {int(d) for d in t.dias_semana.split(",") if d}
+
+
+def _excluidas(t: ScheduleTemplate | TemplateSnapshot) -> set[date]:
+    return {date.fromisoformat(d) for d in (t.fechas_excluidas or "").split(",") if d}
+
+
+def template_applies(t: ScheduleTemplate | TemplateSnapshot, fecha: date) -> bool:
+    return (
+        t.activo
+        and fecha.weekday() in _dias(t)
+        and (t.fecha_desde is None or fecha >= t.fecha_desde)
+        and (t.fecha_hasta is None or fecha <= t.fecha_hasta)
+        and fecha not in _excluidas(t)
+    )
+
+
+def create_templates(
+    db: Session,
+    *,
+    instalacion_id: int,
+    tramos: list[tuple[time, time]],
+    dias_semana: list[int],
+    capacidad: int,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    fechas_excluidas: list[date] | None = None,
+) -> list[ScheduleTemplate]:
+    """Crea una plantilla por tramo horario, todas con la misma recurrencia."""
+    if not facility_catalog.exists(db, instalacion_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Instalación no encontrada")
+    templates = [
+        ScheduleTemplate(
+            instalacion_id=instalacion_id,
+            dias_semana=",".join(str(d) for d in sorted(set(dias_semana))),
+            hora_inicio=hora_inicio,
+            hora_fin=hora_fin,
+            capacidad=capacidad,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            fechas_excluidas=",".join(d.isoformat() for d in sorted(set(fechas_excluidas or []))) or None,
+        )
+        for hora_inicio, hora_fin in tramos
+    ]
+    db.add_all(templates)
+    mark_facility_dirty(db, instalacion_id)
+    db.commit()
+    for t in templates:
+        db.refresh(t)
+    return templates
+
+
+def list_templates(db: Session, instalacion_id: int) -> list[ScheduleTemplate]:
+    stmt = select(ScheduleTemplate).where(ScheduleTemplate.instalacion_id == instalacion_id).order_by(ScheduleTemplate.hora_inicio)
+    return list(db.scalars(stmt).all())
+
+
+def _listing_templates(db: Session, instalacion_id: int) -> tuple[TemplateSnapshot, ...]:
+    """Plantillas de la instalación para los listados, desde slot_cache si están."""
+    if settings.slot_cache_enabled:
+        cached = slot_cache.get_templates(instalacion_id)
+        if cached is not None:
+            return cached
+        token = slot_cache.templates_token(instalacion_id)
+    templates = tuple(
+        TemplateSnapshot(
+            id=t.id,
+            instalacion_id=t.instalacion_id,
+            dias_semana=t.dias_semana,
+            hora_inicio=t.hora_inicio,
+            hora_fin=t.hora_fin,
+            capacidad=t.capacidad,
+            fecha_desde=t.fecha_desde,
+            fecha_hasta=t.fecha_hasta,
+            fechas_excluidas=t.fechas_excluidas,
+            activo=t.activo,
+        )
+        for t in list_templates(db, instalacion_id)
+    )
+    if settings.slot_cache_enabled:
+        slot_cache.put_templates(instalacion_id, templates, token)
+    return templates
+
+
+def get_template(db: Session, plantilla_id: int) -> ScheduleTemplate | None:
+    return db.get(ScheduleTemplate, plantilla_id)
+
+
+def delete_template(db: Session, template: ScheduleTemplate) -> None:
+    # Las franjas ya materializadas se quedan: pueden tener reservas
+    mark_facility_dirty(db, template.instalacion_id)
+    db.delete(template)
+    db.commit()
+
+
+def list_slots_with_templates(db: Session, *, instalacion_id: int, fecha: date, only_available: bool = False) -> list[dict]:
+    """Franjas reales del día más las virtuales de las plantillas que aún no tienen fila."""
+    real = list_slots_for_facility_date(db, instalacion_id=instalacion_id, fecha=fecha)
+    taken = {(s.hora_inicio, s.hora_fin) for s in real}
+    out = [
+        {
+            "id": s.id,
+            "plantilla_id": None,
+            "instalacion_id": s.instalacion_id,
+            "fecha": s.fecha,
+            "hora_inicio": s.hora_inicio,
+            "hora_fin": s.hora_fin,
+            "capacidad": s.capacidad,
+            "plazas_disponibles": s.plazas_disponibles,
+        }
+        for s in real
+        if not only_available or s.plazas_disponibles > 0
+    ]
+    for t in _listing_templates(db, instalacion_id):
+        if (t.hora_inicio, t.hora_fin) in taken or not template_applies(t, fecha):
+            continue
+        taken.add((t.hora_inicio, t.hora_fin))
+        out.append({
+            "id": None,
+            "plantilla_id": t.id,
+            "instalacion_id": instalacion_id,
+            "fecha": fecha,
+            "hora_inicio": t.hora_inicio,
+            "hora_fin": t.hora_fin,
+            "capacidad": t.capacidad,
+            "plazas_disponibles": t.capacidad,
+        })
+    out.sort(key=lambda s: (s["hora_inicio"], s["hora_fin"]))
+    return out
+
+
+def materialize_slot(db: Session, *, plantilla_id: int, instalacion_id: int, fecha: date) -> Slot:
+    """Devuelve la franja de la plantilla para esa fecha, creándola si es la primera reserva.
+
+    No hace commit: la fila se confirma con la reserva que la usa, o se deshace
+    con ella. Si dos peticiones la materializan a la vez, el INSERT que choca
+    con uq_slot no hace nada y ambas acaban usando la misma fila.
+    """
+    return _materialize(db, plantilla_id=plantilla_id, instalacion_id=instalacion_id, fecha=fecha)[0]
+
+
+def _materialize(db: Session, *, plantilla_id: int, instalacion_id: int, fecha: date) -> tuple[Slot, bool]:
+    """materialize_slot, indicando además si la fila la ha creado esta llamada."""
+    t = db.get(ScheduleTemplate, plantilla_id)
+    if not t or t.instalacion_id != instalacion_id or not template_applies(t, fecha):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Franja inexistente para esa instalación")
+
+    key = (Slot.instalacion_id == instalacion_id, Slot.fecha == fecha, Slot.hora_inicio == t.hora_inicio, Slot.hora_fin == t.hora_fin)
+    slot = db.scalars(select(Slot).where(*key)).first()
+    if slot:
+        return slot, False
+    created = _insert_ignoring_conflicts(db, [{
+        "instalacion_id": instalacion_id,
+        "fecha": fecha,
+        "hora_inicio": t.hora_inicio,
+        "hora_fin": t.hora_fin,
+        "capacidad": t.capacidad,
+        "plazas_disponibles": t.capacidad,
+    }])
+    mark_day_dirty(db, instalacion_id, fecha)
+    return db.scalars(select(Slot).where(*key)).one(), created == 1
@@ -0,0 +1,225 @@
+# app/utils/slot_cache.py
+"""
+Caché LRU de franjas por (instalacion_id, fecha, only_available).
+
+Guarda instantáneas inmutables (SlotSnapshot), nunca objetos ORM, así que se
+puede compartir entre sesiones. Cada escritura que toca plazas o franjas marca
+su día como sucio: se invalida en el momento y otra vez al hacer commit (evento
+after_commit). Para que una lectura que empezó antes de la escritura no vuelva
+a guardar datos viejos, `put` solo acepta el resultado si las generaciones no
+han cambiado desde `token`.
+
+Las mismas marcas suben las versiones de listing_versions, que dan el ETag de
+los listados.
+
+También guarda, por instalación, las plantillas de horario que usan los
+listados (get_templates/put_templates), con el mismo esquema: mark_facility_dirty
+las invalida y `templates_token` evita guardar una lectura ya superada.
+
+La caché es por proceso: con varios workers, el TTL acota cuánto puede tardar
+un worker en ver lo que ha escrito otro.
+"""
+import threading
+import time as _time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.listing_versions import listing_versions
+from app.utils.occupancy_index import occupancy_index
+
+
+@dataclass(frozen=True)
+class SlotSnapshot:
+    id: int
+    instalacion_id: int
+    fecha: date
+    hora_inicio: time
+    hora_fin: time
+    capacidad: int
+    plazas_disponibles: int
+
+
+Key = tuple[int, date, bool]
+Day = tuple[int, date]
+
+
+class SlotCache:
+    def __init__(self, *, max_entries: int | None = None, ttl_seconds: float | None = None):
+        self.max_entries = max_entries or settings.slot_cache_size
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.slot_cache_ttl_seconds
+        self._entries: "OrderedDict[Key, tuple[float, tuple[SlotSnapshot, ...]]]" = OrderedDict()
+        self._by_slot: dict[int, Day] = {}
+        self._day_slots: dict[Day, list[int]] = {}
+        self._day_gen: dict[Day, int] = {}
+        self._generation = 0
+        self._templates: dict[int, tuple[float, tuple]] = {}
+        self._facility_gen: dict[int, int] = {}
+        self._templates_epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Key) -> tuple[SlotSnapshot, ...] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def token(self, key: Key) -> tuple[int, int]:
+        """Generaciones vigentes al empezar a leer de la BD; se pasan luego a `put`."""
+        with self._lock:
+            return self._generation, self._day_gen.get(key[:2], 0)
+
+    def put(self, key: Key, slots: tuple[SlotSnapshot, ...], token: tuple[int, int]) -> None:
+        with self._lock:
+            if token != (self._generation, self._day_gen.get(key[:2], 0)):
+                return
+            self._entries[key] = (_time.monotonic(), slots)
+            self._entries.move_to_end(key)
+            ids = [s.id for s in slots]
+            self._day_slots[key[:2]] = ids
+            for franja_id in ids:
+                self._by_slot[franja_id] = key[:2]
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget_day_if_unused(old_key[:2])
+                self.evictions += 1
+
+    def get_templates(self, instalacion_id: int) -> tuple | None:
+        with self._lock:
+            entry = self._templates.get(instalacion_id)
+            if entry is not None and _time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+            self._templates.pop(instalacion_id, None)
+            return None
+
+    def templates_token(self, instalacion_id: int) -> tuple[int, int]:
+        with self._lock:
+            return self._templates_epoch, self._facility_gen.get(instalacion_id, 0)
+
+    def put_templates(self, instalacion_id: int, templates: tuple, token: tuple[int, int]) -> None:
+        with self._lock:
+            if token != (self._templates_epoch, self._facility_gen.get(instalacion_id, 0)):
+                return
+            self._templates[instalacion_id] = (_time.monotonic(), templates)
+
+    def invalidate_day(self, instalacion_id: int, fecha: date) -> None:
+        day = (instalacion_id, fecha)
+        with self._lock:
+            self._invalidate_day(day)
+
+    def invalidate_slots(self, franja_ids) -> None:
+        with self._lock:
+            for franja_id in franja_ids:
+                day = self._by_slot.get(franja_id)
+                if day is not None:
+                    self._invalidate_day(day)
+                else:
+                    # Franja de un día no cacheado: puede haber una lectura en curso
+                    # que la incluya, así que se invalida cualquier put pendiente.
+                    self._generation += 1
+
+    def invalidate_facility(self, instalacion_id: int) -> None:
+        with self._lock:
+            for day in {key[:2] for key in self._entries if key[0] == instalacion_id}:
+                self._invalidate_day(day)
+            self._generation += 1
+            self._templates.pop(instalacion_id, None)
+            self._facility_gen[instalacion_id] = self._facility_gen.get(instalacion_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_slot.clear()
+            self._day_slots.clear()
+            self._day_gen.clear()
+            self._generation += 1
+            self._templates.clear()
+            self._templates_epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _invalidate_day(self, day: Day) -> None:
+        self._day_gen[day] = self._day_gen.get(day, 0) + 1
+        for only_available in (False, True):
+            self._entries.pop((*day, only_available), None)
+        self._forget_day_if_unused(day)
+        self.invalidations += 1
+
+    def _drop(self, key: Key) -> None:
+        del self._entries[key]
+        self._forget_day_if_unused(key[:2])
+
+    def _forget_day_if_unused(self, day: Day) -> None:
+        if (*day, False) in self._entries or (*day, True) in self._entries:
+            return
+        for franja_id in self._day_slots.pop(day, ()):
+            self._by_slot.pop(franja_id, None)
+
+
+slot_cache = SlotCache()
+
+_DIRTY = "slot_cache_dirty"
+
+
+def mark_slots_dirty(db: Session, franja_ids) -> None:
+    """Invalida las franjas ya y de nuevo cuando la sesión haga commit."""
+    franja_ids = list(franja_ids)
+    slot_cache.invalidate_slots(franja_ids)
+    listing_versions.bump_slots(franja_ids)
+    db.info.setdefault(_DIRTY, []).append(("slots", franja_ids))
+
+
+def mark_day_dirty(db: Session, instalacion_id: int, fecha: date) -> None:
+    slot_cache.invalidate_day(instalacion_id, fecha)
+    listing_versions.bump_day(instalacion_id, fecha)
+    occupancy_index.drop(instalacion_id)
+    db.info.setdefault(_DIRTY, []).append(("day", (instalacion_id, fecha)))
+
+
+def mark_facility_dirty(db: Session, instalacion_id: int) -> None:
+    """Cambios en la instalación o en sus plantillas: afectan a todos sus días."""
+    slot_cache.invalidate_facility(instalacion_id)
+    listing_versions.bump_facility(instalacion_id)
+    occupancy_index.drop(instalacion_id)
+    db.info.setdefault(_DIRTY, []).append(("facility", instalacion_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for kind, value in session.info.pop(_DIRTY, ()):
+        if kind == "slots":
+            slot_cache.invalidate_slots(value)
+            listing_versions.bump_slots(value)
+        elif kind == "day":
+            slot_cache.invalidate_day(*value)
+            listing_versions.bump_day(*value)
+            occupancy_index.drop(value[0])
+        else:
+            slot_cache.invalidate_facility(value)
+            listing_versions.bump_facility(value)
+            occupancy_index.drop(value)
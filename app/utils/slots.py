@@ -1,8 +1,20 @@
+from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert, delete
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from datetime import date
+from app.utils.facility_catalog import facility_catalog
+from app.models.reservation import Reservation
+from app.models.seat_hold import SeatHold
 from app.models.slot import Slot
+from app.core.config import settings
+from app.utils.listing_versions import listing_versions
+from app.utils.occupancy_stats import refresh_days
+from app.utils.slot_cache import SlotSnapshot, mark_day_dirty, slot_cache
+
+# Filas por INSERT multi-fila (7 columnas → muy por debajo del límite de parámetros de SQLite)
+BULK_CHUNK_SIZE = 500
 
 def create_slot(db: Session, *, instalacion_id: int, fecha, hora_inicio, hora_fin, capacidad: int, plazas_disponibles: int | None = None) -> Slot:
     slot = Slot(
@@ -14,6 +26,7 @@ def create_slot(db: Session, *, instalacion_id: int, fecha, hora_inicio, hora_fi
         plazas_disponibles=plazas_disponibles if plazas_disponibles is not None else capacidad,
     )
     db.add(slot)
+    mark_day_dirty(db, instalacion_id, fecha)
     try:
         db.commit()
     except IntegrityError as e:
@@ -22,14 +35,85 @@ def create_slot(db: Session, *, instalacion_id: int, fecha, hora_inicio, hora_fi
     db.refresh(slot)
     return slot
 
-def list_slots_for_facility_date(db: Session, *, instalacion_id: int, fecha: date, only_available: bool = False) -> list[Slot]:
-    stmt = select(Slot).where(and_(Slot.instalacion_id == instalacion_id, Slot.fecha == fecha))
+def _insert_ignoring_conflicts(db: Session, rows: list[dict]) -> int:
+    """INSERT multi-fila que omite las filas que chocan con uq_slot. Devuelve cuántas se insertan."""
+    dialect = db.get_bind().dialect.name
+    created = 0
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            stmt = dialect_insert(Slot).values(rows[start:start + BULK_CHUNK_SIZE]).on_conflict_do_nothing()
+            created += db.execute(stmt).rowcount
+    else:
+        # Sin ON CONFLICT: fila a fila dentro de un SAVEPOINT
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(Slot).values(row))
+                created += 1
+            except IntegrityError:
+                pass
+    if created:
+        refresh_days(db, {(row["instalacion_id"], row["fecha"]) for row in rows})
+    return created
+
+def create_slots_bulk(db: Session, items: list[dict]) -> tuple[int, int]:
+    """Inserta muchas franjas saltándose las que ya existen (uq_slot).
+
+    Devuelve (creadas, omitidas). Todo va en una única transacción.
+    """
+    missing = sorted(facility_catalog.missing(db, {it["instalacion_id"] for it in items}))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Instalaciones no encontradas: {', '.join(map(str, missing))}",
+        )
+
+    rows = [
+        {
+            "instalacion_id": it["instalacion_id"],
+            "fecha": it["fecha"],
+            "hora_inicio": it["hora_inicio"],
+            "hora_fin": it["hora_fin"],
+            "capacidad": it["capacidad"],
+            "plazas_disponibles": it["plazas_disponibles"] if it.get("plazas_disponibles") is not None else it["capacidad"],
+        }
+        for it in items
+    ]
+
+    created = _insert_ignoring_conflicts(db, rows)
+    for instalacion_id, fecha in {(r["instalacion_id"], r["fecha"]) for r in rows}:
+        mark_day_dirty(db, instalacion_id, fecha)
+    db.commit()
+    return created, len(rows) - created
+
+def list_slots_for_facility_date(db: Session, *, instalacion_id: int, fecha: date, only_available: bool = False) -> list[SlotSnapshot]:
+    key = (instalacion_id, fecha, only_available)
+    if settings.slot_cache_enabled:
+        cached = slot_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        token = slot_cache.token(key)
+
+    stmt = select(
+        Slot.id, Slot.instalacion_id, Slot.fecha, Slot.hora_inicio, Slot.hora_fin, Slot.capacidad, Slot.plazas_disponibles
+    ).where(and_(Slot.instalacion_id == instalacion_id, Slot.fecha == fecha))
     if only_available:
         stmt = stmt.where(Slot.plazas_disponibles > 0)
-    return list(db.scalars(stmt).all())
+    slots = tuple(SlotSnapshot(*row) for row in db.execute(stmt).all())
+    listing_versions.remember_slots(instalacion_id, fecha, [s.id for s in slots])
+    if settings.slot_cache_enabled:
+        slot_cache.put(key, slots, token)
+    return list(slots)
 
 def delete_slot(db: Session, slot: Slot) -> None:
-    db.delete(slot)
+    # Reservas y retenciones con un DELETE cada una, sin cargarlas
+    mark_day_dirty(db, slot.instalacion_id, slot.fecha)
+    for model in (Reservation, SeatHold):
+        db.execute(delete(model).where(model.franja_id == slot.id).execution_options(synchronize_session=False))
+    db.execute(delete(Slot).where(Slot.id == slot.id).execution_options(synchronize_session=False))
+    refresh_days(db, {(slot.instalacion_id, slot.fecha)})
+    db.expunge(slot)
     db.commit()
 
 def get_slot(db: Session, slot_id: int) -> Slot | None:
@@ -0,0 +1,118 @@
+# app/utils/user_cache.py
+"""
+Caché LRU con TTL de los usuarios autenticados, por uid.
+
+get_current_user la consulta antes de ir a la BD: con acierto no se llega a
+pedir conexión (la sesión de get_db es perezosa). Guarda instantáneas
+inmutables (CachedUser), no objetos ORM. set_role y set_active invalidan la
+entrada en el momento y otra vez al hacer commit; una lectura que empezó antes
+de la invalidación no se guarda (`token` / `put`, como en slot_cache).
+
+Es por proceso: con varios workers, el TTL acota cuánto tarda un cambio de rol
+o de estado hecho en otro worker en verse aquí.
+"""
+import threading
+import time as _time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    nombre: str
+    email: str
+    rol: UserRole
+    activo: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, nombre=user.nombre, email=user.email, rol=user.rol, activo=user.activo)
+
+
+class UserCache:
+    def __init__(self, *, max_entries: int | None = None, ttl_seconds: float | None = None):
+        self.max_entries = max_entries or settings.user_cache_size
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.user_cache_ttl_seconds
+        self._entries: "OrderedDict[int, tuple[float, CachedUser]]" = OrderedDict()
+        self._gen: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, uid: int) -> CachedUser | None:
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None and _time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(uid)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[uid]
+            self.misses += 1
+            return None
+
+    def token(self, uid: int) -> int:
+        with self._lock:
+            return self._gen.get(uid, 0)
+
+    def put(self, user: CachedUser, token: int) -> None:
+        with self._lock:
+            if token != self._gen.get(user.id, 0):
+                return
+            self._entries[user.id] = (_time.monotonic(), user)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, uid: int) -> None:
+        with self._lock:
+            self._entries.pop(uid, None)
+            self._gen[uid] = self._gen.get(uid, 0) + 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._gen.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserCache()
+
+_DIRTY = "user_cache_dirty"
+
+
+def mark_user_dirty(db: Session, uid: int) -> None:
+    """Invalida el usuario ya y de nuevo cuando la sesión haga commit."""
+    user_cache.invalidate(uid)
+    db.info.setdefault(_DIRTY, set()).add(uid)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for uid in session.info.pop(_DIRTY, ()):
+        user_cache.invalidate(uid)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY, None)
@@ -0,0 +1,167 @@
+# app/utils/user_import.py
+"""
+Alta masiva de socios desde CSV o NDJSON.
+
+Cada fila lleva nombre, email, password y opcionalmente rol. En la petición se
+lee y valida el fichero con el mismo esquema que /auth/register y se buscan los
+emails ya registrados, con una consulta por bloque de IMPORT_CHUNK_SIZE. El
+resto va en un trabajo de job_registry: por cada bloque se hashean las
+contraseñas en el pool de procesos (password_pool.hash_many, sin acaparar todos
+los procesos) y se insertan con un INSERT multi-fila y un commit. El informe
+con los errores fila a fila queda en el `resultado` del trabajo.
+"""
+import asyncio
+import csv
+import io
+import json
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.password_pool import password_pool
+from app.models.user import User, UserRole
+from app.schemas.user import UserImportOut, UserRegister
+from app.utils.jobs import Job
+
+# Filas por consulta de emails y por INSERT multi-fila
+IMPORT_CHUNK_SIZE = 500
+
+FORMATS = ("csv", "ndjson")
+
+
+def _parse(raw: bytes, fmt: str) -> list[tuple[int, dict | None, str | None]]:
+    """(fila, datos, error) por cada línea con contenido; la fila es la línea del fichero."""
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="El fichero debe estar en UTF-8")
+
+    rows = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"nombre", "email", "password"} - set(reader.fieldnames or ())
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Faltan columnas en la cabecera: {', '.join(sorted(missing))}",
+            )
+        for record in reader:
+            rows.append((reader.line_num, {k: (v or "").strip() for k, v in record.items() if k}, None))
+    else:
+        for line_num, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                rows.append((line_num, None, "JSON inválido"))
+                continue
+            if not isinstance(data, dict):
+                rows.append((line_num, None, "Cada línea debe ser un objeto JSON"))
+                continue
+            rows.append((line_num, data, None))
+    return rows
+
+
+def _validate(rows: list[tuple[int, dict | None, str | None]]) -> tuple[list[dict], list[dict]]:
+    valid, errors, seen = [], [], set()
+    for fila, data, error in rows:
+        email = data.get("email") if data else None
+        if error:
+            errors.append({"fila": fila, "email": email, "error": error})
+            continue
+        try:
+            member = UserRegister(nombre=data.get("nombre"), email=email, password=data.get("password"))
+            rol = UserRole(data.get("rol") or UserRole.cliente.value)
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append({"fila": fila, "email": email, "error": detail})
+            continue
+        except ValueError:
+            errors.append({"fila": fila, "email": email, "error": "Rol inválido"})
+            continue
+        if member.email in seen:
+            errors.append({"fila": fila, "email": member.email, "error": "Email repetido en el fichero"})
+            continue
+        seen.add(member.email)
+        valid.append({"fila": fila, "nombre": member.nombre, "email": member.email, "password": member.password, "rol": rol})
+    return valid, errors
+
+
+def prepare_import(db: Session, raw: bytes, fmt: str) -> tuple[list[dict], list[dict], int]:
+    """Lee y valida el fichero y descarta los emails ya registrados.
+
+    Devuelve (filas a insertar, errores, total de filas leídas).
+    """
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Formato no soportado; usa {' o '.join(FORMATS)}")
+    rows = _parse(raw, fmt)
+    if len(rows) > settings.user_import_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Como mucho {settings.user_import_max_rows} filas por importación",
+        )
+    valid, errors = _validate(rows)
+
+    existing = set()
+    for start in range(0, len(valid), IMPORT_CHUNK_SIZE):
+        emails = [m["email"] for m in valid[start:start + IMPORT_CHUNK_SIZE]]
+        existing.update(db.scalars(select(User.email).where(User.email.in_(emails))))
+    # La conexión de la petición no se necesita más: el alta sigue en el trabajo
+    db.rollback()
+
+    pending = []
+    for m in valid:
+        if m["email"] in existing:
+            errors.append({"fila": m["fila"], "email": m["email"], "error": "Email ya registrado"})
+        else:
+            pending.append(m)
+    return pending, errors, len(rows)
+
+
+def _insert_chunk(db: Session, rows: list[dict]) -> set[str]:
+    """Inserta un bloque omitiendo emails que ya existan; devuelve los emails insertados."""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(User).values(rows).on_conflict_do_nothing(index_elements=[User.email]).returning(User.email)
+        return set(db.scalars(stmt))
+    # Sin ON CONFLICT: fila a fila dentro de un SAVEPOINT
+    inserted = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(User).values(row))
+            inserted.add(row["email"])
+        except IntegrityError:
+            pass
+    return inserted
+
+
+def run_import(db: Session, job: Job, pending: list[dict], errors: list[dict], total: int) -> None:
+    """Cuerpo del trabajo: hashea e inserta por bloques; deja el informe en job.resultado."""
+    job.total = len(pending)
+    created = 0
+    for start in range(0, len(pending), IMPORT_CHUNK_SIZE):
+        chunk = pending[start:start + IMPORT_CHUNK_SIZE]
+        hashes = asyncio.run(password_pool.hash_many([m["password"] for m in chunk]))
+        rows = [
+            {"nombre": m["nombre"], "email": m["email"], "hashed_password": h, "rol": m["rol"], "activo": True}
+            for m, h in zip(chunk, hashes)
+        ]
+        inserted = _insert_chunk(db, rows)
+        db.commit()
+        created += len(inserted)
+        # Registrados por otra petición entre la comprobación y el INSERT
+        errors.extend(
+            {"fila": m["fila"], "email": m["email"], "error": "Email ya registrado"}
+            for m in chunk if m["email"] not in inserted
+        )
+        job.advance(len(chunk))
+    errors.sort(key=lambda e: e["fila"])
+    job.resultado = UserImportOut(total=total, creados=created, errores=errors).model_dump()
@@ -1,3 +1,4 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models.user import User, UserRole
 from app.core.security import hash_password
@@ -5,9 +6,26 @@ from app.core.security import hash_password
 def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, nombre: str, email: str, password: str, rol: UserRole = UserRole.cliente) -> User:
-    user = User(nombre=nombre, email=email, hashed_password=hash_password(password), rol=rol)
+def create_user(
+    db: Session,
+    nombre: str,
+    email: str,
+    password: str | None = None,
+    rol: UserRole = UserRole.cliente,
+    *,
+    hashed_password: str | None = None,
+) -> User:
+    # hashed_password: hash ya calculado fuera (p. ej. en el pool de procesos)
+    user = User(nombre=nombre, email=email, hashed_password=hashed_password or hash_password(password), rol=rol)
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
+
+def update_password_hash(db: Session, uid: int, old_hash: str, new_hash: str) -> bool:
+    """Sustituye el hash solo si sigue siendo `old_hash` (no pisa un cambio de contraseña)."""
+    updated = db.execute(
+        update(User).where(User.id == uid, User.hashed_password == old_hash).values(hashed_password=new_hash)
+    ).rowcount
+    db.commit()
+    return updated == 1
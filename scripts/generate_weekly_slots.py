@@ -25,6 +25,9 @@ DEFAULT_TIME_SLOTS = [
 
 DEFAULT_CAPACITY = 20
 
+# Franjas por petición a POST /slots/bulk
+BULK_SIZE = 1000
+
 
 def login(email: str, password: str) -> str:
     response = requests.post(
@@ -55,34 +58,21 @@ def get_facilities(token: str) -> List[dict]:
     return response.json()
 
 
-def create_slot(
-    token: str,
-    instalacion_id: int,
-    fecha: date,
-    hora_inicio: time,
-    hora_fin: time,
-    capacidad: int = DEFAULT_CAPACITY
-) -> dict | None:
-    response = requests.post(
-        f"{API_URL}/slots",
-        json={
-            "instalacion_id": instalacion_id,
-            "fecha": fecha.isoformat(),
-            "hora_inicio": hora_inicio.strftime("%H:%M:%S"),
-            "hora_fin": hora_fin.strftime("%H:%M:%S"),
-            "capacidad": capacidad,
-            "plazas_disponibles": capacidad
-        },
-        headers={"Authorization": f"Bearer {token}"}
-    )
-    
-    if response.status_code == 201:
-        return response.json()
-    elif response.status_code == 409:
-        return None
-    else:
-        print(f"  [WARN] Error al crear slot {hora_inicio}-{hora_fin}: {response.text}")
-        return None
+def create_slots_bulk(token: str, slots: List[dict]) -> Tuple[int, int]:
+    created = 0
+    skipped = 0
+    for start in range(0, len(slots), BULK_SIZE):
+        response = requests.post(
+            f"{API_URL}/slots/bulk",
+            json={"items": slots[start:start + BULK_SIZE]},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error al crear slots: {response.text}")
+        data = response.json()
+        created += data["creadas"]
+        skipped += data["omitidas"]
+    return created, skipped
 
 
 def generate_weekly_slots(
@@ -94,8 +84,7 @@ def generate_weekly_slots(
     time_slots: List[Tuple[time, time]],
     capacity: int = DEFAULT_CAPACITY
 ) -> Tuple[int, int]:
-    created = 0
-    skipped = 0
+    slots: List[dict] = []
     
     print(f"\n[INFO] Generando slots para: {facility_name} (ID: {facility_id})")
     print(f"   Periodo: {start_date} a {start_date + timedelta(days=days-1)}")
@@ -105,19 +94,16 @@ def generate_weekly_slots(
         current_date = start_date + timedelta(days=day_offset)
         
         for hora_inicio, hora_fin in time_slots:
-            result = create_slot(
-                token,
-                facility_id,
-                current_date,
-                hora_inicio,
-                hora_fin,
-                capacity
-            )
-            
-            if result:
-                created += 1
-            else:
-                skipped += 1
+            slots.append({
+                "instalacion_id": facility_id,
+                "fecha": current_date.isoformat(),
+                "hora_inicio": hora_inicio.strftime("%H:%M:%S"),
+                "hora_fin": hora_fin.strftime("%H:%M:%S"),
+                "capacidad": capacity,
+                "plazas_disponibles": capacity
+            })
+    
+    created, skipped = create_slots_bulk(token, slots)
     
     print(f"   [OK] Creados: {created}, [SKIP] Omitidos (ya existian): {skipped}")
     return created, skipped
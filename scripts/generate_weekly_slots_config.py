@@ -29,6 +29,9 @@ DEFAULT_CONFIG = {
     "facility_overrides": {}
 }
 
+# Franjas por petición a POST /slots/bulk
+BULK_SIZE = 1000
+
 
 def parse_time(time_str: str) -> time:
     parts = time_str.split(":")
@@ -64,33 +67,21 @@ def get_facilities(token: str) -> List[dict]:
     return response.json()
 
 
-def create_slot(
-    token: str,
-    instalacion_id: int,
-    fecha: date,
-    hora_inicio: time,
-    hora_fin: time,
-    capacidad: int
-) -> dict | None:
-    response = requests.post(
-        f"{API_URL}/slots",
-        json={
-            "instalacion_id": instalacion_id,
-            "fecha": fecha.isoformat(),
-            "hora_inicio": hora_inicio.strftime("%H:%M:%S"),
-            "hora_fin": hora_fin.strftime("%H:%M:%S"),
-            "capacidad": capacidad,
-            "plazas_disponibles": capacidad
-        },
-        headers={"Authorization": f"Bearer {token}"}
-    )
-    
-    if response.status_code == 201:
-        return response.json()
-    elif response.status_code == 409:
-        return None
-    else:
-        return None
+def create_slots_bulk(token: str, slots: List[dict]) -> Tuple[int, int]:
+    created = 0
+    skipped = 0
+    for start in range(0, len(slots), BULK_SIZE):
+        response = requests.post(
+            f"{API_URL}/slots/bulk",
+            json={"items": slots[start:start + BULK_SIZE]},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error al crear slots: {response.text}")
+        data = response.json()
+        created += data["creadas"]
+        skipped += data["omitidas"]
+    return created, skipped
 
 
 def get_time_slots_for_facility(
@@ -125,8 +116,7 @@ def generate_slots(
     days: int,
     config: dict
 ) -> Tuple[int, int]:
-    created = 0
-    skipped = 0
+    slots: List[dict] = []
     
     capacity = config.get("facility_overrides", {}).get(facility_id, {}).get("capacity") or config.get("capacity", 20)
     time_slots = get_time_slots_for_facility(facility_id, config, DEFAULT_CONFIG["time_slots"])
@@ -143,19 +133,16 @@ def generate_slots(
             continue
         
         for hora_inicio, hora_fin in time_slots:
-            result = create_slot(
-                token,
-                facility_id,
-                current_date,
-                hora_inicio,
-                hora_fin,
-                capacity
-            )
-            
-            if result:
-                created += 1
-            else:
-                skipped += 1
+            slots.append({
+                "instalacion_id": facility_id,
+                "fecha": current_date.isoformat(),
+                "hora_inicio": hora_inicio.strftime("%H:%M:%S"),
+                "hora_fin": hora_fin.strftime("%H:%M:%S"),
+                "capacidad": capacity,
+                "plazas_disponibles": capacity
+            })
+    
+    created, skipped = create_slots_bulk(token, slots)
     
     print(f"   [OK] Creados: {created}, [SKIP] Omitidos: {skipped}")
     return created, skipped
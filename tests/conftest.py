@@ -4,27 +4,66 @@ Configuración global de pytest con fixtures compartidas
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 from datetime import date, time, datetime, timedelta
 from faker import Faker
 
 from app.db.base_class import Base
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, use_explicit_sqlite_transactions
 from app.main import app
 from app.models.user import User, UserRole
 from app.models.facility import Facility
 from app.models.slot import Slot
 from app.models.reservation import Reservation
 from app.core.security import hash_password
+from app.core.config import settings
 
 fake = Faker()
 
+# Los hilos en segundo plano usan SessionLocal (la BD real); en tests se prueban a mano
+settings.hold_sweeper_enabled = False
+settings.facility_catalog_preload = False
+# Hash de contraseñas en el threadpool; el pool de procesos se prueba aparte
+settings.password_pool_enabled = False
+# Sin calibrar al arrancar: rondas por defecto de passlib
+settings.password_hash_calibrate = False
+settings.token_revocation_sync_enabled = False
+
 # Base de datos en memoria para tests
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-test_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# StaticPool: una única conexión compartida, para que los endpoints (que corren en
+# el threadpool) vean la misma base de datos en memoria que los fixtures
+test_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    """Vacía cachés y almacenes en memoria del proceso entre tests"""
+    from app.utils.idempotency import idempotency_store
+    from app.utils.holds import hold_sweeper
+    from app.utils.slot_cache import slot_cache
+    from app.utils.listing_versions import listing_versions
+    from app.utils.occupancy_index import occupancy_index
+    from app.utils.jobs import job_registry
+    from app.utils.facility_catalog import facility_catalog
+    from app.utils.user_cache import user_cache
+    from app.core.token_cache import token_cache
+    from app.utils.auth_tokens import revocation_list
+    idempotency_store.clear()
+    hold_sweeper.clear()
+    slot_cache.clear()
+    listing_versions.clear()
+    occupancy_index.clear()
+    job_registry.clear()
+    facility_catalog.clear()
+    user_cache.clear()
+    token_cache.clear()
+    revocation_list.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Crea una sesión de base de datos para cada test"""
@@ -40,6 +79,17 @@ def db_session():
         Base.metadata.drop_all(bind=test_engine)
 
 
+@pytest.fixture(scope="function")
+def file_session_factory(tmp_path):
+    """Sesiones sobre un SQLite en fichero, para tests que usan varios hilos"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    use_explicit_sqlite_transactions(engine)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    yield factory
+    engine.dispose()
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Cliente de test para FastAPI"""
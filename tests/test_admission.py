@@ -0,0 +1,86 @@
+"""
+Tests para el control de admisión de las rutas de escritura
+"""
+import asyncio
+
+from app.core.admission import AdmissionController, admission_controller
+
+
+class TestAdmissionController:
+    """Tests para el limitador de concurrencia con cola acotada"""
+
+    def test_waiter_gets_slot_on_release(self):
+        """Test que una petición en cola entra cuando otra termina"""
+        async def scenario():
+            ctl = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=1, retry_after=1)
+            assert await ctl.acquire() is True
+            waiter = asyncio.create_task(ctl.acquire())
+            await asyncio.sleep(0)
+            assert ctl.stats()["queue_depth"] == 1
+            ctl.release()
+            assert await waiter is True
+            assert ctl.in_flight == 1
+            ctl.release()
+            return ctl.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["in_flight"] == 0
+        assert stats["admitted"] == 2
+
+    def test_rejects_when_queue_full(self):
+        """Test que se rechaza sin esperar si la cola está llena"""
+        async def scenario():
+            ctl = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1, retry_after=1)
+            assert await ctl.acquire() is True
+            assert await ctl.acquire() is False
+            return ctl.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["rejected_queue_full"] == 1
+        assert stats["queue_depth"] == 0
+
+    def test_rejects_after_queue_timeout(self):
+        """Test que se rechaza si la espera en cola supera el timeout"""
+        async def scenario():
+            ctl = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=0.01, retry_after=1)
+            assert await ctl.acquire() is True
+            assert await ctl.acquire() is False
+            ctl.release()
+            return ctl.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["rejected_timeout"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+
+
+class TestAdmissionMiddleware:
+    """Tests para el middleware sobre la aplicación"""
+
+    def test_saturated_write_gets_503(self, client, auth_headers, sample_facility, sample_slot, monkeypatch):
+        """Test que una escritura con el servicio saturado recibe 503 con Retry-After"""
+        monkeypatch.setattr(admission_controller, "in_flight", admission_controller.max_concurrency)
+        monkeypatch.setattr(admission_controller, "max_queue", 0)
+        monkeypatch.setattr(admission_controller, "retry_after", 3)
+
+        response = client.post(
+            "/reservations",
+            json={"instalacion_id": sample_facility.id, "franja_id": sample_slot.id},
+            headers={**auth_headers, "Origin": "http://localhost:5173"},
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        # El 503 sale por dentro de CORS: el navegador puede leerlo
+        assert "access-control-allow-origin" in response.headers
+
+        # Lecturas y /health no pasan por el limitador
+        assert client.get("/health").status_code == 200
+        assert client.get("/reservations/my", headers=auth_headers).status_code == 200
+
+    def test_metrics_exposed_to_admin(self, client, admin_headers, auth_headers):
+        """Test que los contadores se exponen solo a administradores"""
+        response = client.get("/admin/metrics", headers=admin_headers)
+        assert response.status_code == 200
+        assert "queue_depth" in response.json()["admission"]
+
+        assert client.get("/admin/metrics", headers=auth_headers).status_code == 403
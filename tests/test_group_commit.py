@@ -0,0 +1,133 @@
+"""
+Tests unitarios para el group commit de reservas
+"""
+import threading
+import pytest
+from datetime import date, time, timedelta
+from fastapi import HTTPException
+from sqlalchemy import event, select
+
+from app.db.group_commit import GroupCommitter
+from app.models.user import User, UserRole
+from app.models.facility import Facility
+from app.models.slot import Slot
+from app.models.reservation import Reservation
+from app.utils.reservations import _book, _cancel
+
+
+def _seed(factory, n_users: int, capacidad: int):
+    db = factory()
+    fac = Facility(nombre="Pista 1", tipo="Tenis", activo=True)
+    db.add(fac)
+    db.flush()
+    slot = Slot(
+        instalacion_id=fac.id,
+        fecha=date.today() + timedelta(days=1),
+        hora_inicio=time(9, 0),
+        hora_fin=time(10, 0),
+        capacidad=capacidad,
+        plazas_disponibles=capacidad,
+    )
+    users = [
+        User(nombre=f"User {i}", email=f"gc{i}@example.com", hashed_password="x", rol=UserRole.cliente)
+        for i in range(n_users)
+    ]
+    db.add(slot)
+    db.add_all(users)
+    db.commit()
+    ids = (fac.id, slot.id, [u.id for u in users])
+    db.close()
+    return ids
+
+
+class TestGroupCommitter:
+    """Tests para el committer por lotes"""
+
+    def test_concurrent_operations_share_commits(self, file_session_factory):
+        """Test que operaciones concurrentes se agrupan y cada una recibe su resultado"""
+        fac_id, slot_id, user_ids = _seed(file_session_factory, 12, 8)
+        committer = GroupCommitter(file_session_factory, window_ms=50, max_batch=64)
+        ok: list[int] = []
+        conflicts: list[int] = []
+        lock = threading.Lock()
+
+        def book(uid):
+            try:
+                res_id = committer.submit(
+                    lambda s: _book(s, user_id=uid, instalacion_id=fac_id, franja_id=slot_id).id, timeout=10
+                )
+                with lock:
+                    ok.append(res_id)
+            except HTTPException as e:
+                with lock:
+                    conflicts.append(e.status_code)
+
+        threads = [threading.Thread(target=book, args=(uid,)) for uid in user_ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(ok) == 8
+        assert conflicts == [409] * 4
+        stats = committer.stats()
+        assert stats["operations"] == 12
+        assert stats["commits"] < 12
+
+        db = file_session_factory()
+        assert db.get(Slot, slot_id).plazas_disponibles == 0
+        assert sorted(db.scalars(select(Reservation.id)).all()) == sorted(ok)
+        db.close()
+
+    def test_failed_operation_does_not_undo_others(self, file_session_factory):
+        """Test que un fallo en el lote solo deshace su propia operación"""
+        fac_id, slot_id, (u1, u2) = _seed(file_session_factory, 2, 2)
+        committer = GroupCommitter(file_session_factory, window_ms=0)
+
+        res_id = committer.submit(lambda s: _book(s, user_id=u1, instalacion_id=fac_id, franja_id=slot_id).id)
+        with pytest.raises(HTTPException) as exc_info:
+            committer.submit(lambda s: _book(s, user_id=u1, instalacion_id=fac_id, franja_id=slot_id).id)
+        assert exc_info.value.status_code == 409
+
+        committer.submit(lambda s: _cancel(s, res_id=res_id))
+        committer.submit(lambda s: _book(s, user_id=u2, instalacion_id=fac_id, franja_id=slot_id).id)
+
+        db = file_session_factory()
+        assert db.scalars(select(Reservation.usuario_id)).all() == [u2]
+        assert db.get(Slot, slot_id).plazas_disponibles == 1
+        db.close()
+
+    def test_batch_runs_in_a_single_transaction(self, file_session_factory):
+        """Test que cada lote abre una sola transacción y sus SAVEPOINT van dentro de ella"""
+        fac_id, slot_id, user_ids = _seed(file_session_factory, 6, 6)
+        engine = file_session_factory.kw["bind"]
+        trace = {"begin": 0, "commit": 0, "savepoint_outside_tx": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _trace(conn, cursor, statement, parameters, context, executemany):
+            if statement == "BEGIN":
+                trace["begin"] += 1
+            elif statement.startswith("SAVEPOINT") and not conn.connection.dbapi_connection.in_transaction:
+                trace["savepoint_outside_tx"] += 1
+
+        @event.listens_for(engine, "commit")
+        def _count_commit(conn):
+            trace["commit"] += 1
+
+        committer = GroupCommitter(file_session_factory, window_ms=200, max_batch=64)
+        barrier = threading.Barrier(len(user_ids))
+
+        def book(uid):
+            barrier.wait()
+            committer.submit(lambda s: _book(s, user_id=uid, instalacion_id=fac_id, franja_id=slot_id).id, timeout=10)
+
+        threads = [threading.Thread(target=book, args=(uid,)) for uid in user_ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = committer.stats()
+        assert stats["operations"] == 6
+        assert trace["savepoint_outside_tx"] == 0
+        assert trace["begin"] == trace["commit"] == stats["commits"]
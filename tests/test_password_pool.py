@@ -0,0 +1,106 @@
+"""
+Tests para el pool de procesos de contraseñas
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.password_pool import PasswordPool
+from app.core.security import verify_password
+
+
+class TestPasswordPool:
+    """Tests para PasswordPool"""
+
+    def test_hash_and_verify_in_processes(self, monkeypatch):
+        """Test que el hash se calcula en otro proceso y se puede verificar"""
+        monkeypatch.setattr(settings, "password_pool_enabled", True)
+        pool = PasswordPool(workers=1, max_queue=4, retry_after=1)
+
+        async def scenario():
+            hashed = await pool.hash("secreta123")
+            return hashed, await pool.verify("secreta123", hashed), await pool.verify("otra", hashed)
+
+        try:
+            hashed, ok, wrong = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+
+        assert verify_password("secreta123", hashed)
+        assert ok is True
+        assert wrong is False
+        assert pool.stats()["completed"] == 3
+
+    def test_rejects_when_queue_full(self):
+        """Test que se responde 503 con Retry-After si la cola está llena"""
+        pool = PasswordPool(workers=1, max_queue=0, retry_after=2)
+        pool.pending = 1
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(pool.hash("secreta123"))
+
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "2"
+        assert pool.stats()["rejected"] == 1
+
+    def test_hash_many_small_batches_leave_a_worker_free(self, monkeypatch):
+        """Test que hash_many usa lotes pequeños, conserva el orden y deja siempre un proceso libre"""
+        import threading
+        import time
+        from app.core import password_pool as module
+
+        pool = PasswordPool(workers=3, max_queue=0, retry_after=1)
+        sizes, running, peak = [], [0], [0]
+        lock = threading.Lock()
+
+        def fake_batch(passwords):
+            with lock:
+                sizes.append(len(passwords))
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return [f"h:{p}" for p in passwords]
+
+        monkeypatch.setattr(module, "_hash_batch", fake_batch)
+        passwords = [f"p{i}" for i in range(100)]
+        # Cola ya llena de logins: la importación no se rechaza, solo se acota a sí misma
+        pool.pending = pool.workers
+
+        assert asyncio.run(pool.hash_many(passwords)) == [f"h:{p}" for p in passwords]
+        assert max(sizes) == module.HASH_BATCH_SIZE
+        assert peak[0] <= pool.workers - 1
+        assert pool.stats()["rejected"] == 0
+
+    def test_reconfigure_lets_queued_work_finish(self, monkeypatch):
+        """Test que cambiar las rondas no cancela los hashes que ya esperaban en el pool"""
+        monkeypatch.setattr(settings, "password_pool_enabled", True)
+        pool = PasswordPool(workers=1, max_queue=8, retry_after=1)
+
+        async def scenario():
+            queued = [asyncio.ensure_future(pool.hash(f"secreta{i}")) for i in range(3)]
+            await asyncio.sleep(0)
+            old = pool._executor
+            pool.reconfigure()
+            assert pool._executor is not old
+            return await asyncio.gather(*queued), await pool.hash("nueva123")
+
+        try:
+            queued, fresh = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+
+        assert all(verify_password(f"secreta{i}", h) for i, h in enumerate(queued))
+        assert verify_password("nueva123", fresh)
+
+    def test_login_and_register_use_pool(self, client):
+        """Test que registro y login siguen funcionando con las rutas asíncronas"""
+        data = {"nombre": "Nuevo", "email": "nuevo@example.com", "password": "password123"}
+        assert client.post("/auth/register", json=data).status_code == 201
+
+        response = client.post("/auth/login", data={"username": data["email"], "password": data["password"]})
+        assert response.status_code == 200
+        assert client.post("/auth/login", data={"username": data["email"], "password": "mala"}).status_code == 401
@@ -112,3 +112,109 @@ class TestAuthRouter:
         
         assert response.status_code == 403
 
+
+
+class TestRefreshTokens:
+    """Tests para tokens de refresco y revocación"""
+
+    def _login(self, client, sample_user):
+        response = client.post("/auth/login", data={"username": sample_user.email, "password": "password123"})
+        assert response.status_code == 200
+        return response.json()
+
+    def test_login_returns_refresh_token(self, client, sample_user):
+        """Test que el login devuelve también un token de refresco"""
+        tokens = self._login(client, sample_user)
+        assert tokens["refresh_token"]
+
+    def test_refresh_rotates_tokens(self, client, sample_user):
+        """Test que refrescar da tokens nuevos y el de refresco viejo ya no sirve"""
+        tokens = self._login(client, sample_user)
+
+        response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == 200
+        new = response.json()
+        assert new["refresh_token"] != tokens["refresh_token"]
+        me = client.get("/auth/me", headers={"Authorization": f"Bearer {new['access_token']}"})
+        assert me.status_code == 200
+
+        # Reutilizar el viejo revoca todo lo del usuario
+        assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        assert client.post("/auth/refresh", json={"refresh_token": new["refresh_token"]}).status_code == 401
+
+    def test_refresh_token_is_not_an_access_token(self, client, sample_user):
+        """Test que el token de refresco no autentica peticiones"""
+        tokens = self._login(client, sample_user)
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+        assert response.status_code == 401
+
+    def test_logout_revokes_refresh_token(self, client, sample_user):
+        """Test que tras logout el token de refresco deja de valer"""
+        tokens = self._login(client, sample_user)
+        assert client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 204
+        assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    def test_admin_revokes_user_tokens(self, client, admin_headers, sample_user):
+        """Test que revocar los tokens de un usuario invalida los de acceso sin ir a la BD"""
+        tokens = self._login(client, sample_user)
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert client.get("/auth/me", headers=headers).status_code == 200
+
+        assert client.post(f"/admin/users/{sample_user.id}/revoke-tokens", headers=admin_headers).status_code == 204
+
+        assert client.get("/auth/me", headers=headers).status_code == 401
+        assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    def test_login_right_after_revocation_is_valid(self, client, admin_headers, sample_user):
+        """Test que un token emitido justo después de revocar (mismo segundo) sigue valiendo"""
+        from datetime import datetime
+        from app.utils.auth_tokens import RevocationList, _ts
+
+        assert client.post(f"/admin/users/{sample_user.id}/revoke-tokens", headers=admin_headers).status_code == 204
+        tokens = self._login(client, sample_user)
+        assert client.get("/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code == 200
+
+        revocations = RevocationList()
+        until = _ts(datetime(2026, 10, 18, 12, 0, 0, 500000))
+        revocations.revoke_user(sample_user.id, until)
+        assert revocations.is_revoked({"uid": sample_user.id, "iat": until})
+        assert not revocations.is_revoked({"uid": sample_user.id, "iat": until + 0.1})
+
+    def test_revocation_list_rebuilt_from_db(self, db_session, client, admin_headers, sample_user):
+        """Test que la lista de revocación se reconstruye desde la BD"""
+        from app.utils.auth_tokens import RevocationList
+
+        tokens = self._login(client, sample_user)
+        client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+        client.post(f"/admin/users/{sample_user.id}/revoke-tokens", headers=admin_headers)
+
+        fresh = RevocationList()
+        fresh.load(db_session)
+        assert fresh.stats()["revoked_tokens"] >= 1
+        assert fresh.is_revoked({"uid": sample_user.id, "iat": 0})
+
+    def test_revocation_list_starts_without_tables(self, tmp_path):
+        """Test que la lista de revocación arranca aunque la BD aún no esté migrada"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from app.utils.auth_tokens import RevocationList
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+        revocations = RevocationList(sessionmaker(bind=engine))
+        revocations.start()
+        revocations.stop()
+        engine.dispose()
+        assert revocations.stats()["loads"] == 0
+
+    def test_prune_expired_refresh_tokens(self, db_session, client, sample_user):
+        """Test que se borran los tokens de refresco caducados y no los vigentes"""
+        from datetime import datetime, timedelta
+        from app.models.refresh_token import RefreshToken
+        from app.utils.auth_tokens import prune_refresh_tokens
+
+        self._login(client, sample_user)
+        db_session.add(RefreshToken(jti="caducado", usuario_id=sample_user.id, expira_en=datetime.utcnow() - timedelta(days=1)))
+        db_session.commit()
+
+        assert prune_refresh_tokens(db_session) == 1
+        assert db_session.query(RefreshToken).count() == 1
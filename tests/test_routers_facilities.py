@@ -107,3 +107,33 @@ class TestFacilitiesRouter:
         get_response = client.get(f"/facilities/{fac_id}")
         assert get_response.status_code == 404
 
+    def test_delete_facility_with_reservations(self, client, admin_headers, sample_facility, sample_reservation, db_session):
+        """Test que borrar una instalación con reservas también borra sus franjas y reservas"""
+        from app.models.reservation import Reservation
+        from app.models.slot import Slot
+        slot_id, res_id = sample_reservation.franja_id, sample_reservation.id
+
+        response = client.delete(f"/facilities/{sample_facility.id}", headers=admin_headers)
+
+        assert response.status_code == 204
+        db_session.expire_all()
+        assert db_session.get(Slot, slot_id) is None
+        assert db_session.get(Reservation, res_id) is None
+
+    def test_get_unknown_job(self, client, admin_headers):
+        """Test consultar un trabajo inexistente"""
+        response = client.get("/admin/jobs/no-existe", headers=admin_headers)
+
+        assert response.status_code == 404
+
+
+    def test_list_facilities_etag(self, client, admin_headers, sample_facility):
+        """Test que el listado de instalaciones responde 304 hasta que cambia alguna"""
+        etag = client.get("/facilities").headers["etag"]
+
+        assert client.get("/facilities", headers={"If-None-Match": etag}).status_code == 304
+
+        client.patch(f"/facilities/{sample_facility.id}", json={"nombre": "Pista renovada"}, headers=admin_headers)
+        response = client.get("/facilities", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[0]["nombre"] == "Pista renovada"
@@ -114,3 +114,226 @@ class TestReservationsRouter:
         
         assert response.status_code == 403
 
+
+    def test_create_reservations_batch(self, client, auth_headers, sample_facility, sample_slot):
+        """Test reservar varias franjas en una sola petición"""
+        response = client.post(
+            "/reservations/batch",
+            json={
+                "items": [
+                    {"instalacion_id": sample_facility.id, "franja_id": sample_slot.id},
+                    {"instalacion_id": sample_facility.id, "franja_id": 99999},
+                ]
+            },
+            headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["creadas"] == 1
+        assert [it["status_code"] for it in data["items"]] == [201, 404]
+        assert data["items"][0]["reserva"]["franja_id"] == sample_slot.id
+
+    def test_cancel_reservation_idempotency_key(self, client, auth_headers, sample_reservation):
+        """Test que reintentar una cancelación con la misma Idempotency-Key devuelve la respuesta guardada"""
+        headers = {**auth_headers, "Idempotency-Key": "cancel-1"}
+
+        first = client.delete(f"/reservations/{sample_reservation.id}", headers=headers)
+        retry = client.delete(f"/reservations/{sample_reservation.id}", headers=headers)
+        without_key = client.delete(f"/reservations/{sample_reservation.id}", headers=auth_headers)
+
+        assert first.status_code == 204
+        assert retry.status_code == 204
+        assert without_key.status_code == 404
+
+    def test_create_reservation_idempotency_key(self, client, auth_headers, sample_facility, sample_slot, db_session):
+        """Test que un reintento con la misma Idempotency-Key no vuelve a reservar"""
+        headers = {**auth_headers, "Idempotency-Key": "book-1"}
+        payload = {"instalacion_id": sample_facility.id, "franja_id": sample_slot.id}
+
+        first = client.post("/reservations", json=payload, headers=headers)
+        retry = client.post("/reservations", json=payload, headers=headers)
+        other = client.post("/reservations", json={**payload, "franja_id": 99999}, headers=headers)
+
+        assert first.status_code == 201
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+        assert other.status_code == 422
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == sample_slot.capacidad - 1
+
+    def test_idempotency_retry_while_in_flight_does_not_book_again(
+        self, client, auth_headers, sample_user, sample_facility, sample_slot, db_session, monkeypatch
+    ):
+        """Test que un reintento con la clave en curso espera la respuesta en lugar de volver a reservar"""
+        from app.core.config import settings
+        from app.utils.idempotency import idempotency_store, request_fingerprint
+
+        payload = {"instalacion_id": sample_facility.id, "franja_id": sample_slot.id}
+        headers = {**auth_headers, "Idempotency-Key": "book-2"}
+        huella = request_fingerprint("POST", "/reservations", payload)
+        # La petición original ha tomado la clave y sigue reservando
+        _, claim = idempotency_store.begin(db_session, sample_user.id, "book-2", huella)
+        monkeypatch.setattr(settings, "idempotency_wait_seconds", 0)
+
+        retry = client.post("/reservations", json=payload, headers=headers)
+        assert retry.status_code == 409
+        assert "Retry-After" in retry.headers
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == sample_slot.capacidad
+
+        # Responde la original: el reintento recibe su respuesta
+        idempotency_store.complete(db_session, claim, 201, {"id": 42})
+        db_session.commit()
+        retry = client.post("/reservations", json=payload, headers=headers)
+        assert retry.status_code == 201
+        assert retry.json() == {"id": 42}
+
+    def test_idempotency_response_commits_with_reservation(
+        self, client, auth_headers, sample_user, sample_facility, sample_slot, db_session, monkeypatch
+    ):
+        """Test que si no se puede guardar la respuesta tampoco se confirma la reserva, y la clave queda libre"""
+        from app.models.idempotency_key import IdempotencyKey
+        from app.utils.idempotency import idempotency_store
+
+        def broken(*args, **kwargs):
+            raise RuntimeError("caída antes del commit")
+
+        monkeypatch.setattr(idempotency_store, "complete", broken)
+        payload = {"instalacion_id": sample_facility.id, "franja_id": sample_slot.id}
+        with pytest.raises(RuntimeError):
+            client.post("/reservations", json=payload, headers={**auth_headers, "Idempotency-Key": "book-3"})
+
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == sample_slot.capacidad
+        assert db_session.query(IdempotencyKey).count() == 0
+        monkeypatch.undo()
+        response = client.post("/reservations", json=payload, headers={**auth_headers, "Idempotency-Key": "book-3"})
+        assert response.status_code == 201
+
+    def test_hold_and_confirm(self, client, auth_headers, sample_facility, sample_slot):
+        """Test retener una plaza y confirmarla como reserva"""
+        response = client.post(
+            "/holds",
+            json={"instalacion_id": sample_facility.id, "franja_id": sample_slot.id, "minutos": 5},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+        hold_id = response.json()["id"]
+
+        response = client.post(f"/holds/{hold_id}/confirm", headers=auth_headers)
+        assert response.status_code == 201
+        assert response.json()["franja_id"] == sample_slot.id
+
+    def test_create_reservation_from_template(self, client, auth_headers, admin_headers, sample_facility):
+        """Test reservar una franja virtual de una plantilla"""
+        fecha = date.today() + timedelta(days=3)
+        response = client.post(
+            "/schedule-templates",
+            json={
+                "instalacion_id": sample_facility.id,
+                "tramos": [{"hora_inicio": "18:00:00", "hora_fin": "19:00:00"}],
+                "dias_semana": [fecha.weekday()],
+                "capacidad": 3,
+            },
+            headers=admin_headers,
+        )
+        assert response.status_code == 201
+        plantilla_id = response.json()[0]["id"]
+
+        listed = client.get(f"/slots/by-facility/{sample_facility.id}", params={"fecha": fecha.isoformat()}).json()
+        assert listed == [{
+            "id": None,
+            "plantilla_id": plantilla_id,
+            "instalacion_id": sample_facility.id,
+            "fecha": fecha.isoformat(),
+            "hora_inicio": "18:00:00",
+            "hora_fin": "19:00:00",
+            "capacidad": 3,
+            "plazas_disponibles": 3,
+        }]
+
+        response = client.post(
+            "/reservations",
+            json={"instalacion_id": sample_facility.id, "plantilla_id": plantilla_id, "fecha": fecha.isoformat()},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        franja_id = response.json()["franja_id"]
+
+        listed = client.get(f"/slots/by-facility/{sample_facility.id}", params={"fecha": fecha.isoformat()}).json()
+        assert [(s["id"], s["plazas_disponibles"]) for s in listed] == [(franja_id, 2)]
+
+    def test_failed_template_booking_leaves_no_slot(self, client, auth_headers, sample_slot, sample_reservation, db_session):
+        """Test que si la reserva de una franja virtual falla no queda la franja creada"""
+        from app.models.facility import Facility
+        from app.models.slot import Slot
+        from app.utils.schedule_templates import create_templates
+
+        other = Facility(nombre="Otra", tipo="Test", aforo=4, activo=True)
+        db_session.add(other)
+        db_session.commit()
+        # Mismo horario que la reserva que ya tiene el usuario: solapa
+        (t,) = create_templates(
+            db_session, instalacion_id=other.id, tramos=[(sample_slot.hora_inicio, sample_slot.hora_fin)],
+            dias_semana=[sample_slot.fecha.weekday()], capacidad=4,
+        )
+
+        response = client.post(
+            "/reservations",
+            json={"instalacion_id": other.id, "plantilla_id": t.id, "fecha": sample_slot.fecha.isoformat()},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 409
+        assert db_session.query(Slot).filter(Slot.instalacion_id == other.id).count() == 0
+
+    def test_batch_reports_template_errors_per_item(self, client, auth_headers, sample_facility, sample_slot, db_session):
+        """Test que en un lote una plantilla inexistente solo falla su elemento y no deja franjas sueltas"""
+        from app.models.slot import Slot
+        from app.utils.schedule_templates import create_templates
+
+        fecha = sample_slot.fecha
+        (t,) = create_templates(
+            db_session, instalacion_id=sample_facility.id, tramos=[(time(10, 30), time(11, 30))],
+            dias_semana=[fecha.weekday()], capacidad=2,
+        )
+        response = client.post("/reservations/batch", json={"items": [
+            {"instalacion_id": sample_facility.id, "franja_id": sample_slot.id},
+            {"instalacion_id": sample_facility.id, "plantilla_id": 99999, "fecha": fecha.isoformat()},
+            # Solapa con el primer elemento: la franja virtual no debe quedarse creada
+            {"instalacion_id": sample_facility.id, "plantilla_id": t.id, "fecha": fecha.isoformat()},
+        ]}, headers=auth_headers)
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [it["status_code"] for it in items] == [201, 404, 409]
+        assert items[1]["plantilla_id"] == 99999 and items[1]["franja_id"] is None
+        assert items[2]["franja_id"] is None
+        assert db_session.query(Slot).filter(Slot.instalacion_id == sample_facility.id).count() == 1
+
+    def test_create_reservation_requires_slot_or_template(self, client, auth_headers, sample_facility):
+        """Test que sin franja_id hace falta plantilla_id y fecha"""
+        response = client.post("/reservations", json={"instalacion_id": sample_facility.id}, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_create_block_reservation(self, client, auth_headers, sample_facility, sample_slot, db_session):
+        """Test reservar dos franjas consecutivas en una petición"""
+        from app.models.slot import Slot
+        db_session.add(Slot(
+            instalacion_id=sample_facility.id,
+            fecha=sample_slot.fecha,
+            hora_inicio=time(11, 0),
+            hora_fin=time(12, 0),
+            capacidad=4,
+            plazas_disponibles=4,
+        ))
+        db_session.commit()
+
+        response = client.post(
+            "/reservations/block",
+            json={"instalacion_id": sample_facility.id, "fecha": sample_slot.fecha.isoformat(), "franjas": 2, "hora_inicio": "10:00:00"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        assert [r["hora_inicio"] for r in response.json()] == ["10:00:00", "11:00:00"]
@@ -132,3 +132,102 @@ class TestSlotsRouter:
         data = get_response.json()
         assert not any(s["id"] == slot_id for s in data)
 
+    def test_create_slots_bulk_admin(self, client, admin_headers, sample_facility):
+        """Test crear franjas en bloque como admin"""
+        test_date = (date.today() + timedelta(days=1)).isoformat()
+        items = [
+            {"instalacion_id": sample_facility.id, "fecha": test_date, "hora_inicio": f"{h:02d}:00:00", "hora_fin": f"{h + 1:02d}:00:00", "capacidad": 5}
+            for h in range(8, 12)
+        ]
+
+        response = client.post("/slots/bulk", json={"items": items}, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json() == {"creadas": 4, "omitidas": 0}
+
+        response = client.post("/slots/bulk", json={"items": items}, headers=admin_headers)
+        assert response.json() == {"creadas": 0, "omitidas": 4}
+
+    def test_create_slots_bulk_non_admin(self, client, auth_headers, sample_facility):
+        """Test que un cliente no puede crear franjas en bloque"""
+        item = {"instalacion_id": sample_facility.id, "fecha": date.today().isoformat(), "hora_inicio": "10:00:00", "hora_fin": "11:00:00", "capacidad": 1}
+        response = client.post("/slots/bulk", json={"items": [item]}, headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_availability_grid(self, client, sample_facility, sample_slot, db_session):
+        """Test rejilla de disponibilidad de varios días en una petición"""
+        from app.models.slot import Slot
+        other_day = sample_slot.fecha + timedelta(days=2)
+        db_session.add(Slot(instalacion_id=sample_facility.id, fecha=other_day, hora_inicio=time(9, 0), hora_fin=time(10, 0), capacidad=2, plazas_disponibles=0))
+        db_session.commit()
+
+        response = client.get(
+            "/slots/availability",
+            params={"from": sample_slot.fecha.isoformat(), "to": other_day.isoformat(), "facility_ids": str(sample_facility.id)},
+        )
+        assert response.status_code == 200
+        (grid,) = response.json()["instalaciones"]
+        assert grid["horas"] == [["09:00:00", "10:00:00"], ["10:00:00", "11:00:00"]]
+        assert grid["dias"] == {
+            sample_slot.fecha.isoformat(): {"libres": [None, 4], "ids": [None, sample_slot.id]},
+            other_day.isoformat(): {"libres": [0, None], "ids": [grid["dias"][other_day.isoformat()]["ids"][0], None]},
+        }
+
+    def test_availability_unknown_facility(self, client, sample_facility):
+        """Test que la rejilla falla con instalaciones inexistentes"""
+        today = date.today().isoformat()
+        response = client.get("/slots/availability", params={"from": today, "to": today, "facility_ids": f"{sample_facility.id},9999"})
+        assert response.status_code == 404
+
+    def test_availability_range_limit(self, client, sample_facility):
+        """Test que el rango de días está acotado"""
+        start = date.today()
+        response = client.get("/slots/availability", params={"from": start.isoformat(), "to": (start + timedelta(days=40)).isoformat()})
+        assert response.status_code == 422
+
+    def test_list_slots_etag(self, client, auth_headers, sample_facility, sample_slot):
+        """Test que el listado responde 304 con If-None-Match hasta que cambia una plaza"""
+        url = f"/slots/by-facility/{sample_facility.id}"
+        params = {"fecha": sample_slot.fecha.isoformat()}
+        first = client.get(url, params=params)
+        etag = first.headers["etag"]
+
+        response = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        booked = client.post(
+            "/reservations",
+            json={"instalacion_id": sample_facility.id, "franja_id": sample_slot.id},
+            headers=auth_headers,
+        )
+        assert booked.status_code == 201
+
+        response = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()[0]["plazas_disponibles"] == sample_slot.capacidad - 1
+
+    def test_list_slots_etag_expires(self, client, sample_facility, sample_slot, monkeypatch):
+        """Test que un ETag deja de valer pasado su TTL (escrituras de otros procesos no suben la versión)"""
+        from app.core.config import settings
+
+        url = f"/slots/by-facility/{sample_facility.id}"
+        params = {"fecha": sample_slot.fecha.isoformat()}
+        etag = client.get(url, params=params).headers["etag"]
+
+        monkeypatch.setattr(settings, "listing_etag_ttl_seconds", 0)
+        assert client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_list_slots_unknown_facility_with_wildcard(self, client):
+        """Test que If-None-Match: * no convierte en 304 el 404 de una instalación inexistente"""
+        response = client.get("/slots/by-facility/99999", params={"fecha": "2030-01-01"}, headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+
+    def test_next_available(self, client, sample_facility, sample_slot):
+        """Test buscar la próxima franja libre"""
+        response = client.get(
+            "/slots/next-available",
+            params={"facility_ids": str(sample_facility.id), "after": f"{sample_slot.fecha.isoformat()}T00:00"},
+        )
+        assert response.status_code == 200
+        assert [s["id"] for s in response.json()] == [sample_slot.id]
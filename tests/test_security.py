@@ -138,3 +138,157 @@ class TestJWT:
         
         assert 29 <= exp_minutes <= 31  # Tolerancia de 1 minuto
 
+
+
+class TestTokenCache:
+    """Tests para la caché de JWT verificados"""
+
+    def test_hit_skips_signature_verification(self, monkeypatch):
+        """Test que el segundo decode del mismo token no vuelve a verificar la firma"""
+        from app.core import security
+        from app.core.token_cache import token_cache
+
+        token = create_access_token(sub="a@example.com", uid=7, rol="cliente")
+        assert decode_token(token)["uid"] == 7
+
+        def _no_verify(*args, **kwargs):
+            raise AssertionError("no debería verificarse otra vez")
+
+        monkeypatch.setattr(security.jwt, "decode", _no_verify)
+        assert decode_token(token)["uid"] == 7
+        assert token_cache.stats()["hits"] >= 1
+
+    def test_expired_entry_is_not_served(self):
+        """Test que una entrada caducada no se devuelve"""
+        from app.core.token_cache import TokenCache
+
+        cache = TokenCache(max_entries=10)
+        cache.put("t", {"uid": 1, "exp": 1})
+        assert cache.get("t") is None
+
+    def test_purge_user(self):
+        """Test que purge_user borra todos los tokens del usuario"""
+        from app.core.token_cache import TokenCache
+
+        cache = TokenCache(max_entries=10)
+        far = 2**40
+        cache.put("t1", {"uid": 1, "exp": far})
+        cache.put("t2", {"uid": 1, "exp": far})
+        cache.put("t3", {"uid": 2, "exp": far})
+
+        cache.purge_user(1)
+
+        assert cache.get("t1") is None and cache.get("t2") is None
+        assert cache.get("t3") is not None
+
+    def test_deactivated_user_is_rejected(self, client, db_session, auth_headers, sample_user):
+        """Test que tras desactivar al usuario su token deja de valer"""
+        from app.utils.admin_users import set_active
+
+        assert client.get("/auth/me", headers=auth_headers).status_code == 200
+        set_active(db_session, sample_user.id, False)
+
+        assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+class TestHashCalibration:
+    """Tests para la calibración de rondas y el rehash tras el login"""
+
+    @pytest.fixture(autouse=True)
+    def restore_rounds(self):
+        from app.core.security import hash_rounds, set_hash_rounds
+
+        previous = hash_rounds()
+        yield
+        set_hash_rounds(previous)
+
+    def test_calibrate_respects_floor_and_step(self):
+        """Test que la calibración redondea y no baja del mínimo"""
+        from app.core.security import ROUNDS_STEP, calibrate_hash_rounds
+
+        rounds = calibrate_hash_rounds(target_ms=1, min_rounds=29000)
+        assert rounds == 29000
+        rounds = calibrate_hash_rounds(target_ms=50, min_rounds=1000)
+        assert rounds >= 1000 and rounds % ROUNDS_STEP == 0
+
+    def test_hashes_outside_band_need_rehash(self):
+        """Test que un hash con rondas fuera de la banda actual queda obsoleto"""
+        from app.core.security import password_needs_rehash, set_hash_rounds
+
+        set_hash_rounds(29000)
+        old = hash_password("password123")
+        assert not password_needs_rehash(old)
+
+        set_hash_rounds(60000)
+        assert password_needs_rehash(old)
+        assert "$60000$" in hash_password("password123")
+        assert verify_password("password123", old)
+
+    def test_login_rehashes_outdated_hash(self, client, db_session, sample_user, monkeypatch):
+        """Test que el login rehace en segundo plano un hash obsoleto"""
+        from app.api.routers import auth
+        from app.core.security import set_hash_rounds
+        from app.models.user import User
+        from tests.conftest import TestingSessionLocal
+
+        # La tarea abre su propia sesión
+        monkeypatch.setattr(auth, "SessionLocal", TestingSessionLocal)
+
+        uid, email, old = sample_user.id, sample_user.email, sample_user.hashed_password
+        set_hash_rounds(40000)
+
+        response = client.post("/auth/login", data={"username": email, "password": "password123"})
+        assert response.status_code == 200
+
+        user = db_session.get(User, uid, populate_existing=True)
+        assert user.hashed_password != old
+        assert "$40000$" in user.hashed_password
+        assert verify_password("password123", user.hashed_password)
+
+    def test_admin_calibrate_endpoint(self, client, admin_headers, monkeypatch):
+        """Test del endpoint de calibración bajo demanda"""
+        monkeypatch.setattr(settings, "password_hash_calibrate", True)
+        response = client.post("/admin/password-hash/calibrate?target_ms=1", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["rounds"] == settings.password_hash_min_rounds
+        assert client.get("/admin/password-hash", headers=admin_headers).json()["rounds"] == settings.password_hash_min_rounds
+
+    def test_admin_calibrate_stores_rounds(self, client, admin_headers, db_session, monkeypatch):
+        """Test que la calibración bajo demanda guarda las rondas para el resto de procesos"""
+        from app.utils.password_hash import load_hash_rounds
+
+        monkeypatch.setattr(settings, "password_hash_calibrate", True)
+        client.post("/admin/password-hash/calibrate?target_ms=1", headers=admin_headers)
+        assert load_hash_rounds(db_session) == settings.password_hash_min_rounds
+
+    def test_admin_calibrate_rejected_with_configured_rounds(self, client, admin_headers, monkeypatch):
+        """Test que con las rondas fijadas en la configuración no se recalibra solo un proceso"""
+        from app.core.security import hash_rounds
+
+        before = hash_rounds()
+        assert client.post("/admin/password-hash/calibrate?target_ms=1", headers=admin_headers).status_code == 409
+
+        monkeypatch.setattr(settings, "password_hash_calibrate", True)
+        monkeypatch.setattr(settings, "password_hash_rounds", 40000)
+        assert client.post("/admin/password-hash/calibrate?target_ms=1", headers=admin_headers).status_code == 409
+        assert hash_rounds() == before
+
+    def test_rounds_are_shared_between_processes(self, db_session, monkeypatch):
+        """Test que las rondas guardadas por otro proceso se adoptan al arrancar y al sincronizar"""
+        from app.core.security import hash_rounds
+        from app.utils import password_hash
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(settings, "password_hash_calibrate", True)
+        monkeypatch.setattr(password_hash, "calibrate_hash_rounds", lambda *a, **k: pytest.fail("no debería calibrar"))
+
+        # Otro worker ya calibró y guardó
+        password_hash.store_hash_rounds(db_session, 45000)
+        assert password_hash.configure_hash_rounds(TestingSessionLocal) == 45000
+        assert hash_rounds() == 45000
+
+        # Recalibración posterior en otro worker: se ve al sincronizar pasado el intervalo
+        password_hash.store_hash_rounds(db_session, 52000)
+        monkeypatch.setattr(settings, "password_hash_sync_seconds", 0)
+        password_hash.sync_hash_rounds(db_session)
+        assert hash_rounds() == 52000
@@ -0,0 +1,88 @@
+"""
+Tests unitarios para el archivado de franjas y reservas pasadas
+"""
+from datetime import date, time, timedelta
+
+import pytest
+
+from app.models.archive import ArchivedReservation, ArchivedSlot
+from app.models.reservation import Reservation
+from app.models.slot import Slot
+from app.utils.admin_reservations import list_reservations, list_reservations_with_archive
+from app.utils.archive import archive_before
+
+
+@pytest.fixture
+def past_reservation(db_session, sample_user, sample_facility):
+    slot = Slot(
+        instalacion_id=sample_facility.id,
+        fecha=date.today() - timedelta(days=400),
+        hora_inicio=time(10, 0),
+        hora_fin=time(11, 0),
+        capacidad=5,
+        plazas_disponibles=4,
+    )
+    db_session.add(slot)
+    db_session.commit()
+    res = Reservation(usuario_id=sample_user.id, instalacion_id=sample_facility.id, franja_id=slot.id, estado="activa")
+    db_session.add(res)
+    db_session.commit()
+    return res
+
+
+class TestArchive:
+    """Tests para archive_before"""
+
+    def test_archive_moves_old_slots_and_reservations(self, db_session, past_reservation, sample_reservation):
+        """Test que se mueven las franjas anteriores al corte y sus reservas, y nada más"""
+        res_id, slot_id = past_reservation.id, past_reservation.franja_id
+
+        moved = archive_before(db_session, date.today() - timedelta(days=365), chunk_size=1)
+
+        assert moved == {"franjas": 1, "reservas": 1}
+        db_session.expire_all()
+        assert db_session.get(Slot, slot_id) is None
+        assert db_session.get(Reservation, res_id) is None
+        assert db_session.get(ArchivedSlot, slot_id).plazas_disponibles == 4
+        archived = db_session.get(ArchivedReservation, res_id)
+        assert archived.franja_id == slot_id
+        assert archived.estado == "activa"
+        assert db_session.get(Reservation, sample_reservation.id) is not None
+
+    def test_archive_rejects_future_cutoff(self, db_session):
+        """Test que no se puede archivar con una fecha de corte futura"""
+        with pytest.raises(ValueError):
+            archive_before(db_session, date.today() + timedelta(days=1))
+
+    def test_admin_listing_include_archived(self, db_session, sample_user, past_reservation, sample_reservation):
+        """Test que el listado de admin solo muestra archivadas si se pide"""
+        res_id = past_reservation.id
+        archive_before(db_session, date.today() - timedelta(days=365))
+
+        items, total = list_reservations(db_session)
+        assert total == 1
+        assert items[0].id == sample_reservation.id
+
+        rows, total = list_reservations_with_archive(db_session)
+        assert total == 2
+        archived = next(r for r in rows if r["id"] == res_id)
+        assert archived["archivada"] is True
+        assert archived["usuario_email"] == sample_user.email
+
+    def test_archived_ids_are_not_reused(self, db_session, sample_user, sample_facility, past_reservation):
+        """Test que tras archivar las filas de id más alto no se reutilizan sus ids"""
+        res_id, slot_id = past_reservation.id, past_reservation.franja_id
+        archive_before(db_session, date.today() - timedelta(days=365))
+
+        slot = Slot(instalacion_id=sample_facility.id, fecha=date.today() - timedelta(days=400),
+                    hora_inicio=time(12, 0), hora_fin=time(13, 0), capacidad=1, plazas_disponibles=1)
+        db_session.add(slot)
+        db_session.commit()
+        res = Reservation(usuario_id=sample_user.id, instalacion_id=sample_facility.id, franja_id=slot.id, estado="activa")
+        db_session.add(res)
+        db_session.commit()
+
+        assert slot.id > slot_id
+        assert res.id > res_id
+        # Un segundo archivado no choca con los ids ya archivados
+        assert archive_before(db_session, date.today() - timedelta(days=365)) == {"franjas": 1, "reservas": 1}
@@ -0,0 +1,136 @@
+"""
+Tests unitarios para la cola de reservas por franja
+"""
+import threading
+import pytest
+from datetime import date, time, timedelta
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models.user import User, UserRole
+from app.models.facility import Facility
+from app.models.slot import Slot
+from app.models.reservation import Reservation
+from app.utils.booking_queue import BookingDispatcher
+
+
+def _seed(factory, n_users: int, capacidad: int):
+    db = factory()
+    fac = Facility(nombre="Pádel 1", tipo="Pádel", activo=True)
+    db.add(fac)
+    db.flush()
+    slot = Slot(
+        instalacion_id=fac.id,
+        fecha=date.today() + timedelta(days=1),
+        hora_inicio=time(18, 0),
+        hora_fin=time(19, 0),
+        capacidad=capacidad,
+        plazas_disponibles=capacidad,
+    )
+    users = [
+        User(nombre=f"User {i}", email=f"user{i}@example.com", hashed_password="x", rol=UserRole.cliente)
+        for i in range(n_users)
+    ]
+    db.add(slot)
+    db.add_all(users)
+    db.commit()
+    ids = (fac.id, slot.id, [u.id for u in users])
+    db.close()
+    return ids
+
+
+class TestBookingDispatcher:
+    """Tests para el dispatcher de reservas con un escritor por franja"""
+
+    def test_submit_creates_reservation(self, file_session_factory):
+        """Test que una reserva encolada se crea y descuenta plaza"""
+        fac_id, slot_id, (user_id,) = _seed(file_session_factory, 1, 2)
+        dispatcher = BookingDispatcher(file_session_factory, idle_seconds=0.1)
+
+        res_id = dispatcher.submit(usuario_id=user_id, instalacion_id=fac_id, franja_id=slot_id)
+
+        db = file_session_factory()
+        assert db.get(Reservation, res_id).usuario_id == user_id
+        assert db.get(Slot, slot_id).plazas_disponibles == 1
+        db.close()
+
+    def test_wrong_facility(self, file_session_factory):
+        """Test que una franja de otra instalación devuelve 404"""
+        fac_id, slot_id, (user_id,) = _seed(file_session_factory, 1, 2)
+        dispatcher = BookingDispatcher(file_session_factory, idle_seconds=0.1)
+
+        with pytest.raises(HTTPException) as exc_info:
+            dispatcher.submit(usuario_id=user_id, instalacion_id=fac_id + 1, franja_id=slot_id)
+        assert exc_info.value.status_code == 404
+
+    def test_concurrent_bookings_never_overbook(self, file_session_factory):
+        """Test que muchas reservas simultáneas sobre la misma franja no sobrevenden"""
+        fac_id, slot_id, user_ids = _seed(file_session_factory, 20, 5)
+        dispatcher = BookingDispatcher(file_session_factory, idle_seconds=0.1)
+        results: list[int] = []
+        errors: list[int] = []
+        lock = threading.Lock()
+
+        def book(uid):
+            try:
+                res_id = dispatcher.submit(usuario_id=uid, instalacion_id=fac_id, franja_id=slot_id)
+                with lock:
+                    results.append(res_id)
+            except HTTPException as e:
+                with lock:
+                    errors.append(e.status_code)
+
+        threads = [threading.Thread(target=book, args=(uid,)) for uid in user_ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(results) == 5
+        assert errors == [409] * 15
+        assert dispatcher.stats()["processed"] == 20
+
+        db = file_session_factory()
+        assert db.get(Slot, slot_id).plazas_disponibles == 0
+        assert len(db.scalars(select(Reservation)).all()) == 5
+        db.close()
+
+    def test_same_user_twice_overlaps(self, file_session_factory):
+        """Test que el mismo usuario no puede reservar dos veces la misma franja"""
+        fac_id, slot_id, (user_id,) = _seed(file_session_factory, 1, 3)
+        dispatcher = BookingDispatcher(file_session_factory, idle_seconds=0.1)
+
+        dispatcher.submit(usuario_id=user_id, instalacion_id=fac_id, franja_id=slot_id)
+        with pytest.raises(HTTPException) as exc_info:
+            dispatcher.submit(usuario_id=user_id, instalacion_id=fac_id, franja_id=slot_id)
+        assert exc_info.value.status_code == 409
+
+    def test_timeout_cancels_queued_request(self, file_session_factory):
+        """Test que una petición que caduca en la cola no se procesa y la que ya estaba en curso sí"""
+        fac_id, slot_id, (first_id, second_id) = _seed(file_session_factory, 2, 5)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_factory():
+            started.set()
+            release.wait(5)
+            return file_session_factory()
+
+        dispatcher = BookingDispatcher(slow_factory, idle_seconds=0.1, timeout_seconds=0.2)
+        results = []
+        first = threading.Thread(
+            target=lambda: results.append(dispatcher.submit(usuario_id=first_id, instalacion_id=fac_id, franja_id=slot_id))
+        )
+        first.start()
+        assert started.wait(5)
+
+        with pytest.raises(HTTPException) as exc_info:
+            dispatcher.submit(usuario_id=second_id, instalacion_id=fac_id, franja_id=slot_id)
+        assert exc_info.value.status_code == 503
+        release.set()
+        first.join(5)
+
+        assert len(results) == 1
+        assert dispatcher.stats()["cancelled"] == 1
+        db = file_session_factory()
+        assert [r.usuario_id for r in db.scalars(select(Reservation))] == [first_id]
+        db.close()
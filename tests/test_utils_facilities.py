@@ -5,9 +5,11 @@ import pytest
 from app.utils.facilities import (
     create_facility,
     get_facility,
+    get_facility_row,
     list_facilities,
     update_facility,
-    delete_facility
+    delete_facility,
+    delete_facility_chunked,
 )
 
 
@@ -112,3 +114,73 @@ class TestFacilityUtils:
         
         assert get_facility(db_session, fac_id) is None
 
+    def test_delete_facility_removes_dependents(self, db_session, sample_facility, sample_slot, sample_reservation):
+        """Test que el borrado se lleva franjas y reservas sin cargarlas en la sesión"""
+        from app.models.reservation import Reservation
+        from app.models.slot import Slot
+        fac_id, slot_id, res_id = sample_facility.id, sample_slot.id, sample_reservation.id
+        db_session.expire_all()
+
+        delete_facility(db_session, get_facility_row(db_session, fac_id))
+
+        assert db_session.get(Slot, slot_id) is None
+        assert db_session.get(Reservation, res_id) is None
+
+    def test_delete_facility_chunked_job(self, file_session_factory):
+        """Test que el trabajo en segundo plano borra por lotes y avanza el progreso"""
+        import time as _time
+        from datetime import date, time, timedelta
+        from app.models.slot import Slot
+        from app.utils.jobs import JobRegistry
+
+        db = file_session_factory()
+        fac = create_facility(db, nombre="Grande", tipo="Test", aforo=5)
+        fac_id = fac.id
+        db.add_all([
+            Slot(instalacion_id=fac_id, fecha=date.today() + timedelta(days=d), hora_inicio=time(10, 0),
+                 hora_fin=time(11, 0), capacidad=5, plazas_disponibles=5)
+            for d in range(7)
+        ])
+        db.commit()
+        db.close()
+
+        registry = JobRegistry(file_session_factory)
+        job = registry.submit("borrar_instalacion", lambda job_db, job: delete_facility_chunked(job_db, job, fac_id, chunk_size=3))
+        deadline = _time.monotonic() + 5
+        while job.estado in ("pendiente", "en_curso") and _time.monotonic() < deadline:
+            _time.sleep(0.01)
+
+        assert job.estado == "completado"
+        assert job.total == 8
+        assert job.procesados == 8
+        db = file_session_factory()
+        assert get_facility(db, fac_id) is None
+        assert db.query(Slot).filter(Slot.instalacion_id == fac_id).count() == 0
+        db.close()
+
+    def test_catalog_serves_reads_and_refreshes_on_write(self, db_session, sample_facility):
+        """Test que las lecturas salen del catálogo y que escribir lo recarga"""
+        from app.utils.facility_catalog import facility_catalog
+
+        get_facility(db_session, sample_facility.id)
+        loads = facility_catalog.loads
+        assert get_facility(db_session, sample_facility.id).nombre == sample_facility.nombre
+        assert list_facilities(db_session)[0].id == sample_facility.id
+        assert facility_catalog.loads == loads
+
+        update_facility(db_session, sample_facility, nombre="Renombrada")
+
+        assert get_facility(db_session, sample_facility.id).nombre == "Renombrada"
+        assert facility_catalog.loads == loads + 1
+
+    def test_catalog_falls_back_to_db_for_unknown_id(self, db_session, sample_facility):
+        """Test que una instalación creada por fuera del catálogo se encuentra igualmente"""
+        from app.models.facility import Facility
+
+        list_facilities(db_session)
+        other = Facility(nombre="Creada por otro proceso", tipo="Test", activo=True)
+        db_session.add(other)
+        db_session.commit()
+
+        assert get_facility(db_session, other.id).nombre == "Creada por otro proceso"
+        assert any(f.id == other.id for f in list_facilities(db_session))
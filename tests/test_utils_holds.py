@@ -0,0 +1,149 @@
+"""
+Tests unitarios para retenciones temporales de plaza
+"""
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+from app.models.seat_hold import SeatHold
+from app.utils.holds import create_hold, confirm_hold, release_hold, release_expired, HoldSweeper
+
+
+class TestHoldUtils:
+    """Tests para funciones de utilidad de retenciones"""
+
+    def test_create_hold_claims_seat(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que retener descuenta la plaza"""
+        initial_plazas = sample_slot.plazas_disponibles
+        hold = create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id, minutes=5)
+
+        assert hold.id is not None
+        assert hold.expira_en > datetime.utcnow()
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == initial_plazas - 1
+
+    def test_create_hold_twice(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que no se puede retener dos veces la misma franja"""
+        create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+        with pytest.raises(HTTPException) as exc_info:
+            create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+        assert exc_info.value.status_code == 409
+
+    def test_confirm_hold(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que confirmar crea la reserva sin descontar otra plaza"""
+        initial_plazas = sample_slot.plazas_disponibles
+        hold = create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+
+        res = confirm_hold(db_session, hold=hold, user=sample_user)
+
+        assert res.franja_id == sample_slot.id
+        assert res.fecha == sample_slot.fecha
+        assert db_session.get(SeatHold, hold.id) is None
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == initial_plazas - 1
+
+    def test_confirm_expired_hold(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que una retención caducada no se puede confirmar"""
+        hold = create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+        hold.expira_en = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            confirm_hold(db_session, hold=hold, user=sample_user)
+        assert exc_info.value.status_code == 410
+
+    def test_release_hold(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que liberar devuelve la plaza"""
+        initial_plazas = sample_slot.plazas_disponibles
+        hold = create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+
+        release_hold(db_session, hold=hold, user=sample_user)
+
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == initial_plazas
+
+    def test_release_expired_batches_by_slot(self, db_session, sample_user, admin_user, sample_facility, sample_slot):
+        """Test que el barrido devuelve las plazas de varias retenciones caducadas"""
+        initial_plazas = sample_slot.plazas_disponibles
+        h1 = create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+        h2 = create_hold(db_session, user=admin_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+
+        assert release_expired(db_session, [h1.id, h2.id]) == 0
+        released = release_expired(db_session, [h1.id, h2.id], now=datetime.utcnow() + timedelta(hours=1))
+
+        assert released == 2
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == initial_plazas
+
+    def test_release_expired_never_exceeds_capacity(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que devolver plazas no deja la franja por encima de su capacidad"""
+        hold = create_hold(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=sample_slot.id)
+        # La plaza ya se devolvió por otro camino (p. ej. una liberación doble)
+        sample_slot.plazas_disponibles = sample_slot.capacidad
+        db_session.commit()
+
+        assert release_expired(db_session, [hold.id], now=datetime.utcnow() + timedelta(hours=1)) == 1
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == sample_slot.capacidad
+
+class TestHoldSweeper:
+    """Tests para el heap de caducidades"""
+
+    def test_pop_due_in_expiry_order(self):
+        """Test que solo salen las retenciones vencidas, de la más antigua a la más reciente"""
+        sweeper = HoldSweeper()
+        now = datetime.utcnow()
+        sweeper.schedule(3, now + timedelta(minutes=10))
+        sweeper.schedule(1, now - timedelta(minutes=2))
+        sweeper.schedule(2, now - timedelta(minutes=1))
+
+        assert sweeper.pop_due(now) == [1, 2]
+        assert sweeper.pending() == 1
+
+    def test_sweeper_releases_expired_holds(self, file_session_factory):
+        """Test que el hilo del barrido libera las retenciones al caducar"""
+        import time
+        from datetime import date, time as dtime
+        from app.models.facility import Facility
+        from app.models.slot import Slot
+        from app.models.user import User
+
+        db = file_session_factory()
+        fac = Facility(nombre="Pista", tipo="Tenis", activo=True)
+        user = User(nombre="User", email="hold@example.com", hashed_password="x")
+        db.add_all([fac, user])
+        db.flush()
+        slot = Slot(instalacion_id=fac.id, fecha=date.today() + timedelta(days=1), hora_inicio=dtime(9, 0),
+                    hora_fin=dtime(10, 0), capacidad=1, plazas_disponibles=0)
+        db.add(slot)
+        db.flush()
+        db.add(SeatHold(usuario_id=user.id, instalacion_id=fac.id, franja_id=slot.id,
+                        expira_en=datetime.utcnow() + timedelta(milliseconds=200)))
+        db.commit()
+        slot_id = slot.id
+        db.close()
+
+        sweeper = HoldSweeper(file_session_factory)
+        sweeper.start()
+        try:
+            deadline = time.monotonic() + 5
+            while sweeper.released == 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            sweeper.stop()
+
+        assert sweeper.released == 1
+        db = file_session_factory()
+        assert db.get(Slot, slot_id).plazas_disponibles == 1
+        db.close()
+
+    def test_sweeper_starts_without_tables(self, tmp_path):
+        """Test que el barrido arranca aunque la BD aún no tenga la tabla de retenciones"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+        sweeper = HoldSweeper(sessionmaker(bind=engine))
+        sweeper.start()
+        sweeper.stop()
+        engine.dispose()
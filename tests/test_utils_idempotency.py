@@ -0,0 +1,94 @@
+"""
+Tests unitarios para el almacén de Idempotency-Key
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.utils.idempotency import IdempotencyStore, request_fingerprint
+
+
+class TestIdempotencyStore:
+    """Tests para el almacén de respuestas idempotentes"""
+
+    def test_save_and_get_from_memory(self, db_session, sample_user):
+        """Test que la respuesta guardada se recupera"""
+        store = IdempotencyStore(ttl_seconds=60, max_entries=10)
+        huella = request_fingerprint("POST", "/reservations", {"franja_id": 1})
+        store.save(db_session, sample_user.id, "abc", huella, 201, {"id": 7})
+
+        stored = store.lookup(db_session, sample_user.id, "abc", huella)
+        assert stored.status_code == 201
+        assert stored.body == {"id": 7}
+
+    def test_db_fallback(self, db_session, sample_user):
+        """Test que sin memoria (p.ej. tras reiniciar) se usa la copia en BD"""
+        store = IdempotencyStore(ttl_seconds=60, max_entries=10)
+        huella = request_fingerprint("DELETE", "/reservations/3")
+        store.save(db_session, sample_user.id, "k1", huella, 204)
+        store.clear()
+
+        stored = store.lookup(db_session, sample_user.id, "k1", huella)
+        assert stored is not None
+        assert stored.status_code == 204
+        assert stored.body is None
+
+    def test_keys_are_per_user(self, db_session, sample_user, admin_user):
+        """Test que la misma clave de otro usuario no se comparte"""
+        store = IdempotencyStore(ttl_seconds=60, max_entries=10)
+        huella = request_fingerprint("POST", "/reservations", {"franja_id": 1})
+        store.save(db_session, sample_user.id, "abc", huella, 201, {"id": 7})
+
+        assert store.lookup(db_session, admin_user.id, "abc", huella) is None
+
+    def test_reused_key_with_other_request(self, db_session, sample_user):
+        """Test que reutilizar la clave con otra petición da 422"""
+        store = IdempotencyStore(ttl_seconds=60, max_entries=10)
+        store.save(db_session, sample_user.id, "abc", request_fingerprint("POST", "/reservations", {"franja_id": 1}), 201, {"id": 7})
+
+        with pytest.raises(HTTPException) as exc_info:
+            store.lookup(db_session, sample_user.id, "abc", request_fingerprint("POST", "/reservations", {"franja_id": 2}))
+        assert exc_info.value.status_code == 422
+
+    def test_memory_is_bounded(self, db_session, sample_user):
+        """Test que el LRU en memoria no crece por encima del máximo"""
+        store = IdempotencyStore(ttl_seconds=60, max_entries=2)
+        for i in range(5):
+            store.save(db_session, sample_user.id, f"k{i}", "h", 204)
+
+        assert len(store._entries) == 2
+        assert store.lookup(db_session, sample_user.id, "k0", "h") is not None
+
+    def test_concurrent_save_keeps_winning_response(self, db_session, sample_user):
+        """Test que si otro worker guardó antes la clave, se cachea su respuesta y no la propia"""
+        first, second = IdempotencyStore(ttl_seconds=60, max_entries=10), IdempotencyStore(ttl_seconds=60, max_entries=10)
+        huella = request_fingerprint("POST", "/reservations", {"franja_id": 1})
+        first.save(db_session, sample_user.id, "abc", huella, 201, {"id": 7})
+
+        second.save(db_session, sample_user.id, "abc", huella, 201, {"id": 8})
+
+        assert second.lookup(db_session, sample_user.id, "abc", huella).body == {"id": 7}
+
+    def test_failed_request_releases_key(self, db_session, sample_user):
+        """Test que al soltar una clave en curso un reintento puede volver a tomarla"""
+        store = IdempotencyStore(ttl_seconds=60, max_entries=10)
+        stored, claim = store.begin(db_session, sample_user.id, "abc", "h")
+        assert stored is None and claim is not None
+
+        store.release(db_session, claim)
+
+        assert store.begin(db_session, sample_user.id, "abc", "h")[1] == claim
+
+    def test_abandoned_claim_is_taken_over(self, db_session, sample_user):
+        """Test que una clave en curso de un proceso que murió se puede volver a tomar"""
+        from datetime import datetime, timedelta
+        from app.core.config import settings
+        from app.models.idempotency_key import IdempotencyKey
+
+        db_session.add(IdempotencyKey(
+            usuario_id=sample_user.id, clave="abc", huella="h", status_code=None,
+            creado_en=datetime.utcnow() - timedelta(seconds=settings.idempotency_pending_seconds + 1),
+        ))
+        db_session.commit()
+
+        stored, claim = IdempotencyStore(ttl_seconds=60, max_entries=10).begin(db_session, sample_user.id, "abc", "h")
+        assert stored is None and claim is not None
@@ -0,0 +1,112 @@
+"""
+Tests unitarios para el índice de ocupación (próxima franja libre)
+"""
+from datetime import date, datetime, time, timedelta
+
+from app.models.slot import Slot
+from app.utils.occupancy_index import occupancy_index
+from app.utils.reservations import create_reservation, cancel_reservation
+from app.utils.schedule_templates import create_templates
+
+DAY = date.today() + timedelta(days=1)
+
+
+def _slot(db, fac_id, hora: int, libres: int, fecha: date = DAY) -> Slot:
+    slot = Slot(instalacion_id=fac_id, fecha=fecha, hora_inicio=time(hora, 0), hora_fin=time(hora + 1, 0), capacidad=2, plazas_disponibles=libres)
+    db.add(slot)
+    db.commit()
+    return slot
+
+
+class TestOccupancyIndex:
+    """Tests para el índice de plazas libres"""
+
+    def test_next_available_skips_full_slots(self, db_session, sample_facility):
+        """Test que se salta las franjas llenas y las anteriores a `after`"""
+        _slot(db_session, sample_facility.id, 9, 2)
+        _slot(db_session, sample_facility.id, 10, 0)
+        expected = _slot(db_session, sample_facility.id, 11, 1)
+
+        (found,) = occupancy_index.next_available(
+            db_session, facility_ids=[sample_facility.id], after=datetime.combine(DAY, time(9, 30))
+        )
+
+        assert found["id"] == expected.id
+        assert found["plazas_disponibles"] == 1
+        assert occupancy_index.next_available(
+            db_session, facility_ids=[sample_facility.id], after=datetime.combine(DAY, time(9, 30)), min_seats=2
+        ) == []
+
+    def test_booking_and_cancel_patch_index(self, db_session, sample_facility, sample_user):
+        """Test que reservar y cancelar actualizan el índice sin recargarlo"""
+        slot = _slot(db_session, sample_facility.id, 9, 1)
+        _slot(db_session, sample_facility.id, 10, 1)
+        after = datetime.combine(DAY, time(0, 0))
+        assert occupancy_index.next_available(db_session, facility_ids=[sample_facility.id], after=after)[0]["id"] == slot.id
+        loads = occupancy_index.stats()["loads"]
+
+        res = create_reservation(db_session, user=sample_user, instalacion_id=sample_facility.id, franja_id=slot.id)
+        assert occupancy_index.next_available(db_session, facility_ids=[sample_facility.id], after=after)[0]["id"] != slot.id
+
+        cancel_reservation(db_session, res=res, user=sample_user)
+        assert occupancy_index.next_available(db_session, facility_ids=[sample_facility.id], after=after)[0]["id"] == slot.id
+        assert occupancy_index.stats()["loads"] == loads
+
+    def test_stale_index_is_corrected(self, db_session, sample_facility):
+        """Test que un candidato que ya no tiene plazas se corrige y se sigue buscando"""
+        first = _slot(db_session, sample_facility.id, 9, 1)
+        second = _slot(db_session, sample_facility.id, 10, 1)
+        after = datetime.combine(DAY, time(0, 0))
+        occupancy_index.next_available(db_session, facility_ids=[sample_facility.id], after=after)
+
+        # Escritura de otro proceso: no pasa por el índice
+        db_session.query(Slot).filter(Slot.id == first.id).update({"plazas_disponibles": 0})
+        db_session.commit()
+
+        (found,) = occupancy_index.next_available(db_session, facility_ids=[sample_facility.id], after=after)
+        assert found["id"] == second.id
+        assert occupancy_index.stats()["corrections"] == 1
+
+    def test_virtual_slot_from_template(self, db_session, sample_facility):
+        """Test que una franja virtual anterior gana a la primera franja real"""
+        _slot(db_session, sample_facility.id, 12, 1)
+        (t,) = create_templates(
+            db_session,
+            instalacion_id=sample_facility.id,
+            tramos=[(time(8, 0), time(9, 0))],
+            dias_semana=[DAY.weekday()],
+            capacidad=3,
+        )
+
+        (found,) = occupancy_index.next_available(
+            db_session, facility_ids=[sample_facility.id], after=datetime.combine(DAY, time(0, 0))
+        )
+        assert found["id"] is None
+        assert found["plantilla_id"] == t.id
+        assert (found["fecha"], found["hora_inicio"]) == (DAY, time(8, 0))
+
+    def test_rolled_back_savepoint_deltas_are_discarded(self, db_session, monkeypatch):
+        """Test que los cambios de un SAVEPOINT deshecho no llegan al índice y los demás solo con el commit"""
+        from sqlalchemy import select
+        from app.utils.occupancy_index import record_seat_deltas
+
+        applied = []
+        monkeypatch.setattr(occupancy_index, "apply_deltas", lambda deltas: applied.append(dict(deltas)))
+        db_session.execute(select(1))
+
+        with db_session.begin_nested():
+            record_seat_deltas(db_session, {1: -1})
+        savepoint = db_session.begin_nested()
+        record_seat_deltas(db_session, {2: -1})
+        savepoint.rollback()
+        assert applied == []
+
+        record_seat_deltas(db_session, {1: -1})
+        db_session.commit()
+        assert applied == [{1: -2}]
+
+        db_session.execute(select(1))
+        record_seat_deltas(db_session, {3: -1})
+        db_session.rollback()
+        db_session.commit()
+        assert applied == [{1: -2}]
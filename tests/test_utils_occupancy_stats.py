@@ -0,0 +1,70 @@
+"""
+Tests unitarios para las estadísticas de ocupación
+"""
+from datetime import time, timedelta
+
+from app.models.occupancy_stat import OccupancyStat
+from app.utils.admin_reservations import admin_cancel_reservation
+from app.utils.occupancy_stats import occupancy_report
+from app.utils.reservations import cancel_reservation, create_reservation
+from app.utils.slots import create_slots_bulk, delete_slot
+
+
+def _stat(db, slot):
+    db.expire_all()
+    return db.get(OccupancyStat, (slot.instalacion_id, slot.fecha, slot.hora_inicio.hour))
+
+
+class TestOccupancyStats:
+    """Tests para el mantenimiento de estadisticas_ocupacion"""
+
+    def test_slot_creation_adds_capacity(self, db_session, sample_slot):
+        """Test que crear una franja suma su capacidad"""
+        stat = _stat(db_session, sample_slot)
+        assert (stat.reservadas, stat.capacidad) == (0, 4)
+
+    def test_booking_and_cancel_update_reserved(self, db_session, sample_user, sample_slot):
+        """Test que reservar suma y cancelar resta en la misma transacción"""
+        res = create_reservation(db_session, user=sample_user, instalacion_id=sample_slot.instalacion_id, franja_id=sample_slot.id)
+        assert _stat(db_session, sample_slot).reservadas == 1
+
+        cancel_reservation(db_session, res=res, user=sample_user)
+        assert _stat(db_session, sample_slot).reservadas == 0
+
+    def test_admin_cancel_updates_reserved(self, db_session, sample_reservation, sample_slot):
+        """Test que la cancelación de admin (cambio de estado) también resta"""
+        assert _stat(db_session, sample_slot).reservadas == 1
+
+        admin_cancel_reservation(db_session, sample_reservation.id)
+        assert _stat(db_session, sample_slot).reservadas == 0
+
+    def test_bulk_insert_and_delete_recompute_day(self, db_session, sample_reservation, sample_slot):
+        """Test que el alta masiva y el borrado de franjas recalculan el día"""
+        create_slots_bulk(db_session, [{
+            "instalacion_id": sample_slot.instalacion_id,
+            "fecha": sample_slot.fecha,
+            "hora_inicio": time(10, 30),
+            "hora_fin": time(11, 30),
+            "capacidad": 6,
+        }])
+        stat = _stat(db_session, sample_slot)
+        assert (stat.reservadas, stat.capacidad) == (1, 10)
+
+        delete_slot(db_session, sample_slot)
+        stat = _stat(db_session, sample_slot)
+        assert (stat.reservadas, stat.capacidad) == (0, 6)
+
+    def test_report_groupings(self, db_session, sample_reservation, sample_slot):
+        """Test que el informe agrupa por fecha, día de la semana y hora"""
+        rango = dict(desde=sample_slot.fecha - timedelta(days=1), hasta=sample_slot.fecha)
+
+        by_day = occupancy_report(db_session, **rango)
+        assert by_day == [{
+            "instalacion_id": sample_slot.instalacion_id,
+            "fecha": sample_slot.fecha,
+            "reservadas": 1,
+            "capacidad": 4,
+            "ocupacion": 0.25,
+        }]
+        assert occupancy_report(db_session, **rango, group_by="dia_semana")[0]["dia_semana"] == sample_slot.fecha.weekday()
+        assert occupancy_report(db_session, **rango, group_by="hora")[0]["hora"] == 10
@@ -9,7 +9,8 @@ from app.utils.reservations import (
     create_reservation,
     list_reservations_for_user,
     get_reservation,
-    cancel_reservation
+    cancel_reservation,
+    create_block_reservation,
 )
 from app.models.reservation import Reservation
 
@@ -194,3 +195,183 @@ class TestReservationUtils:
             cancel_reservation(db_session, res=reservation, user=admin_user)
         assert exc_info.value.status_code == 403
 
+
+    def test_create_reservation_stale_slot_no_overbooking(self, db_session, sample_user, sample_facility, monkeypatch):
+        """Test que una lectura obsoleta de la franja no permite vender la última plaza dos veces"""
+        from app.models.slot import Slot
+        slot = Slot(
+            instalacion_id=sample_facility.id,
+            fecha=date.today() + timedelta(days=1),
+            hora_inicio=time(16, 0),
+            hora_fin=time(17, 0),
+            capacidad=1,
+            plazas_disponibles=0
+        )
+        db_session.add(slot)
+        db_session.commit()
+        db_session.refresh(slot)
+
+        # Simula otro worker que leyó la franja cuando aún quedaba una plaza
+        stale = Slot(
+            id=slot.id,
+            instalacion_id=slot.instalacion_id,
+            fecha=slot.fecha,
+            hora_inicio=slot.hora_inicio,
+            hora_fin=slot.hora_fin,
+            capacidad=1,
+            plazas_disponibles=1
+        )
+        monkeypatch.setattr("app.utils.reservations._get_slot", lambda db, franja_id: stale)
+
+        with pytest.raises(HTTPException) as exc_info:
+            create_reservation(
+                db_session,
+                user=sample_user,
+                instalacion_id=sample_facility.id,
+                franja_id=slot.id
+            )
+        assert exc_info.value.status_code == 409
+
+        db_session.refresh(slot)
+        assert slot.plazas_disponibles == 0
+        assert list_reservations_for_user(db_session, sample_user.id) == []
+
+    def test_create_reservations_batch(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test reserva por lotes con resultado por elemento"""
+        from app.models.slot import Slot
+        from app.utils.reservations import create_reservations_batch
+        fecha = sample_slot.fecha
+        otra = Slot(instalacion_id=sample_facility.id, fecha=fecha, hora_inicio=time(11, 0), hora_fin=time(12, 0),
+                    capacidad=2, plazas_disponibles=2)
+        solapada = Slot(instalacion_id=sample_facility.id, fecha=fecha, hora_inicio=time(11, 30), hora_fin=time(12, 30),
+                        capacidad=2, plazas_disponibles=2)
+        db_session.add_all([otra, solapada])
+        db_session.commit()
+
+        results = create_reservations_batch(
+            db_session,
+            user=sample_user,
+            items=[
+                (sample_facility.id, sample_slot.id),
+                (sample_facility.id, otra.id),
+                (sample_facility.id, solapada.id),
+                (sample_facility.id, 99999),
+            ],
+        )
+
+        assert [r["status_code"] for r in results] == [201, 201, 409, 404]
+        assert results[0]["reserva"]["franja_id"] == sample_slot.id
+        assert results[2]["reserva"] is None
+        assert len(list_reservations_for_user(db_session, sample_user.id)) == 2
+        db_session.refresh(otra)
+        assert otra.plazas_disponibles == 1
+
+    def test_create_reservations_batch_all_or_nothing(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que en modo todo-o-nada un fallo no reserva ningún elemento"""
+        from app.utils.reservations import create_reservations_batch
+        initial_plazas = sample_slot.plazas_disponibles
+
+        results = create_reservations_batch(
+            db_session,
+            user=sample_user,
+            items=[(sample_facility.id, sample_slot.id), (sample_facility.id, 99999)],
+            all_or_nothing=True,
+        )
+
+        assert [r["status_code"] for r in results] == [409, 404]
+        assert list_reservations_for_user(db_session, sample_user.id) == []
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == initial_plazas
+
+    def test_create_reservation_copies_slot_schedule(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que la reserva guarda una copia del horario de la franja"""
+        reservation = create_reservation(
+            db_session,
+            user=sample_user,
+            instalacion_id=sample_facility.id,
+            franja_id=sample_slot.id
+        )
+
+        assert reservation.fecha == sample_slot.fecha
+        assert reservation.hora_inicio == sample_slot.hora_inicio
+        assert reservation.hora_fin == sample_slot.hora_fin
+
+    def test_overlap_ignores_cancelled_reservations(self, db_session, sample_user, sample_facility, sample_slot, sample_reservation):
+        """Test que una reserva cancelada no bloquea el mismo horario"""
+        from app.models.slot import Slot
+        from app.models.facility import Facility
+        sample_reservation.estado = "cancelada"
+        otra = Facility(nombre="Pista 2", tipo="Tenis", activo=True)
+        db_session.add(otra)
+        db_session.commit()
+        misma_hora = Slot(
+            instalacion_id=otra.id,
+            fecha=sample_slot.fecha,
+            hora_inicio=sample_slot.hora_inicio,
+            hora_fin=sample_slot.hora_fin,
+            capacidad=1,
+            plazas_disponibles=1,
+        )
+        db_session.add(misma_hora)
+        db_session.commit()
+
+        reservation = create_reservation(
+            db_session,
+            user=sample_user,
+            instalacion_id=otra.id,
+            franja_id=misma_hora.id
+        )
+        assert reservation.id is not None
+
+    def _day_slots(self, db_session, sample_slot, horas_libres: dict[int, int]):
+        from app.models.slot import Slot
+        slots = {}
+        for hora, libres in horas_libres.items():
+            slot = Slot(
+                instalacion_id=sample_slot.instalacion_id,
+                fecha=sample_slot.fecha,
+                hora_inicio=time(hora, 0),
+                hora_fin=time(hora + 1, 0),
+                capacidad=4,
+                plazas_disponibles=libres,
+            )
+            db_session.add(slot)
+            slots[hora] = slot
+        db_session.commit()
+        return slots
+
+    def test_create_block_reservation_first_free_run(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test reservar un bloque de franjas consecutivas saltando las llenas y los huecos"""
+        slots = self._day_slots(db_session, sample_slot, {11: 0, 12: 4, 14: 4, 15: 4})
+
+        created = create_block_reservation(
+            db_session, user=sample_user, instalacion_id=sample_facility.id, fecha=sample_slot.fecha, n=2
+        )
+
+        assert [r.franja_id for r in created] == [slots[14].id, slots[15].id]
+        db_session.refresh(slots[14])
+        assert slots[14].plazas_disponibles == 3
+
+    def test_create_block_reservation_skips_overlap(self, db_session, sample_user, sample_facility, sample_slot, sample_reservation):
+        """Test que el bloque no puede solapar con reservas del usuario"""
+        slots = self._day_slots(db_session, sample_slot, {11: 4, 12: 4})
+
+        created = create_block_reservation(
+            db_session, user=sample_user, instalacion_id=sample_facility.id, fecha=sample_slot.fecha, n=2
+        )
+
+        assert [r.franja_id for r in created] == [slots[11].id, slots[12].id]
+
+    def test_create_block_reservation_fixed_start_unavailable(self, db_session, sample_user, sample_facility, sample_slot):
+        """Test que con hora de inicio fija no se busca otro bloque"""
+        self._day_slots(db_session, sample_slot, {11: 0, 12: 4, 13: 4})
+
+        with pytest.raises(HTTPException) as exc_info:
+            create_block_reservation(
+                db_session, user=sample_user, instalacion_id=sample_facility.id,
+                fecha=sample_slot.fecha, n=2, hora_inicio=time(10, 0),
+            )
+
+        assert exc_info.value.status_code == 409
+        db_session.refresh(sample_slot)
+        assert sample_slot.plazas_disponibles == 4
@@ -0,0 +1,109 @@
+"""
+Tests unitarios para plantillas de horario y franjas virtuales
+"""
+import pytest
+from datetime import date, time, timedelta
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.models.slot import Slot
+from app.utils.schedule_templates import (
+    create_templates,
+    list_slots_with_templates,
+    materialize_slot,
+    template_applies,
+)
+
+# Lunes
+MONDAY = date(2030, 1, 7)
+
+
+class TestScheduleTemplateUtils:
+    """Tests para funciones de utilidad de plantillas de horario"""
+
+    def test_template_applies(self, db_session, sample_facility):
+        """Test que la plantilla respeta días, rango de fechas y exclusiones"""
+        (t,) = create_templates(
+            db_session,
+            instalacion_id=sample_facility.id,
+            tramos=[(time(9, 0), time(10, 0))],
+            dias_semana=[0, 2],
+            capacidad=5,
+            fecha_hasta=MONDAY + timedelta(days=14),
+            fechas_excluidas=[MONDAY + timedelta(days=7)],
+        )
+
+        assert template_applies(t, MONDAY)
+        assert template_applies(t, MONDAY + timedelta(days=2))
+        assert not template_applies(t, MONDAY + timedelta(days=1))
+        assert not template_applies(t, MONDAY + timedelta(days=7))
+        assert not template_applies(t, MONDAY + timedelta(days=21))
+
+    def test_list_merges_real_and_virtual(self, db_session, sample_facility):
+        """Test que el listado combina franjas reales y virtuales sin duplicar"""
+        create_templates(
+            db_session,
+            instalacion_id=sample_facility.id,
+            tramos=[(time(9, 0), time(10, 0)), (time(10, 0), time(11, 0))],
+            dias_semana=[0],
+            capacidad=5,
+        )
+        real = Slot(instalacion_id=sample_facility.id, fecha=MONDAY, hora_inicio=time(10, 0), hora_fin=time(11, 0), capacidad=5, plazas_disponibles=2)
+        db_session.add(real)
+        db_session.commit()
+
+        slots = list_slots_with_templates(db_session, instalacion_id=sample_facility.id, fecha=MONDAY)
+
+        assert [(s["hora_inicio"], s["id"] is None) for s in slots] == [(time(9, 0), True), (time(10, 0), False)]
+        assert slots[1]["plazas_disponibles"] == 2
+        assert list_slots_with_templates(db_session, instalacion_id=sample_facility.id, fecha=MONDAY + timedelta(days=1)) == []
+
+    def test_listing_templates_are_cached_until_changed(self, db_session, sample_facility, monkeypatch):
+        """Test que el listado no vuelve a leer las plantillas de la BD hasta que cambian"""
+        from app.utils import schedule_templates
+
+        create_templates(db_session, instalacion_id=sample_facility.id, tramos=[(time(9, 0), time(10, 0))], dias_semana=[0], capacidad=4)
+        reads = []
+        real_list_templates = schedule_templates.list_templates
+        monkeypatch.setattr(schedule_templates, "list_templates", lambda db, fac_id: reads.append(fac_id) or real_list_templates(db, fac_id))
+
+        list_slots_with_templates(db_session, instalacion_id=sample_facility.id, fecha=MONDAY)
+        slots = list_slots_with_templates(db_session, instalacion_id=sample_facility.id, fecha=MONDAY + timedelta(days=7))
+        assert reads == [sample_facility.id]
+        assert [s["hora_inicio"] for s in slots] == [time(9, 0)]
+
+        create_templates(db_session, instalacion_id=sample_facility.id, tramos=[(time(11, 0), time(12, 0))], dias_semana=[0], capacidad=4)
+        slots = list_slots_with_templates(db_session, instalacion_id=sample_facility.id, fecha=MONDAY)
+        assert len(reads) == 2
+        assert [s["hora_inicio"] for s in slots] == [time(9, 0), time(11, 0)]
+
+    def test_materialize_slot_once(self, db_session, sample_facility):
+        """Test que la franja se crea una sola vez al materializarla"""
+        (t,) = create_templates(
+            db_session,
+            instalacion_id=sample_facility.id,
+            tramos=[(time(9, 0), time(10, 0))],
+            dias_semana=[0],
+            capacidad=5,
+        )
+
+        first = materialize_slot(db_session, plantilla_id=t.id, instalacion_id=sample_facility.id, fecha=MONDAY)
+        second = materialize_slot(db_session, plantilla_id=t.id, instalacion_id=sample_facility.id, fecha=MONDAY)
+
+        assert first.id == second.id
+        assert first.plazas_disponibles == 5
+        assert db_session.scalar(select(func.count(Slot.id))) == 1
+
+    def test_materialize_slot_not_applicable(self, db_session, sample_facility):
+        """Test que no se materializa una fecha que la plantilla no cubre"""
+        (t,) = create_templates(
+            db_session,
+            instalacion_id=sample_facility.id,
+            tramos=[(time(9, 0), time(10, 0))],
+            dias_semana=[0],
+            capacidad=5,
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            materialize_slot(db_session, plantilla_id=t.id, instalacion_id=sample_facility.id, fecha=MONDAY + timedelta(days=1))
+        assert exc_info.value.status_code == 404
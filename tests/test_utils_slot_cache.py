@@ -0,0 +1,72 @@
+"""
+Tests unitarios para la caché de franjas
+"""
+from datetime import date, time
+
+from app.utils.reservations import create_reservation, cancel_reservation
+from app.utils.slot_cache import SlotCache, SlotSnapshot, slot_cache
+from app.utils.slots import create_slot, list_slots_for_facility_date
+
+
+def _snapshot(slot_id: int, fecha: date) -> SlotSnapshot:
+    return SlotSnapshot(slot_id, 1, fecha, time(10, 0), time(11, 0), 4, 4)
+
+
+class TestSlotCache:
+    """Tests para la caché LRU de franjas"""
+
+    def test_hit_after_miss(self, db_session, sample_slot):
+        """Test que la segunda lectura del mismo día sale de la caché"""
+        before = slot_cache.stats()
+        first = list_slots_for_facility_date(db_session, instalacion_id=sample_slot.instalacion_id, fecha=sample_slot.fecha)
+        second = list_slots_for_facility_date(db_session, instalacion_id=sample_slot.instalacion_id, fecha=sample_slot.fecha)
+
+        assert first == second
+        assert [s.id for s in first] == [sample_slot.id]
+        stats = slot_cache.stats()
+        assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (1, 1)
+
+    def test_booking_and_cancel_invalidate(self, db_session, sample_user, sample_slot):
+        """Test que reservar y cancelar invalidan el día de la franja"""
+        kwargs = dict(instalacion_id=sample_slot.instalacion_id, fecha=sample_slot.fecha)
+        assert list_slots_for_facility_date(db_session, **kwargs)[0].plazas_disponibles == 4
+
+        res = create_reservation(db_session, user=sample_user, instalacion_id=sample_slot.instalacion_id, franja_id=sample_slot.id)
+        assert list_slots_for_facility_date(db_session, **kwargs)[0].plazas_disponibles == 3
+
+        cancel_reservation(db_session, res=res, user=sample_user)
+        assert list_slots_for_facility_date(db_session, **kwargs)[0].plazas_disponibles == 4
+
+    def test_create_slot_invalidates(self, db_session, sample_slot):
+        """Test que crear una franja invalida el listado del día"""
+        kwargs = dict(instalacion_id=sample_slot.instalacion_id, fecha=sample_slot.fecha)
+        assert len(list_slots_for_facility_date(db_session, **kwargs)) == 1
+
+        create_slot(db_session, hora_inicio=time(12, 0), hora_fin=time(13, 0), capacidad=2, **kwargs)
+
+        assert len(list_slots_for_facility_date(db_session, **kwargs)) == 2
+
+    def test_stale_put_is_discarded(self):
+        """Test que no se guarda una lectura que empezó antes de una invalidación"""
+        cache = SlotCache(max_entries=10, ttl_seconds=60)
+        fecha = date(2030, 1, 1)
+        key = (1, fecha, False)
+
+        token = cache.token(key)
+        cache.invalidate_slots([7])
+        cache.put(key, (_snapshot(7, fecha),), token)
+        assert cache.get(key) is None
+
+        cache.put(key, (_snapshot(7, fecha),), cache.token(key))
+        assert cache.get(key) is not None
+
+    def test_eviction(self):
+        """Test que se descarta la entrada usada hace más tiempo"""
+        cache = SlotCache(max_entries=2, ttl_seconds=60)
+        keys = [(1, date(2030, 1, d), False) for d in (1, 2, 3)]
+        for i, key in enumerate(keys):
+            cache.put(key, (_snapshot(i, key[1]),), cache.token(key))
+
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) is not None
+        assert cache.stats()["evictions"] == 1
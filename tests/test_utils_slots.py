@@ -7,6 +7,7 @@ from sqlalchemy.exc import IntegrityError
 
 from app.utils.slots import (
     create_slot,
+    create_slots_bulk,
     get_slot,
     list_slots_for_facility_date,
     delete_slot
@@ -141,8 +142,10 @@ class TestSlotUtils:
         
         assert len(slots) >= 1
         assert all(s.plazas_disponibles > 0 for s in slots)
-        assert slot1 in slots
-        assert slot2 not in slots
+        # Devuelve instantáneas (SlotSnapshot), no filas ORM: se comparan por id
+        ids = [s.id for s in slots]
+        assert slot1.id in ids
+        assert slot2.id not in ids
     
     def test_delete_slot(self, db_session, sample_slot):
         """Test eliminación de franja"""
@@ -151,3 +154,35 @@ class TestSlotUtils:
         
         assert get_slot(db_session, slot_id) is None
 
+    def test_create_slots_bulk_skips_existing(self, db_session, sample_facility, sample_slot):
+        """Test que la creación masiva omite franjas ya existentes y duplicadas"""
+        base = {
+            "instalacion_id": sample_facility.id,
+            "fecha": sample_slot.fecha,
+            "capacidad": 3,
+            "plazas_disponibles": None,
+        }
+        items = [
+            {**base, "hora_inicio": sample_slot.hora_inicio, "hora_fin": sample_slot.hora_fin},
+            {**base, "hora_inicio": time(20, 0), "hora_fin": time(21, 0)},
+            {**base, "hora_inicio": time(20, 0), "hora_fin": time(21, 0)},
+            {**base, "hora_inicio": time(21, 0), "hora_fin": time(22, 0)},
+        ]
+
+        created, skipped = create_slots_bulk(db_session, items)
+
+        assert (created, skipped) == (2, 2)
+        slots = list_slots_for_facility_date(db_session, instalacion_id=sample_facility.id, fecha=sample_slot.fecha)
+        assert len(slots) == 3
+        assert all(s.plazas_disponibles == 3 for s in slots if s.id != sample_slot.id)
+
+    def test_create_slots_bulk_unknown_facility(self, db_session, sample_facility):
+        """Test que la creación masiva falla si alguna instalación no existe"""
+        from fastapi import HTTPException
+        item = {"fecha": date(2024, 12, 25), "hora_inicio": time(10, 0), "hora_fin": time(11, 0), "capacidad": 1}
+
+        with pytest.raises(HTTPException) as exc_info:
+            create_slots_bulk(db_session, [{**item, "instalacion_id": sample_facility.id}, {**item, "instalacion_id": 9999}])
+
+        assert exc_info.value.status_code == 404
+        assert list_slots_for_facility_date(db_session, instalacion_id=sample_facility.id, fecha=date(2024, 12, 25)) == []
@@ -0,0 +1,77 @@
+"""
+Tests unitarios para la caché de usuarios de get_current_user
+"""
+from sqlalchemy import event
+
+from app.models.user import UserRole
+from app.utils.admin_users import set_active, set_role
+from app.utils.user_cache import CachedUser, UserCache, user_cache
+from tests.conftest import test_engine
+
+
+def _count_queries():
+    queries = []
+
+    def _on_execute(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", _on_execute)
+    return queries, lambda: event.remove(test_engine, "before_cursor_execute", _on_execute)
+
+
+class TestUserCache:
+    """Tests para UserCache y su uso en get_current_user"""
+
+    def test_put_rejected_after_invalidation(self):
+        """Test que una lectura anterior a la invalidación no se guarda"""
+        cache = UserCache(max_entries=10, ttl_seconds=60)
+        token = cache.token(1)
+        cache.invalidate(1)
+        cache.put(CachedUser(id=1, nombre="A", email="a@example.com", rol=UserRole.cliente, activo=True), token)
+
+        assert cache.get(1) is None
+
+    def test_lru_bound(self):
+        """Test que la caché no supera su tamaño máximo"""
+        cache = UserCache(max_entries=2, ttl_seconds=60)
+        for uid in (1, 2, 3):
+            cache.put(CachedUser(id=uid, nombre="A", email=f"{uid}@example.com", rol=UserRole.cliente, activo=True), 0)
+
+        assert cache.get(1) is None
+        assert cache.get(3) is not None
+
+    def test_authenticated_request_hits_cache(self, client, auth_headers, sample_user):
+        """Test que la segunda petición autenticada no consulta la tabla de usuarios"""
+        assert client.get("/auth/me", headers=auth_headers).status_code == 200
+        queries, stop = _count_queries()
+        try:
+            response = client.get("/auth/me", headers=auth_headers)
+        finally:
+            stop()
+
+        assert response.status_code == 200
+        assert response.json()["email"] == sample_user.email
+        assert not any("usuarios" in q for q in queries)
+
+    def test_set_role_and_set_active_invalidate(self, client, db_session, admin_headers, auth_headers, sample_user):
+        """Test que cambiar rol o estado invalida la entrada del usuario"""
+        assert client.get("/auth/me", headers=auth_headers).json()["rol"] == "cliente"
+        assert user_cache.get(sample_user.id) is not None
+
+        set_role(db_session, sample_user.id, "admin")
+        assert user_cache.get(sample_user.id) is None
+        assert client.get("/auth/me", headers=auth_headers).json()["rol"] == "admin"
+
+        set_active(db_session, sample_user.id, False)
+        assert user_cache.get(sample_user.id) is None
+
+    def test_claims_only_route(self, client, auth_headers):
+        """Test que una ruta que solo usa los claims no consulta usuarios"""
+        queries, stop = _count_queries()
+        try:
+            response = client.get("/reservations/my", headers=auth_headers)
+        finally:
+            stop()
+
+        assert response.status_code == 200
+        assert not any("FROM usuarios" in q for q in queries)
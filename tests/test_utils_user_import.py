@@ -0,0 +1,84 @@
+"""
+Tests unitarios para la importación masiva de socios
+"""
+import time as _time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import verify_password
+from app.models.user import User, UserRole
+from app.utils.jobs import Job
+from app.utils.user_import import prepare_import, run_import
+
+
+def _run(db, raw: str, fmt: str) -> dict:
+    pending, errors, total = prepare_import(db, raw.encode(), fmt)
+    job = Job(id="test", tipo="importar_socios")
+    run_import(db, job, pending, errors, total)
+    assert job.procesados == job.total == len(pending)
+    return job.resultado
+
+
+class TestUserImport:
+    """Tests para prepare_import / run_import"""
+
+    def test_csv_import_with_error_report(self, db_session, sample_user):
+        """Test que se crean las filas válidas y el resto se informa fila a fila"""
+        raw = (
+            "nombre,email,password,rol\n"
+            "Ana,ana@example.com,password123,\n"
+            f"Dup,{sample_user.email},password123,\n"
+            "Corta,corta@example.com,abc,\n"
+            "Ana Bis,ana@example.com,password123,\n"
+            "Jefa,jefa@example.com,password123,admin\n"
+        )
+
+        report = _run(db_session, raw, "csv")
+
+        assert report["total"] == 5
+        assert report["creados"] == 2
+        assert [(e["fila"], e["email"]) for e in report["errores"]] == [
+            (3, sample_user.email),
+            (4, "corta@example.com"),
+            (5, "ana@example.com"),
+        ]
+        ana = db_session.query(User).filter_by(email="ana@example.com").one()
+        assert verify_password("password123", ana.hashed_password)
+        assert db_session.query(User).filter_by(email="jefa@example.com").one().rol == UserRole.admin
+
+    def test_ndjson_import(self, db_session):
+        """Test que NDJSON acepta un objeto por línea e informa las líneas inválidas"""
+        raw = '{"nombre": "Luis", "email": "luis@example.com", "password": "password123"}\n\nno es json\n'
+
+        report = _run(db_session, raw, "ndjson")
+
+        assert report["creados"] == 1
+        assert report["errores"] == [{"fila": 3, "email": None, "error": "JSON inválido"}]
+
+    def test_csv_missing_columns(self, db_session):
+        """Test que una cabecera incompleta se rechaza entera"""
+        with pytest.raises(HTTPException) as exc:
+            prepare_import(db_session, b"nombre,email\nA,a@example.com\n", "csv")
+        assert exc.value.status_code == 422
+
+    def test_import_endpoint_runs_as_job(self, client, admin_headers, auth_headers, monkeypatch):
+        """Test que el endpoint valida, responde 202 y deja el informe en el trabajo"""
+        from app.utils.jobs import job_registry
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(job_registry, "session_factory", TestingSessionLocal)
+        body = "nombre,email,password\nEva,eva@example.com,password123\n"
+
+        assert client.post("/admin/users/import", content=body, headers=auth_headers).status_code == 403
+        response = client.post("/admin/users/import", content=body, headers={**admin_headers, "Content-Type": "text/csv"})
+        assert response.status_code == 202
+
+        url = f"/admin/jobs/{response.json()['id']}"
+        deadline = _time.monotonic() + 5
+        job = client.get(url, headers=admin_headers).json()
+        while job["estado"] in ("pendiente", "en_curso") and _time.monotonic() < deadline:
+            _time.sleep(0.01)
+            job = client.get(url, headers=admin_headers).json()
+        assert job["estado"] == "completado"
+        assert job["resultado"] == {"total": 1, "creados": 1, "errores": []}